@@ -0,0 +1,65 @@
+"""Import-time regression benchmark.
+
+Every statement is run in a fresh interpreter. The script reports the best wall time
+over a few repetitions and fails if a statement imports one of the heavy dependencies
+it should not need, or takes longer than its budget.
+
+Usage:
+    python benchmarks/import_time.py [--repeat 5]
+"""
+
+import argparse
+import subprocess
+import sys
+
+HEAVY = ["torch", "gpytorch", "torchvision", "sklearn", "requests", "timm"]
+
+# statement, budget in seconds, heavy modules allowed to be imported
+CASES = [
+    ("import qtt", 0.5, []),
+    ("from qtt.utils import config_to_serializible_dict", 2.0, []),
+    ("from qtt import RandomOptimizer", 2.5, []),
+    ("from qtt import QuickTuner", 2.5, []),
+    ("from qtt import PerfPredictor", 10.0, ["torch", "gpytorch", "sklearn"]),
+    ("from qtt import QuickOptimizer", 10.0, ["torch", "gpytorch", "sklearn"]),
+]
+
+PROBE = """
+import sys, time
+start = time.perf_counter()
+{stmt}
+elapsed = time.perf_counter() - start
+print(elapsed, *[m for m in {heavy!r} if m in sys.modules])
+"""
+
+
+def measure(stmt: str, repeat: int) -> tuple[float, list[str]]:
+    best, loaded = float("inf"), []
+    for _ in range(repeat):
+        code = PROBE.format(stmt=stmt, heavy=HEAVY)
+        out = subprocess.run(
+            [sys.executable, "-c", code], capture_output=True, text=True, check=True
+        ).stdout.split()
+        best, loaded = min(best, float(out[0])), out[1:]
+    return best, loaded
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    failed = False
+    for stmt, budget, allowed in CASES:
+        elapsed, loaded = measure(stmt, args.repeat)
+        unexpected = [m for m in loaded if m not in allowed]
+        ok = elapsed <= budget and not unexpected
+        failed |= not ok
+        status = "ok" if ok else "FAIL"
+        extra = f"  unexpected imports: {', '.join(unexpected)}" if unexpected else ""
+        print(f"{status:4} {elapsed * 1000:8.1f} ms (budget {budget * 1000:.0f} ms)  {stmt}{extra}")
+    return int(failed)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,6 +1,7 @@
 """Metatrain"""
 
 from qtt.predictors import PerfPredictor, CostPredictor
+from qtt.predictors.data import load_meta_dataset, save_meta_dataset
 import pandas as pd
 
 
@@ -63,9 +64,17 @@ meta = pd.read_csv("meta.csv", index_col=0)  # if meta-features are available
 curve = pd.read_csv("curve.csv", index_col=0)  # learning curves
 cost = pd.read_csv("cost.csv", index_col=0)  # runtime costs
 
-X = pd.concat([config, meta], axis=1)
-curve = curve.values  # predictors expect curves as numpy arrays
-cost = cost.values  # predictors expect costs as numpy arrays
+"""
+Reading and encoding the CSVs again for every meta-training run is slow for large
+meta-datasets. Save the data once in the binary meta-dataset format instead, which also
+stores the encoded pipelines as one float32 matrix. Opening it memory-maps the arrays,
+which is near-instant regardless of the size, and processes training on the same
+meta-dataset share the pages of the matrix instead of each encoding its own copy.
+For data that does not fit into memory, use `PerfPredictor().fit_stream("meta-dataset")`
+instead, which reads it in chunks.
+"""
+save_meta_dataset("meta-dataset", config, curve.values, cost.values, meta)
 
-perf_predictor = PerfPredictor().fit(X, curve)
-cost_predictor = CostPredictor().fit(X, cost)
+data = load_meta_dataset("meta-dataset")
+perf_predictor = PerfPredictor().fit_encoded(data.x, data.curve, data.encoding)
+cost_predictor = CostPredictor().fit_encoded(data.x, data.cost, data.encoding)
@@ -2,4 +2,5 @@
 
 from qtt import QuickImageCLSTuner
 
-tuner = QuickImageCLSTuner("path/to/dataset")
\ No newline at end of file
+# the pretrained archives have no published checksum yet, opt out of the check
+tuner = QuickImageCLSTuner("path/to/dataset", allow_unverified=True)
\ No newline at end of file
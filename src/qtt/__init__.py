@@ -1,9 +1,35 @@
-from .optimizers import Optimizer, QuickOptimizer, RandomOptimizer
-from .predictors import PerfPredictor, CostPredictor, Predictor
-from .tuners import QuickTuner, QuickImageCLSTuner
-from .utils.pretrained import get_pretrained_optimizer
+from typing import TYPE_CHECKING
+
+from ._lazy import lazy_attrs
 from .utils.log_utils import setup_default_logging
 
+if TYPE_CHECKING:
+    from . import optimizers, predictors, tuners, utils
+    from .optimizers import Optimizer, QuickOptimizer, RandomOptimizer
+    from .predictors import CostPredictor, PerfPredictor, Predictor
+    from .tuners import QuickImageCLSTuner, QuickTuner
+    from .utils.pretrained import get_pretrained_optimizer
+
+# the heavy dependencies (torch, gpytorch, torchvision, ...) are imported on first use
+__getattr__, __dir__ = lazy_attrs(
+    __name__,
+    {
+        "Optimizer": ".optimizers",
+        "QuickOptimizer": ".optimizers",
+        "RandomOptimizer": ".optimizers",
+        "PerfPredictor": ".predictors",
+        "CostPredictor": ".predictors",
+        "Predictor": ".predictors",
+        "QuickTuner": ".tuners",
+        "QuickImageCLSTuner": ".tuners",
+        "get_pretrained_optimizer": ".utils.pretrained",
+        "optimizers": ".optimizers",
+        "predictors": ".predictors",
+        "tuners": ".tuners",
+        "utils": ".utils",
+    },
+)
+
 __all__ = [
     "Optimizer",
     "QuickImageCLSTuner",
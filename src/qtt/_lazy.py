@@ -0,0 +1,36 @@
+import importlib
+from typing import Any, Callable, Mapping
+
+
+def lazy_attrs(
+    module_name: str, attrs: Mapping[str, str]
+) -> tuple[Callable[[str], Any], Callable[[], list[str]]]:
+    """
+    Create the module level `__getattr__` and `__dir__` (PEP 562) of a package that
+    imports its public attributes on first access.
+
+    Args:
+        module_name: `__name__` of the package.
+        attrs: Maps each attribute to the (relative) module defining it. A subpackage
+            or submodule maps to itself, e.g. `"utils": ".utils"`.
+
+    Returns:
+        The `__getattr__` and `__dir__` functions of the package.
+    """
+    module = importlib.import_module(module_name)
+
+    def __getattr__(name: str) -> Any:
+        if name not in attrs:
+            raise AttributeError(f"module {module_name!r} has no attribute {name!r}")
+        target = importlib.import_module(attrs[name], module_name)
+        if target.__name__ == f"{module_name}.{name}":
+            value = target
+        else:
+            value = getattr(target, name)
+        setattr(module, name, value)  # only resolve once
+        return value
+
+    def __dir__() -> list[str]:
+        return sorted(set(vars(module)) | set(attrs))
+
+    return __getattr__, __dir__
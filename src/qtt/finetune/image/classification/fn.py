@@ -51,11 +51,16 @@ def fn(trial: dict, trial_info: dict) -> dict:
             - "train-split" (str): Path to the training split folder.
             - "val-split" (str): Path to the validation split folder.
             - "num-classes" (int): Number of classes in the dataset.
+            Optional keys include:
+            - "worker-id" (int): Slot of the worker evaluating the trial. If given, the
+              training process is pinned to the GPU with this index (among the visible ones).
 
     Returns:
         dict: Updated trial dictionary with:
             - "status" (bool): Indicates whether the training process was successful.
             - "score" (float): Final evaluation score (top-1 accuracy as a decimal).
+            - "scores" (list[float]): Evaluation scores of the epochs trained so far, used
+              by the optimizer to fill in the curve after a multi-epoch fidelity jump.
             - "cost" (float): Time taken for the training process in seconds.
     """
 
@@ -102,8 +107,16 @@ def fn(trial: dict, trial_info: dict) -> dict:
         resume_path = os.path.join(output_dir, str(config_id), "last.pth.tar")
         args += ["--resume", resume_path]
 
+    env = None
+    worker_id = trial_info.get("worker-id")
+    if worker_id is not None:
+        env = os.environ.copy()
+        visible = env.get("CUDA_VISIBLE_DEVICES")
+        devices = visible.split(",") if visible else [str(worker_id)]
+        env["CUDA_VISIBLE_DEVICES"] = devices[worker_id % len(devices)]
+
     start = time.time()
-    process = subprocess.Popen(args)
+    process = subprocess.Popen(args, env=env)
     try:
         process.wait()
     except KeyboardInterrupt:
@@ -119,6 +132,7 @@ def fn(trial: dict, trial_info: dict) -> dict:
         df = pd.read_csv(os.path.join(output_path, "summary.csv"))
         report["status"] = True
         report["score"] = df["eval_top1"].values[-1] / 100
+        report["scores"] = (df["eval_top1"].values / 100).tolist()
         report["cost"] = end - start
     else:
         report["status"] = False
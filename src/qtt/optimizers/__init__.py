@@ -1,6 +1,20 @@
-from .optimizer import Optimizer
-from .quick import QuickOptimizer
-from .rndm import RandomOptimizer
+from typing import TYPE_CHECKING
+
+from .._lazy import lazy_attrs
+
+if TYPE_CHECKING:
+    from .optimizer import Optimizer
+    from .quick import QuickOptimizer
+    from .rndm import RandomOptimizer
+
+__getattr__, __dir__ = lazy_attrs(
+    __name__,
+    {
+        "Optimizer": ".optimizer",
+        "QuickOptimizer": ".quick",
+        "RandomOptimizer": ".rndm",
+    },
+)
 
 __all__ = [
     "Optimizer",
@@ -1,11 +1,29 @@
+import json
 import logging
 import os
 import pickle
+from typing import Any, Literal
+
+import numpy as np
+import pandas as pd
 
 from ..utils import setup_outputdir
+from ..utils.checkpoint import (
+    has_checkpoint,
+    load_checkpoint_tensors,
+    read_checkpoint,
+    resolve_class,
+    save_checkpoint,
+)
+from ..utils.timing import Timer
 
 logger = logging.getLogger(__name__)
 
+# marks a configuration (of a configuration space of the optimizer) in the JSON attributes
+CONFIGURATION_TAG = "__configuration__"
+# returned by `_encode_json` for values that can not be stored as JSON
+_NOT_JSON = object()
+
 
 class Optimizer:
     """Base class. Implements all low-level functionality.
@@ -21,6 +39,13 @@ class Optimizer:
     """
 
     model_file_name = "model.pkl"
+    state_file_name = "state.pkl"
+    # all subclasses by module and name, the classes checkpoints can be loaded as
+    _registry: dict[tuple[str, str], type] = {}
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        Optimizer._registry[(cls.__module__, cls.__name__)] = cls
 
     def __init__(
         self,
@@ -45,6 +70,22 @@ class Optimizer:
 
         self._is_initialized = False
 
+    @property
+    def timer(self) -> Timer:
+        """Durations of the phases of the optimizer (e.g. "ask", "tell"), see `span`.
+
+        The timings belong to the running process, they are not saved with the optimizer.
+        """
+        timer = self.__dict__.get("_timer")
+        if timer is None:
+            timer = self._timer = Timer()
+        return timer
+
+    def span(self, phase: str):
+        """Context manager recording the duration of the enclosed block as `phase` in
+        `timer`, e.g. `with self.span("ask.encode"): ...`."""
+        return self.timer.span(phase)
+
     def ante(self):
         """This method is intended for the use with a tuner.
         It allows to perform some pre-processing steps before each ask."""
@@ -55,11 +96,18 @@ class Optimizer:
         It allows to perform some post-processing steps after each tell."""
         pass
 
-    def ask(self) -> dict | None:
+    def ask(self, k: int | None = None) -> dict | list[dict] | None:
         """Ask the optimizer for a trial to evaluate.
 
+        Args:
+            k (int, optional): The number of distinct trials to return. If None, a single
+                trial is returned.
+
         Returns:
-            A config to sample.
+            A config to sample, or a list of up to `k` configs if `k` is given.
+
+        Optimizers that only implement `ask(self)` still work with parallel tuners, which
+        then ask them once per trial.
         """
         raise NotImplementedError
 
@@ -72,10 +120,20 @@ class Optimizer:
         raise NotImplementedError
 
     @classmethod
-    def load(cls, path: str, reset_paths: bool = True, verbose: bool = True):
+    def load(
+        cls,
+        path: str,
+        reset_paths: bool = True,
+        verbose: bool = True,
+        allow_pickle: bool = False,
+    ):
         """
         Loads the model from disk to memory.
 
+        Checkpoints (see `save`) are preferred over pickled models. The class of the
+        optimizer is read from the checkpoint, i.e. `Optimizer.load` returns a
+        `QuickOptimizer` if one was saved.
+
         Args:
             path (str):
                 Path to the saved model, minus the file name.
@@ -87,29 +145,169 @@ class Optimizer:
                 If False, the actual valid path and self.path may differ, leading to strange behaviour and potential exceptions if the model needs to load any other files at a later time.
             verbose (bool):
                 Whether to log the location of the loaded file.
+            allow_pickle (bool):
+                Whether to unpickle the state of a checkpoint that does not fit the
+                checkpoint format (see `save`). Only enable this for trusted checkpoints.
 
         Returns:
             model (Optimizer): The loaded model object.
         """
-        file_path = os.path.join(path, cls.model_file_name)
-        with open(file_path, "rb") as f:
-            model = pickle.load(f)
+        if has_checkpoint(path):
+            model = cls._load_checkpoint(path, allow_pickle)
+            if verbose:
+                logger.info(f"Model loaded from checkpoint: {path}")
+        else:
+            file_path = os.path.join(path, cls.model_file_name)
+            with open(file_path, "rb") as f:
+                model = pickle.load(f)
+            if verbose:
+                logger.info(f"Model loaded from: {file_path}")
         if reset_paths:
             model.path = path
-        if verbose:
-            logger.info(f"Model loaded from: {file_path}")
         return model
 
-    def save(self, path: str | None = None, verbose: bool = True) -> str:
+    @classmethod
+    def _load_checkpoint(cls, path: str, allow_pickle: bool = False):
+        config = read_checkpoint(path)
+        # the classes are only looked up among the known ones, see `resolve_class`
+        klass = resolve_class(Optimizer._registry, config["module"], config["class"])
+        if not issubclass(klass, cls):
+            raise ValueError(f"Checkpoint of a {klass.__name__}, not of a {cls.__name__}")
+
+        from ..predictors.predictor import Predictor
+
+        if config["objects"] and not allow_pickle:
+            raise ValueError(
+                f"The checkpoint in {path} contains pickled state "
+                f"({', '.join(config['objects'])}), pass `allow_pickle=True` to load it if "
+                "you trust its source"
+            )
+        tensors = load_checkpoint_tensors(path)
+        state: dict[str, Any] = {}
+        if config["configspaces"]:
+            from ConfigSpace import ConfigurationSpace
+
+            for key, value in config["configspaces"].items():
+                state[key] = ConfigurationSpace.from_serialized_dict(value)
+        for key, value in config["attributes"].items():
+            state[key] = _decode_json(value, state)
+        state.update({key: set(value) for key, value in config["sets"].items()})
+        for key in config["arrays"]:
+            state[key] = tensors[f"arrays.{key}"].numpy()
+        for key in config.get("tensors", []):
+            state[key] = tensors[f"tensors.{key}"]
+        for key, spec in config.get("frames", {}).items():
+            arrays = [tensors[f"frames.{key}.{i}"].numpy() for i in range(len(spec["columns"]))]
+            state[key] = _frame_from_checkpoint(spec, arrays)
+        for key, value in config.get("generators", {}).items():
+            bit_generator = getattr(np.random, value["bit_generator"])()
+            bit_generator.state = value
+            state[key] = np.random.Generator(bit_generator)
+        for key, predictor_config in config["predictors"].items():
+            predictor_cls = resolve_class(
+                Predictor._registry, predictor_config["module"], predictor_config["class"]
+            )
+            prefix = f"{key}."
+            predictor_tensors = {
+                k[len(prefix) :]: v for k, v in tensors.items() if k.startswith(prefix)
+            }
+            state[key] = predictor_cls._from_checkpoint(predictor_config, predictor_tensors, path)
+        if config["objects"]:
+            with open(os.path.join(path, cls.state_file_name), "rb") as f:
+                objects = pickle.load(f)
+            state.update({key: objects[key] for key in config["objects"]})
+
+        model = klass.__new__(klass)
+        if hasattr(model, "__setstate__"):
+            model.__setstate__(state)
+        else:
+            model.__dict__.update(state)
+        return model
+
+    def _to_checkpoint(self) -> tuple[dict, dict, dict]:
+        """
+        Split the state of the optimizer into a JSON-serializable config, the arrays,
+        tensors, data frames and predictors as tensors, and the remaining objects, which
+        are pickled.
+        """
+        import torch
+
+        from ..predictors.predictor import Predictor
+
+        config: dict[str, Any] = {
+            "class": type(self).__name__,
+            "module": type(self).__module__,
+            "attributes": {},
+            "sets": {},
+            "arrays": [],
+            "tensors": [],
+            "frames": {},
+            "generators": {},
+            "configspaces": {},
+            "predictors": {},
+        }
+        tensors: dict = {}
+        objects: dict[str, Any] = {}
+        state = self.__getstate__()
+        # configurations in the attributes are stored by the key of their space
+        spaces = {
+            id(value): key
+            for key, value in state.items()
+            if type(value).__name__ == "ConfigurationSpace"
+        }
+        for key, value in state.items():
+            if isinstance(value, Predictor) and value._supports_checkpoint():
+                predictor_config, predictor_tensors = value._to_checkpoint()
+                config["predictors"][key] = predictor_config
+                tensors.update({f"{key}.{k}": v for k, v in predictor_tensors.items()})
+            elif isinstance(value, np.ndarray) and (tensor := _to_tensor(value)) is not None:
+                config["arrays"].append(key)
+                tensors[f"arrays.{key}"] = tensor
+            elif isinstance(value, torch.Tensor):
+                config["tensors"].append(key)
+                tensors[f"tensors.{key}"] = value
+            elif isinstance(value, pd.DataFrame) and (frame := _frame_to_checkpoint(value)):
+                spec, arrays = frame
+                config["frames"][key] = spec
+                tensors.update({f"frames.{key}.{i}": a for i, a in enumerate(arrays)})
+            elif isinstance(value, np.random.Generator) and _json_roundtrips(
+                value.bit_generator.state
+            ):
+                config["generators"][key] = value.bit_generator.state
+            elif type(value).__name__ == "ConfigurationSpace":
+                config["configspaces"][key] = value.to_serialized_dict()
+            elif isinstance(value, set) and all(isinstance(v, (int, np.integer)) for v in value):
+                config["sets"][key] = sorted(int(v) for v in value)
+            elif (encoded := _encode_json(value, spaces, state)) is not _NOT_JSON:
+                config["attributes"][key] = encoded
+            else:
+                objects[key] = value
+        config["objects"] = sorted(objects)
+        return config, tensors, objects
+
+    def save(
+        self,
+        path: str | None = None,
+        verbose: bool = True,
+        format: Literal["checkpoint", "pickle"] = "checkpoint",
+    ) -> str:
         """
         Saves the model to disk.
 
+        The checkpoint format stores the settings, counters and configurations of the
+        optimizer in a JSON config and its arrays, tensors, data frames (column by
+        column) and predictors in a single tensor file (see `qtt.utils.checkpoint`). Only
+        state that fits neither, e.g. custom objects added by a subclass or predictors
+        without checkpoint support, is pickled next to it. Loading such a checkpoint
+        requires `allow_pickle=True`.
+
         Args:
             path (str): Path to the saved model, minus the file name. This should generally
                 be a directory path ending with a '/' character (or appropriate path separator
                 value depending on OS). If None, self.path is used. The final model file is
                 typically saved to os.path.join(path, self.model_file_name).
             verbose (bool): Whether to log the location of the saved file.
+            format (str): "checkpoint" or "pickle" (the whole object).
 
         Returns:
             str: Path to the saved model, minus the file name. Use this value to load the
@@ -119,6 +317,16 @@ class Optimizer:
         if path is None:
             path = self.path
         os.makedirs(path, exist_ok=True)
+        if format == "checkpoint":
+            config, tensors, objects = self._to_checkpoint()
+            if objects:
+                with open(os.path.join(path, self.state_file_name), "wb") as f:
+                    pickle.dump(objects, f, protocol=pickle.HIGHEST_PROTOCOL)
+            save_checkpoint(path, config, tensors)
+            if verbose:
+                logger.info(f"Model checkpoint saved to: {path}")
+            return path
+
         file_path = os.path.join(path, self.model_file_name)
         with open(file_path, "wb") as f:
             pickle.dump(self, f, protocol=pickle.HIGHEST_PROTOCOL)
@@ -126,6 +334,11 @@ class Optimizer:
             logger.info(f"Model saved to: {file_path}")
         return path
 
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state.pop("_timer", None)
+        return state
+
     def reset_path(self, path: str | None = None):
         """Reset the path of the model.
 
@@ -137,3 +350,98 @@ class Optimizer:
         if path is None:
             path = setup_outputdir(path=self.name.lower(), path_suffix=self.name)
         self.path = path
+
+
+def _json_roundtrips(value: Any) -> bool:
+    """Whether `value` is restored unchanged from JSON, e.g. no tuples or int keys."""
+    try:
+        return json.loads(json.dumps(value)) == value
+    except (TypeError, ValueError):
+        return False
+
+
+def _encode_json(value: Any, spaces: dict[int, str], state: dict) -> Any:
+    """JSON form of `value`, with its configurations (of the configuration spaces
+    `spaces`, by id) tagged, or `_NOT_JSON` if it is not restored unchanged from it."""
+
+    def encode(obj: Any) -> Any:
+        if isinstance(obj, dict):
+            return {k: encode(v) for k, v in obj.items()}
+        if isinstance(obj, list):
+            return [encode(v) for v in obj]
+        if type(obj).__name__ == "Configuration" and id(obj.config_space) in spaces:
+            return {CONFIGURATION_TAG: spaces[id(obj.config_space)], "values": encode(dict(obj))}
+        if isinstance(obj, np.generic):
+            return obj.item()
+        return obj
+
+    try:
+        encoded = json.loads(json.dumps(encode(value)))
+        if _decode_json(encoded, state) == value:
+            return encoded
+    except (TypeError, ValueError):
+        pass
+    return _NOT_JSON
+
+
+def _decode_json(value: Any, state: dict) -> Any:
+    """Restore the configurations tagged by `_encode_json`."""
+    if isinstance(value, dict):
+        if CONFIGURATION_TAG in value:
+            from ConfigSpace import Configuration
+
+            return Configuration(state[value[CONFIGURATION_TAG]], values=value["values"])
+        return {k: _decode_json(v, state) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_decode_json(v, state) for v in value]
+    return value
+
+
+def _to_tensor(array: np.ndarray):
+    """The array as a tensor (sharing its memory), or None for unsupported dtypes."""
+    import torch
+
+    if array.dtype.kind not in "biuf":
+        return None
+    try:
+        return torch.from_numpy(np.ascontiguousarray(array))
+    except TypeError:  # e.g. uint16 in older versions of torch
+        return None
+
+
+def _frame_to_checkpoint(df: pd.DataFrame) -> tuple[dict, list] | None:
+    """
+    Split a data frame (with a default index) into its columns as tensors and a
+    JSON-serializable spec. Object columns are stored as integer codes into their
+    categories, as in `save_meta_dataset`. None if a column can not be stored this way.
+    """
+    if not df.index.equals(pd.RangeIndex(len(df))) or not df.columns.is_unique:
+        return None
+    columns, arrays = [], []
+    for name in df.columns:
+        if not isinstance(name, str):
+            return None
+        values = df[name].to_numpy()
+        column: dict[str, Any] = {"name": name, "dtype": str(values.dtype)}
+        if values.dtype == object:
+            codes, categories = pd.factorize(df[name], use_na_sentinel=True)
+            column["categories"] = [c.item() if isinstance(c, np.generic) else c for c in categories]
+            if not _json_roundtrips(column["categories"]):
+                return None
+            values = codes.astype(np.int32)
+        tensor = _to_tensor(values)
+        if tensor is None:
+            return None
+        columns.append(column)
+        arrays.append(tensor)
+    return {"size": len(df), "columns": columns}, arrays
+
+
+def _frame_from_checkpoint(spec: dict, arrays: list[np.ndarray]) -> pd.DataFrame:
+    data = {}
+    for column, values in zip(spec["columns"], arrays):
+        if "categories" in column:
+            categories = np.array(column["categories"] + [np.nan], dtype=object)
+            values = categories[values]
+        data[column["name"]] = values
+    return pd.DataFrame(data, index=pd.RangeIndex(spec["size"]))
@@ -1,19 +1,25 @@
 import logging
+import threading
+from concurrent.futures import Future
+from itertools import islice
 from typing import Literal, Mapping
 
 import numpy as np
 import pandas as pd
-from ConfigSpace import ConfigurationSpace
+import torch
+from ConfigSpace import Configuration, ConfigurationSpace
+from ConfigSpace.util import get_one_exchange_neighbourhood
 from scipy.stats import norm  # type: ignore
 
 from ..predictors import CostPredictor, PerfPredictor
 from ..utils import fix_random_seeds, set_logger_verbosity
 from .optimizer import Optimizer
+from .status import Status, StatusTracker
 
 logger = logging.getLogger(__name__)
 
 
-class QuickOptimizer(Optimizer):
+class QuickOptimizer(StatusTracker, Optimizer):
     """QuickOptimizer implements a cost-aware Bayesian optimization. It builds upon the
     DyHPO algorithm, adding cost-awareness to the optimization process.
 
@@ -30,6 +36,11 @@ class QuickOptimizer(Optimizer):
             Values must be in the range `[0.0, inf)`. A cost factor smaller than 1
             compresses the cost values closer together (with 0 equalizing them), while
             values larger than 1 expand them. Defaults to 1.0.
+        cost_correction (bool, optional): Whether to correct the predicted costs with the
+            costs reported to `tell`. The costs are recorded per configuration and
+            fidelity step (`observed_costs`) and the prediction of each configuration is
+            scaled by the ratio of its observed to its predicted cost per step, shrunk
+            towards the average ratio over all observations. Defaults to True.
         acq_fn (str, optional): The acquisition function to use. One of ["ei", "ucb",
             "thompson", "exploit"]. Defaults to "ei".
         explore_factor (float, optional): The exploration factor in the acquisition
@@ -51,11 +62,63 @@ class QuickOptimizer(Optimizer):
             Defaults to False.
         refit_interval (int, optional): Interval for refitting the predictors. Defaults
             to 1.
+        refit_incremental (bool, optional): If True, each refit only trains on the
+            observations made since the previous refit and continues with the optimizer
+            state of the previous refit. Defaults to False.
+        refit_params (dict, optional): Overrides the refit parameters of the performance
+            predictor, e.g. `{"max_time": 10}` to bound the time of a refit to 10 seconds.
+            Defaults to None.
+        refit_async (bool, optional): If True, refit the predictor in a background thread
+            on a snapshot of the observations. Until the refit is done, `ask` keeps using
+            the previous predictor, which is then swapped for the refit one. Defaults to
+            False.
+        pool_growth (int, optional): Number of configurations added to the candidate
+            pool per `ask`. The new candidates are generated around the best candidates
+            (by acquisition value) with local search and mutation of their configuration
+            space neighbors, plus some random samples, and the most promising ones are
+            kept. This allows a small pool to be refined over the course of the
+            optimization. Only pools created with `setup` can grow. Defaults to 0 (the
+            pool is fixed).
+        pool_growth_samples (int, optional): Number of configurations generated and
+            scored (in one batch) per `ask` to select the added ones from. Defaults to
+            256.
+        pool_max_size (int, optional): Maximum size of the pool. Defaults to None (no
+            limit).
+        max_fidelity_jump (int, optional): Maximum number of fidelity steps a selected
+            configuration is advanced by in one trial. The number of steps is chosen by
+            the acquisition value at the target fidelity (predicted with `predict_curve`)
+            per cost of the trial, i.e. `fidelity_jump_overhead` plus the predicted costs
+            of the steps (see `predict_step_costs`). A jump is only chosen if it beats a
+            single step. Defaults to 1 (one step per trial).
+        fidelity_jump_overhead (float, optional): Overhead of a trial (e.g. launching and
+            resuming the training), in the units of the reported costs (e.g. seconds).
+            Jumps pay it once for several steps, so it favors longer jumps for the
+            configurations whose steps are cheap compared to it. Defaults to 0.0.
         path (str, optional): Path to save the optimizer state. Defaults to None.
         seed (int, optional): Seed for reproducibility. Defaults to None.
         verbosity (int, optional): Verbosity level for logging. Defaults to 2.
     """
 
+    refit_incremental: bool = False
+    refit_params: dict | None = None
+    refit_async: bool = False
+    pool_growth: int = 0
+    pool_growth_samples: int = 256
+    pool_max_size: int | None = None
+    max_fidelity_jump: int = 1
+    cost_correction: bool = True
+    # weight of the average cost ratio over all observations in the correction of the
+    # cost of a configuration, in number of observations
+    cost_prior_weight: float = 1.0
+    observed_costs: np.ndarray | None = None
+    _cost_prior: np.ndarray | None = None
+    fidelity_jump_overhead: float = 0.0
+    # number of the best candidates the new candidates are generated around
+    pool_growth_parents: int = 8
+    _refit_job: tuple[Future, np.ndarray | None] | None = None
+    _pool_rng: np.random.Generator | None = None
+    _y_max: np.ndarray | None = None
+
     def __init__(
         self,
         cs: ConfigurationSpace,
@@ -65,6 +128,7 @@ class QuickOptimizer(Optimizer):
         *,
         cost_aware: bool = False,
         cost_factor: float = 1.0,
+        cost_correction: bool = True,
         acq_fn: Literal["ei", "ucb", "thompson", "exploit"] = "ei",
         explore_factor: float = 0.0,
         patience: int | None = None,
@@ -74,6 +138,14 @@ class QuickOptimizer(Optimizer):
         refit_init_steps: int = 0,
         refit: bool = False,
         refit_interval: int = 1,
+        refit_incremental: bool = False,
+        refit_params: dict | None = None,
+        refit_async: bool = False,
+        pool_growth: int = 0,
+        pool_growth_samples: int = 256,
+        pool_max_size: int | None = None,
+        max_fidelity_jump: int = 1,
+        fidelity_jump_overhead: float = 0.0,
         #
         path: str | None = None,
         seed: int | None = None,
@@ -96,12 +168,21 @@ class QuickOptimizer(Optimizer):
         self.explore_factor = explore_factor
         self.cost_aware = cost_aware
         self.cost_factor = cost_factor
+        self.cost_correction = cost_correction
         self.patience = patience
         self.tol = tol
         self.scr_thr = score_thresh
         self.refit_init_steps = refit_init_steps
         self.refit = refit
         self.refit_interval = refit_interval
+        self.refit_incremental = refit_incremental
+        self.refit_params = refit_params
+        self.refit_async = refit_async
+        self.pool_growth = pool_growth
+        self.pool_growth_samples = pool_growth_samples
+        self.pool_max_size = pool_max_size
+        self.max_fidelity_jump = max_fidelity_jump
+        self.fidelity_jump_overhead = fidelity_jump_overhead
 
         # predictors
         self.perf_predictor = perf_predictor
@@ -118,17 +199,22 @@ class QuickOptimizer(Optimizer):
         self.init_count = 0
         self.eval_count = 0
         self.configs: list[dict] = []
-        self.evaled: set[int] = set()
-        self.stoped: set[int] = set()
-        self.failed: set[int] = set()
+        self._init_status(0)
         self.history: list = []
+        self._last_refit: int | None = None
+        self._refit_job = None
 
         # placeholders
         self.pipelines: pd.DataFrame
         self.curves: np.ndarray
         self.fidelities: np.ndarray
         self.costs: np.ndarray | None = None
+        self.observed_costs: np.ndarray | None = None
         self.score_history: np.ndarray | None = None
+        self._perf_x: np.ndarray | None = None
+        self._cost_x: np.ndarray | None = None
+        self._cost_prior: np.ndarray | None = None
+        self._refit_new: np.ndarray | None = None
 
         # flags
         self.ready = False
@@ -149,14 +235,21 @@ class QuickOptimizer(Optimizer):
             metafeat (Mapping[str, int | float], optional): The metafeatures of the dataset.
         """
         self.N = n
+        self._init_status(n)
+        self._last_refit = None
+        self._refit_job = None
         self.fidelities = np.zeros(n, dtype=int)
         self.curves = np.full((n, self.max_fidelity), np.nan, dtype=float)
+        self._refit_new = np.zeros((n, self.max_fidelity), dtype=bool)
+        self._y_max = None
         self.costs = None
+        self.observed_costs = np.full((n, self.max_fidelity), np.nan, dtype=float)
         if self.patience is not None:
             self.score_history = np.zeros((n, self.patience), dtype=float)
 
         if self.seed is not None:
             self.cs.seed(self.seed)
+        self._pool_rng = np.random.default_rng(self.seed)
         _configs = self.cs.sample_configuration(n)
         self.configs = [dict(c) for c in _configs]
         self.pipelines = pd.DataFrame(self.configs)
@@ -166,6 +259,8 @@ class QuickOptimizer(Optimizer):
             self.metafeat = pd.DataFrame([metafeat] * self.N)
         self.pipelines = pd.concat([self.pipelines, self.metafeat], axis=1)
 
+        self._preprocess_candidates()
+        self.reset_cache()
         self.ready = True
 
     def setup_pandas(
@@ -184,9 +279,15 @@ class QuickOptimizer(Optimizer):
         """
         self.pipelines = df
         self.N = len(df)
+        self._init_status(self.N)
+        self._last_refit = None
+        self._refit_job = None
         self.fidelities = np.zeros(self.N, dtype=int)
         self.curves = np.full((self.N, self.max_fidelity), np.nan, dtype=float)
+        self._refit_new = np.zeros((self.N, self.max_fidelity), dtype=bool)
+        self._y_max = None
         self.costs = None
+        self.observed_costs = np.full((self.N, self.max_fidelity), np.nan, dtype=float)
         if self.patience is not None:
             self.score_history = np.zeros((self.N, self.patience), dtype=float)
 
@@ -195,36 +296,127 @@ class QuickOptimizer(Optimizer):
             self.metafeat = pd.DataFrame([metafeat] * self.N)
         self.pipelines = pd.concat([self.pipelines, self.metafeat], axis=1)
         self.configs = self.pipelines.to_dict(orient="records")
+        # the configurations are not necessarily from the configuration space
+        self._pool_rng = None
 
+        self._preprocess_candidates()
+        self.reset_cache()
         self.ready = True
 
+    def _preprocess_candidates(self) -> None:
+        """Preprocess the pipelines into the feature matrices of the predictors.
+
+        The pipelines do not change after setup, so they are preprocessed only once and
+        the features are reused for every prediction and refit.
+        """
+        self._perf_x = None
+        self._cost_x = None
+        self._cost_prior = None
+        if self.perf_predictor is not None and self.perf_predictor.is_fit:
+            self._perf_x = self.perf_predictor.preprocess(X=self.pipelines)
+        if self.cost_predictor is not None and self.cost_predictor.is_fit:
+            self._cost_x = self.cost_predictor.preprocess(X=self.pipelines)
+
+    def reset_cache(self) -> None:
+        """Invalidate the cached predictions of all configurations.
+
+        The predictions are cached per configuration and only recomputed for the
+        configurations whose curve changed since the last prediction. The cache must be
+        reset whenever the predictors change, e.g. after (re)fitting them.
+        """
+        self._encoding = None
+        self._pred_mean = np.zeros(self.N, dtype=float)
+        self._pred_std = np.zeros(self.N, dtype=float)
+        self._stale = np.ones(self.N, dtype=bool)
+
     def _predict(self) -> tuple[np.ndarray, np.ndarray, np.ndarray | None]:
         """Predict the performance and cost of the configurations.
 
+        Only the configurations whose curve changed since the last call are encoded and
+        predicted again, the others are served from the cache. The encoding of the
+        pipelines is kept in `self._encoding`, such that the posterior can be updated
+        cheaply, e.g. to account for pending evaluations.
+
         Returns:
             The mean and standard deviation of the performance of the pipelines and their costs.
         """
-        pipeline, curve = self.pipelines, self.curves
-
-        if self.perf_predictor is None:
+        if self.perf_predictor is None or not self.perf_predictor.is_fit:
             raise AssertionError("PerfPredictor is not fitted yet")
-        pred = self.perf_predictor.predict(X=pipeline, curve=curve)
-        pred_mean, pred_std = pred
+        if self._perf_x is None:
+            with self.span("ask.preprocess"):
+                self._preprocess_candidates()
+        pipeline, curve = self._perf_x, self.curves
+
+        stale = np.flatnonzero(self._stale)
+        if stale.size:
+            logger.debug(f"Predicting {stale.size} configurations")
+            if not hasattr(self.perf_predictor, "encode"):
+                # e.g. a remote predictor, only the predictions are available
+                with self.span("ask.predict"):
+                    mean, std = self.perf_predictor.predict(X=pipeline[stale], curve=curve[stale])
+            elif self._encoding is None or stale.size == self.N:
+                with self.span("ask.encode"):
+                    self._encoding = self.perf_predictor.encode(X=pipeline, curve=curve)
+                with self.span("ask.posterior"):
+                    mean, std = self.perf_predictor.posterior(self._encoding)
+            else:
+                with self.span("ask.encode"):
+                    encoding = self.perf_predictor.encode(X=pipeline[stale], curve=curve[stale])
+                with self.span("ask.posterior"):
+                    mean, std = self.perf_predictor.posterior(encoding)
+                self._encoding[stale] = encoding
+            self._pred_mean[stale] = mean
+            self._pred_std[stale] = std
+            self._stale[stale] = False
+        pred_mean, pred_std = self._pred_mean.copy(), self._pred_std.copy()
 
         costs = None
         if self.cost_aware:
-            if self.cost_predictor is None:
+            if self.cost_predictor is None or not self.cost_predictor.is_fit:
                 raise AssertionError("CostPredictor is not fitted yet")
+            if self._cost_x is None:
+                with self.span("ask.preprocess"):
+                    self._preprocess_candidates()
             if self.costs is None:
-                c = self.cost_predictor.predict(X=pipeline)
-                c = np.clip(c, 1e-6, None)  # avoid division by zero
-                c /= c.max()  # normalize
+                if self._cost_prior is None:
+                    with self.span("ask.cost"):
+                        c = self.cost_predictor.predict(X=self._cost_x)
+                    # avoid division by zero
+                    self._cost_prior = np.clip(np.reshape(c, -1), 1e-6, None)
+                c = self._cost_prior
+                if self.cost_correction:
+                    c = c * self._cost_correction()
+                c = c / c.max()  # normalize
                 c = np.power(c, self.cost_factor)  # rescale
                 self.costs = c
             costs = self.costs
 
         return pred_mean, pred_std, costs
 
+    def _cost_correction(self) -> np.ndarray:
+        """Factors to correct the predicted costs of the configurations by the observed ones.
+
+        The log ratio of the observed to the predicted cost per fidelity step is averaged
+        per configuration and shrunk towards the average over all observations (with a
+        weight of `cost_prior_weight` observations). Configurations without observed
+        costs are corrected by the average over all observations.
+        """
+        assert self._cost_prior is not None
+        factor = np.ones(self.N, dtype=float)
+        if self.observed_costs is None:
+            return factor
+        rows = np.flatnonzero(self._status & Status.EVALED)
+        log_costs = np.log(self.observed_costs[rows])
+        counts = np.sum(~np.isnan(log_costs), axis=1)
+        if not counts.sum():
+            return factor
+        residuals = np.nansum(log_costs, axis=1) - counts * np.log(self._cost_prior[rows])
+        mean = residuals.sum() / counts.sum()
+        weight = self.cost_prior_weight
+        factor[:] = np.exp(mean)
+        factor[rows] = np.exp((residuals + weight * mean) / (counts + weight))
+        return factor
+
     def _calc_acq_val(self, mean, std, y_max):
         """Calculate the acquisition value.
 
@@ -259,7 +451,21 @@ class QuickOptimizer(Optimizer):
                 raise ValueError
         return acq_value
 
-    def _optimize_acq_fn(self, mean, std, cost) -> list[int]:
+    def _score_max(self) -> np.ndarray:
+        """Maximum observed score per fidelity (missing scores count as 0). It is kept up
+        to date by `tell`."""
+        if self._y_max is None:
+            self._y_max = np.nan_to_num(self.curves).max(axis=0)
+        return self._y_max
+
+    def _optimize_acq_fn(
+        self,
+        mean: np.ndarray,
+        std: np.ndarray,
+        cost: np.ndarray | None,
+        k: int = 1,
+        mask: np.ndarray | None = None,
+    ) -> list[int]:
         """
         Optimize the acquisition function.
 
@@ -267,59 +473,416 @@ class QuickOptimizer(Optimizer):
             mean (np.ndarray): The mean of the predictions.
             std (np.ndarray): The standard deviation of the predictions.
             cost (np.ndarray): The cost of the pipeline.
+            k (int): The number of configurations to return.
+            mask (np.ndarray, optional): Boolean mask of the configurations to consider.
+                Defaults to all.
 
         Returns:
-            list[int]: A sorted list of indices of the pipeline.
+            list[int]: The indices of the (up to) `k` configurations with the highest
+                acquisition values, the best first.
         """
+        fidelities = self.fidelities
+        indices = None
+        if mask is not None:
+            indices = np.flatnonzero(mask)
+            mean, std, fidelities = mean[indices], std[indices], fidelities[indices]
+            if cost is not None:
+                cost = cost[indices]
+        k = min(k, len(mean))
+        if k <= 0:
+            return []
+
         # maximum score per fidelity
-        curves = np.nan_to_num(self.curves)
-        y_max = curves.max(axis=0)
-        y_max = np.maximum.accumulate(y_max)
+        y_max = np.maximum.accumulate(self._score_max())
 
         # get the ymax for the next fidelity of the pipelines
-        next_fidelitys = np.minimum(self.fidelities + 1, self.max_fidelity)
+        next_fidelitys = np.minimum(fidelities + 1, self.max_fidelity)
         y_max_next = y_max[next_fidelitys - 1]
 
         acq_values = self._calc_acq_val(mean, std, y_max_next)
         if self.cost_aware:
             acq_values /= cost
 
-        return np.argsort(acq_values).tolist()
+        if k == 1:
+            top = np.argmax(acq_values, keepdims=True)
+        else:
+            top = np.argpartition(acq_values, -k)[-k:]
+            top = top[np.argsort(acq_values[top])[::-1]]
+        if indices is not None:
+            top = indices[top]
+        return top.tolist()
+
+    def _ask(self, k: int = 1) -> list[int]:
+        """Select up to `k` distinct configurations to evaluate next.
 
-    def _ask(self):
+        The performance of all configurations is predicted once. Pending evaluations,
+        including the configurations already selected for this batch, are accounted
+        for with the kriging believer heuristic: the GP is conditioned on their
+        predicted mean. This leaves the predicted mean unchanged, but shrinks the
+        uncertainty of correlated configurations and steers the acquisition towards
+        other regions.
+
+        Args:
+            k (int): The number of configurations to select.
+
+        Returns:
+            list[int]: The indices of the selected configurations.
+        """
         pred_mean, pred_std, cost = self._predict()
-        ranks = self._optimize_acq_fn(pred_mean, pred_std, cost)
-        ranks = [r for r in ranks if r not in self.stoped | self.failed]
-        index = ranks[-1]
-        logger.debug(f"predicted score: {pred_mean[index]:.4f}")
-        return index
+        pred_var = pred_std**2
+        # the configurations that are not stopped, failed or pending
+        active = self._selectable.copy()
+        # low-rank corrections of the posterior covariance from believed observations
+        factors: list[np.ndarray] = []
+
+        def believe(indices: list[int]):
+            nonlocal pred_var
+            if self._encoding is None:
+                return  # the predictor does not expose its posterior covariance
+            with self.span("ask.believe"):
+                covar = self.perf_predictor.covariance(self._encoding, indices)  # type: ignore
+                for j, index in enumerate(indices):
+                    c = covar[:, j]
+                    for v in factors:
+                        c = c - v * v[index]
+                    v = c / np.sqrt(max(pred_var[index], 1e-12))
+                    pred_var = np.maximum(pred_var - v**2, 0.0)
+                    factors.append(v)
+
+        if self.pending:
+            believe(sorted(self.pending))
+
+        selected: list[int] = []
+        for i in range(k):
+            if i > 0:
+                believe(selected[-1:])
+            with self.span("ask.acquisition"):
+                best = self._optimize_acq_fn(pred_mean, np.sqrt(pred_var), cost, mask=active)
+            if not best:
+                break
+            index = best[0]
+            logger.debug(f"predicted score: {pred_mean[index]:.4f}")
+            selected.append(index)
+            active[index] = False
+        return selected
+
+    def predict_curve(self, indices: list[int], steps: int) -> tuple[np.ndarray, np.ndarray]:
+        """Predict the performance of configurations at their next `steps` fidelities.
+
+        The surrogate predicts the score at the fidelity following the observed curve.
+        Further fidelities are predicted by rolling it out: the predicted mean is taken
+        as observed to predict the next fidelity. The standard deviation is the one of
+        the last step, i.e. it does not include the uncertainty of the previous steps.
+
+        Args:
+            indices (list[int]): The indices of the configurations.
+            steps (int): The number of fidelities to predict.
+
+        Returns:
+            The mean and standard deviation, of shape `(len(indices), steps)`. Column `j`
+            belongs to fidelity `self.fidelities[indices] + j + 1` (fidelities beyond
+            `max_fidelity` are meaningless).
+        """
+        if self._perf_x is None:
+            self._preprocess_candidates()
+        assert self._perf_x is not None
+        x = self._perf_x[indices]
+        curve = self.curves[indices].copy()
+        start = self.fidelities[indices]
+        rows = np.arange(len(indices))
+        mean = np.zeros((len(indices), steps), dtype=float)
+        std = np.zeros((len(indices), steps), dtype=float)
+        for j in range(steps):
+            m, s = self.perf_predictor.predict(X=x, curve=curve)  # type: ignore
+            mean[:, j], std[:, j] = np.reshape(m, -1), np.reshape(s, -1)
+            cols = start + j
+            valid = cols < self.max_fidelity
+            curve[rows[valid], cols[valid]] = mean[valid, j]
+        return mean, std
+
+    def _choose_fidelities(self, indices: list[int]) -> list[int]:
+        """Choose the fidelity to evaluate each configuration at: the one (up to
+        `max_fidelity_jump` steps ahead) with the highest acquisition value per cost."""
+        start = self.fidelities[indices]
+        steps = np.minimum(self.max_fidelity_jump, self.max_fidelity - start)
+        mean, std = self.predict_curve(indices, int(steps.max()))
+
+        jumps = np.arange(1, mean.shape[1] + 1)
+        targets = np.minimum(start[:, None] + jumps, self.max_fidelity)
+        y_max = np.maximum.accumulate(self._score_max())
+        acq_values = self._calc_acq_val(mean.ravel(), std.ravel(), y_max[targets - 1].ravel())
+        acq_values = acq_values.reshape(mean.shape)
+
+        # cost of the trial to each target: the overhead plus the costs of its steps
+        step_costs = self.predict_step_costs(indices)
+        cols = np.minimum(start[:, None] + jumps - 1, self.max_fidelity - 1)
+        cost = self.fidelity_jump_overhead + np.cumsum(
+            np.take_along_axis(step_costs, cols, axis=1), axis=1
+        )
+        rate = np.where(jumps[None, :] <= steps[:, None], acq_values / cost, -np.inf)
+        # a jump is only taken if its acquisition value per cost beats the one of a
+        # single step (the first column), which also wins ties, e.g. all zero values
+        best = np.argmax(rate, axis=1)
+        return (start + best + 1).tolist()
+
+    def predict_step_costs(self, indices: list[int]) -> np.ndarray:
+        """Predict the cost of each fidelity step of configurations, in the units of the
+        reported costs.
+
+        The cost of a configuration is the prediction of the cost predictor (in the
+        units of its meta-training costs, corrected by the observed costs, see
+        `cost_correction`), or the average of its observed costs per step if the
+        optimizer is not cost aware. It is scaled per fidelity by
+        how the observed costs change with the fidelity (see `_fidelity_cost_profile`).
+
+        Args:
+            indices (list[int]): The indices of the configurations.
+
+        Returns:
+            The costs of the steps to fidelities `1, ..., max_fidelity`, of shape
+            `(len(indices), max_fidelity)`.
+        """
+        if self.cost_aware:
+            if self._cost_prior is None:
+                self._predict()
+            assert self._cost_prior is not None
+            base = self._cost_prior
+            if self.cost_correction:
+                base = base * self._cost_correction()
+            base = base[indices]
+        else:
+            base = np.ones(len(indices), dtype=float)
+            if self.observed_costs is not None:
+                log_costs = np.log(self.observed_costs)
+                observed = ~np.isnan(log_costs)
+                if observed.any():
+                    sums = np.where(observed, log_costs, 0.0)[indices].sum(axis=1)
+                    counts = observed[indices].sum(axis=1)
+                    average = log_costs[observed].mean()
+                    base = np.exp(np.where(counts > 0, sums / np.maximum(counts, 1), average))
+        return base[:, None] * self._fidelity_cost_profile()[None, :]
+
+    def _fidelity_cost_profile(self) -> np.ndarray:
+        """Relative cost of a step per fidelity, e.g. if the first epoch includes the
+        setup of the training.
+
+        The log cost of a step relative to the average log cost of its configuration is
+        averaged per fidelity, over the configurations with costs observed at more than
+        one fidelity. Fidelities without such observations have a relative cost of 1.
+        """
+        profile = np.ones(self.max_fidelity, dtype=float)
+        if self.observed_costs is None:
+            return profile
+        log_costs = np.log(self.observed_costs[np.flatnonzero(self._status & Status.EVALED)])
+        log_costs = log_costs[np.sum(~np.isnan(log_costs), axis=1) > 1]
+        if not log_costs.size:
+            return profile
+        deviation = log_costs - np.nanmean(log_costs, axis=1, keepdims=True)
+        observed = ~np.isnan(deviation).all(axis=0)
+        profile[observed] = np.exp(np.nanmean(deviation[:, observed], axis=0))
+        return profile
 
-    def ask(self) -> dict | None:
+    def _grow_pool(self) -> None:
+        """Add the most promising of `pool_growth_samples` new configurations, generated
+        around the best candidates of the pool, to the pool (see `pool_growth`)."""
+        size = self.pool_growth
+        if self.pool_max_size is not None:
+            size = min(size, self.pool_max_size - self.N)
+        if size <= 0:
+            return
+
+        mean, std, cost = self._predict()
+        best = self._optimize_acq_fn(mean, std, cost, k=self.pool_growth_parents)
+        parents = [self.configs[i] for i in best]
+        configs = self._sample_configs(parents, self.pool_growth_samples)
+        if not configs:
+            return
+
+        # score all new configurations at once, at their first fidelity
+        pipelines = self._make_pipelines(configs)
+        perf_x = self.perf_predictor.preprocess(X=pipelines)  # type: ignore
+        curve = np.full((len(configs), self.max_fidelity), np.nan, dtype=float)
+        encoding = None
+        if hasattr(self.perf_predictor, "encode") and self._encoding is not None:
+            encoding = self.perf_predictor.encode(X=perf_x, curve=curve)
+            mean, std = self.perf_predictor.posterior(encoding)
+        else:
+            mean, std = self.perf_predictor.predict(X=perf_x, curve=curve)  # type: ignore
+        acq_values = self._calc_acq_val(mean, std, self._score_max()[0])
+        cost_x = c = None
+        if self.cost_aware:
+            cost_x = self.cost_predictor.preprocess(X=pipelines)  # type: ignore
+            c = self.cost_predictor.predict(X=cost_x)  # type: ignore
+            c = np.clip(np.reshape(c, -1), 1e-6, None)
+            # only the order matters here, any normalization will do (the new
+            # configurations have no observed costs, their correction is the same)
+            acq_values /= np.power(c / c.max(), self.cost_factor)
+
+        best = np.argsort(acq_values)[-size:]
+        logger.debug(f"Adding {best.size} of {len(configs)} generated configurations")
+        self._extend_pool(
+            [configs[i] for i in best],
+            pipelines.iloc[best].reset_index(drop=True),
+            perf_x[best],
+            None if cost_x is None else cost_x[best],
+            mean[best],
+            std[best],
+            None if encoding is None else encoding[best],
+            cost_prior=None if c is None else c[best],
+        )
+
+    def _sample_configs(self, parents: list[dict], n: int) -> list[dict]:
+        """Generate up to `n` configurations, which are not in the pool yet: half of them
+        are neighbors of the parents (local search), a quarter are two-step random walks
+        from the parents (mutation) and the rest are sampled at random."""
+        rng = self._pool_rng
+        assert rng is not None
+        seen = {_config_key(c) for c in self.configs}
+        out: list[dict] = []
+
+        def add(config: Configuration):
+            config = dict(config)
+            key = _config_key(config)
+            if key not in seen:
+                seen.add(key)
+                out.append(config)
+
+        def neighbors(config: Configuration):
+            return get_one_exchange_neighbourhood(config, seed=int(rng.integers(2**31)))
+
+        _parents = [Configuration(self.cs, values=p) for p in parents]
+        n_local, n_mutate = n // 2, n // 4
+        for parent in _parents:
+            for neighbor in islice(neighbors(parent), max(1, n_local // len(_parents))):
+                add(neighbor)
+        for _ in range(n_mutate):
+            config = _parents[rng.integers(len(_parents))]
+            for _ in range(2):
+                config = next(neighbors(config), config)
+            add(config)
+        n_random = n - n_local - n_mutate
+        if n_random > 0:
+            samples = self.cs.sample_configuration(n_random)
+            for config in samples if n_random > 1 else [samples]:
+                add(config)
+        return out
+
+    def _make_pipelines(self, configs: list[dict]) -> pd.DataFrame:
+        """The pipelines (configurations and metafeatures) of new configurations."""
+        pipelines = pd.DataFrame(configs)
+        if self.metafeat is not None:
+            metafeat = pd.DataFrame([self.metafeat.iloc[0]] * len(configs)).reset_index(drop=True)
+            pipelines = pd.concat([pipelines, metafeat], axis=1)
+        return pipelines
+
+    def _extend_pool(
+        self,
+        configs: list[dict],
+        pipelines: pd.DataFrame,
+        perf_x: np.ndarray,
+        cost_x: np.ndarray | None,
+        mean: np.ndarray,
+        std: np.ndarray,
+        encoding: torch.Tensor | None = None,
+        cost_prior: np.ndarray | None = None,
+    ) -> None:
+        """Append new configurations, with their features and predictions, to the pool."""
+        n = len(configs)
+        self.configs.extend(configs)
+        self.pipelines = pd.concat([self.pipelines, pipelines], ignore_index=True)
+        if self.metafeat is not None:
+            # the metafeatures are the same for all configurations, see `_make_pipelines`
+            metafeat = pd.DataFrame([self.metafeat.iloc[0]] * n)
+            self.metafeat = pd.concat([self.metafeat, metafeat], ignore_index=True)
+        self.N += n
+
+        self.fidelities = np.concatenate([self.fidelities, np.zeros(n, dtype=int)])
+        nan_curves = np.full((n, self.max_fidelity), np.nan, dtype=float)
+        self.curves = np.concatenate([self.curves, nan_curves])
+        if self._refit_new is not None:
+            self._refit_new = np.concatenate([self._refit_new, np.zeros_like(nan_curves, dtype=bool)])
+        if self.observed_costs is not None:
+            self.observed_costs = np.concatenate([self.observed_costs, nan_curves])
+        if self.score_history is not None:
+            self.score_history = np.concatenate(
+                [self.score_history, np.zeros((n, self.score_history.shape[1]))]
+            )
+
+        if self._perf_x is not None:
+            self._perf_x = np.concatenate([self._perf_x, perf_x])
+        if self._cost_x is not None and cost_x is not None:
+            self._cost_x = np.concatenate([self._cost_x, cost_x])
+        else:
+            self._cost_x = None
+        if self._cost_prior is not None and cost_prior is not None:
+            self._cost_prior = np.concatenate([self._cost_prior, cost_prior])
+        else:
+            self._cost_prior = None
+        self.costs = None  # normalized over the whole pool, recomputed on the next predict
+
+        self._pred_mean = np.concatenate([self._pred_mean, mean])
+        self._pred_std = np.concatenate([self._pred_std, std])
+        if encoding is not None and self._encoding is not None:
+            self._encoding = torch.cat([self._encoding, encoding])
+            self._stale = np.concatenate([self._stale, np.zeros(n, dtype=bool)])
+        else:
+            self._stale = np.concatenate([self._stale, np.ones(n, dtype=bool)])
+        self._grow_status(n)
+
+    def ask(self, k: int | None = None) -> dict | list[dict] | None:
         """Ask the optimizer for a configuration to evaluate.
 
+        The returned configurations are marked as pending until their results are
+        reported via `tell`. Pending configurations are not handed out again, which
+        allows multiple trials to be evaluated in parallel.
+
+        Args:
+            k (int, optional): The number of distinct configurations to return. If None,
+                a single configuration is returned. Defaults to None.
+
         Returns:
-            A dictionary with the configuration to evaluate.
+            A dictionary with the configuration to evaluate. None if there is no
+            configuration left to evaluate or all remaining ones are pending.
+            If `k` is given, a list of up to `k` such dictionaries.
         """
         if not self.ready:
             raise RuntimeError("Call setup() before ask()")
+        self._swap_refit()
 
-        if self.finished:
-            return None
+        n = 1 if k is None else k
+        indices: list[int] = []
+        fidelities: list[int] = []
+        if not self.finished and n > 0:
+            with self.span("ask"):
+                if len(self.evaled) < self.init_random_search_steps:
+                    left = np.flatnonzero(self._selectable & (self.fidelities == 0))
+                    indices = left[:n].tolist()
+                else:
+                    if self.pool_growth > 0 and self._pool_rng is not None:
+                        with self.span("ask.grow"):
+                            self._grow_pool()
+                    indices = self._ask(n)
+                    if self.max_fidelity_jump > 1 and indices:
+                        with self.span("ask.jump"):
+                            fidelities = self._choose_fidelities(indices)
+        if not fidelities:
+            fidelities = (self.fidelities[indices] + 1).tolist()
 
-        self.ask_count += 1
-        if len(self.evaled) < self.init_random_search_steps:
-            left = set(range(self.N)) - self.evaled - self.failed - self.stoped
-            index = left.pop()
-            fidelity = 1
-        else:
-            index = self._ask()
-            fidelity = self.fidelities[index] + 1
+        trials = []
+        for index, fidelity in zip(indices, fidelities):
+            self.ask_count += 1
+            self._set_status(index, Status.PENDING)
+            trials.append(
+                {
+                    "config-id": index,
+                    "config": self.configs[index],
+                    "fidelity": fidelity,
+                }
+            )
 
-        return {
-            "config-id": index,
-            "config": self.configs[index],
-            "fidelity": fidelity,
-        }
+        if k is None:
+            return trials[0] if trials else None
+        return trials
 
     def tell(self, result: dict | list):
         """Tell the result of a trial to the optimizer.
@@ -329,70 +892,204 @@ class QuickOptimizer(Optimizer):
         """
         if isinstance(result, dict):
             result = [result]
-        for res in result:
-            self._tell(res)
+        with self.span("tell"):
+            for res in result:
+                self._tell(res)
 
     def _tell(self, result: dict):
         self.tell_count += 1
 
         index = result["config-id"]
         fidelity = result["fidelity"]
-        # cost = result["cost"]
+        cost = result.get("cost")
         score = result["score"]
         status = result["status"]
 
+        self._clear_status(index, Status.PENDING)
         if not status:
-            self.failed.add(index)
+            self._set_status(index, Status.FAILED)
             return
 
         if score >= 1.0 - self.scr_thr or fidelity == self.max_fidelity:
-            self.stoped.add(index)
+            self._set_status(index, Status.STOPPED)
 
         # update trackers
-        self.curves[index, fidelity - 1] = score
+        previous = int(self.fidelities[index])
+        if fidelity > previous + 1:
+            # a fidelity jump, the curve must not have gaps for the surrogate
+            values = self._jump_scores(index, previous, fidelity, score, result.get("scores"))
+            for f, value in zip(range(previous + 1, fidelity + 1), values):
+                self._record_score(index, f, value)
+        else:
+            self._record_score(index, fidelity, score)
+        if cost is not None:
+            self._record_cost(index, previous, fidelity, cost)
+        self._stale[index] = True
         self.fidelities[index] = fidelity
-        # self.costs[index] = cost
         self.history.append(result)
-        self.evaled.add(index)
+        self._set_status(index, Status.EVALED)
         self.eval_count += 1
 
         if self.patience is not None:
             assert self.score_history is not None
             if not np.any(self.score_history[index] < (score - self.tol)):
-                self.stoped.add(index)
+                self._set_status(index, Status.STOPPED)
             self.score_history[index][fidelity % self.patience] = score
 
         self.finished = self._check_is_finished()
 
+    def _record_score(self, index: int, fidelity: int, score: float) -> None:
+        if self._y_max is not None:
+            if score >= self._y_max[fidelity - 1]:
+                self._y_max[fidelity - 1] = score
+            elif self.curves[index, fidelity - 1] == self._y_max[fidelity - 1]:
+                self._y_max = None  # the maximum is overwritten, recompute it
+        self.curves[index, fidelity - 1] = score
+        self._refit_new[index, fidelity - 1] = True  # type: ignore
+
+    def _record_cost(self, index: int, previous: int, fidelity: int, cost: float) -> None:
+        """Record the cost of a trial, without the overhead of the trial
+        (`fidelity_jump_overhead`), split evenly over the fidelity steps it trained."""
+        if self.observed_costs is None:
+            # optimizers saved before the costs were recorded
+            self.observed_costs = np.full(self.curves.shape, np.nan, dtype=float)
+        cost -= self.fidelity_jump_overhead
+        if not np.isfinite(cost) or cost <= 0:
+            return
+        steps = max(fidelity - previous, 1)
+        self.observed_costs[index, fidelity - steps : fidelity] = cost / steps
+        if self.cost_correction:
+            self.costs = None  # corrected again on the next predict
+
+    def _jump_scores(
+        self,
+        index: int,
+        previous: int,
+        fidelity: int,
+        score: float,
+        scores: list[float] | None = None,
+    ) -> np.ndarray:
+        """The scores at the fidelities `previous + 1, ..., fidelity` of a fidelity jump.
+
+        The reported scores (the last ones of the optional `scores` of the result) are
+        used where available, the others are interpolated linearly.
+        """
+        n = fidelity - previous
+        values = np.full(n, np.nan, dtype=float)
+        if scores is not None and len(scores):
+            tail = np.asarray(scores, dtype=float)[-n:]
+            values[n - len(tail) :] = tail
+        values[-1] = score
+        missing = np.isnan(values)
+        if missing.any():
+            fidelities = np.arange(previous + 1, fidelity + 1)
+            known_x, known_y = fidelities[~missing], values[~missing]
+            if previous > 0 and not np.isnan(self.curves[index, previous - 1]):
+                known_x = np.concatenate([[previous], known_x])
+                known_y = np.concatenate([[self.curves[index, previous - 1]], known_y])
+            values[missing] = np.interp(fidelities[missing], known_x, known_y)
+        return values
+
     def _check_is_finished(self):
         """Check if there is no more configurations to evaluate."""
-        left = set(range(self.N)) - self.evaled - self.failed - self.stoped
-        if not left:
-            return True
-        return False
+        return self._n_open == 0
 
     def ante(self):
         """Some operations to perform by the tuner before the optimization loop.
 
         Here: refit the predictors with observed data.
         """
+        self._swap_refit()
         if (
             self.refit
             and not self.eval_count % self.refit_interval
             and self.eval_count >= self.refit_init_steps
+            and self.eval_count != self._last_refit
         ):
-            self.fit_extra()
+            if not self.refit_async:
+                self.fit_extra()
+                self._last_refit = self.eval_count
+            elif self._refit_job is None:
+                self._start_refit()
+                self._last_refit = self.eval_count
+
+    def _refit_data(self) -> tuple[np.ndarray, np.ndarray, np.ndarray | None]:
+        """Snapshot the data for a refit: features, curves and (if incremental) the mask
+        of the observations made since the previous refit."""
+        if self._perf_x is None:
+            self._preprocess_candidates()
+        assert self._perf_x is not None
+        new = None
+        if self.refit_incremental:
+            assert self._refit_new is not None
+            new, self._refit_new = self._refit_new, np.zeros_like(self._refit_new)
+        return self._perf_x, self.curves.copy(), new
 
     def fit_extra(self):
-        """Refit the predictors with observed data."""
-        pipeline, curve = self.pipelines, self.curves
-        self.perf_predictor.fit_extra(pipeline, curve)  # type: ignore
+        """Refit the predictors with observed data.
+
+        In incremental mode (`refit_incremental`), the predictor is only trained on the
+        observations made since the previous refit, warm-starting its optimizer.
+        """
+        pipeline, curve, new = self._refit_data()
+        with self.span("refit"):
+            self.perf_predictor.fit_extra(  # type: ignore
+                pipeline,
+                curve,
+                self.refit_params or {},
+                new=new,
+                warm_start=self.refit_incremental,
+            )
+        self.reset_cache()
+
+    def _start_refit(self):
+        """Refit a copy of the predictor in a background thread (see `refit_async`)."""
+        pipeline, curve, new = self._refit_data()
+        predictor = self.perf_predictor.copy()  # type: ignore
+        fit_params = self.refit_params or {}
+        warm_start = self.refit_incremental
+        future: Future = Future()
+        timer = self.timer
+
+        def run():
+            try:
+                with timer.span("refit"):
+                    predictor.fit_extra(pipeline, curve, fit_params, new=new, warm_start=warm_start)
+            except BaseException as e:
+                future.set_exception(e)
+            else:
+                future.set_result(predictor)
+
+        # not a daemon: interrupting torch at interpreter exit aborts the process
+        threading.Thread(target=run, name="qtt-refit").start()
+        self._refit_job = (future, new)
+
+    def _swap_refit(self):
+        """Swap in the predictor of a finished background refit."""
+        if self._refit_job is None or not self._refit_job[0].done():
+            return
+        future, new = self._refit_job
+        self._refit_job = None
+        try:
+            self.perf_predictor = future.result()
+        except Exception as e:
+            logger.warning(f"Background refit failed: {e!r}")
+            if new is not None and self._refit_new is not None:
+                # the pool may have grown since the snapshot, its rows come first
+                self._refit_new[: len(new)] |= new
+            return
+        self.reset_cache()
 
     def fit(self, X, curve, cost):
         """Fit the predictors with the given training data."""
+        self._refit_job = None
         self.perf_predictor.fit(X, curve)  # type: ignore
         if self.cost_predictor is not None:
             self.cost_predictor.fit(X, cost)
+        if self.ready:
+            self.costs = None
+            self._preprocess_candidates()
+            self.reset_cache()
 
     def reset_path(self, path: str | None = None):
         """
@@ -407,3 +1104,13 @@ class QuickOptimizer(Optimizer):
             self.perf_predictor.reset_path(path)
         if self.cost_predictor is not None:
             self.cost_predictor.reset_path(path)
+
+    def __getstate__(self):
+        # a running background refit can not be persisted, it is dropped
+        state = super().__getstate__()
+        state["_refit_job"] = None
+        return state
+
+
+def _config_key(config: Mapping) -> tuple:
+    return tuple(sorted(config.items()))
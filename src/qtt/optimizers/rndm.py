@@ -4,13 +4,14 @@ import random
 import numpy as np
 from ConfigSpace import ConfigurationSpace
 
-from ..utils import fix_random_seeds, set_logger_verbosity
+from ..utils import set_logger_verbosity
 from .optimizer import Optimizer
+from .status import Status, StatusTracker
 
 logger = logging.getLogger(__name__)
 
 
-class RandomOptimizer(Optimizer):
+class RandomOptimizer(StatusTracker, Optimizer):
     """A basic implementation of a random search optimizer.
 
     Args:
@@ -48,7 +49,9 @@ class RandomOptimizer(Optimizer):
         self.verbosity = verbosity
 
         if seed is not None:
-            fix_random_seeds(seed)
+            # no `fix_random_seeds`, this optimizer does not use torch
+            random.seed(seed)
+            np.random.seed(seed)
         self.seed = seed
 
         self.cs = cs
@@ -68,9 +71,7 @@ class RandomOptimizer(Optimizer):
         self.tell_count = 0
         self.init_count = 0
         self.eval_count = 0
-        self.evaled: set[int] = set()
-        self.stoped: set[int] = set()
-        self.failed: set[int] = set()
+        self._init_status(self.N)
         self.history: list = []
 
         self.fidelities: np.ndarray = np.zeros(self.N, dtype=int)
@@ -80,25 +81,33 @@ class RandomOptimizer(Optimizer):
         if self.patience is not None:
             self._score_history = np.zeros((self.N, self.patience), dtype=float)
 
-    def ask(self) -> dict | None:
-        left = set(range(self.N)) - self.failed - self.stoped
-        if not left:
-            return None
-        index = random.choice(list(left))
-
-        fidelity = self.fidelities[index] + 1
-
-        return {
-            "config_id": index,
-            "config": self.candidates[index],
-            "fidelity": fidelity,
-        }
+    def ask(self, k: int | None = None) -> dict | list[dict] | None:
+        with self.span("ask"):
+            n = 1 if k is None else k
+            indices = self._sample_selectable(n)
+
+        trials = []
+        for index in indices:
+            self.ask_count += 1
+            self._set_status(index, Status.PENDING)
+            trials.append(
+                {
+                    "config-id": index,
+                    "config": self.candidates[index],
+                    "fidelity": self.fidelities[index] + 1,
+                }
+            )
+
+        if k is None:
+            return trials[0] if trials else None
+        return trials
 
     def tell(self, reports: dict | list):
         if isinstance(reports, dict):
             reports = [reports]
-        for report in reports:
-            self._tell(report)
+        with self.span("tell"):
+            for report in reports:
+                self._tell(report)
 
     def _tell(self, report: dict):
         self.tell_count += 1
@@ -109,8 +118,9 @@ class RandomOptimizer(Optimizer):
         score = report["score"]
         status = report["status"]
 
+        self._clear_status(index, Status.PENDING)
         if not status:
-            self.failed.add(index)
+            self._set_status(index, Status.FAILED)
             return
 
         # update trackers
@@ -118,13 +128,13 @@ class RandomOptimizer(Optimizer):
         self.fidelities[index] = fidelity
         self.costs[index] = cost
         self.history.append(report)
-        self.evaled.add(index)
+        self._set_status(index, Status.EVALED)
         self.eval_count += 1
 
         if score >= 1.0 - self.scr_thr or fidelity == self.max_fidelity:
-            self.stoped.add(index)
+            self._set_status(index, Status.STOPPED)
 
         if self.patience is not None:
             if not np.any(self._score_history[index] < (score - self.tol)):
-                self.stoped.add(index)
+                self._set_status(index, Status.STOPPED)
             self._score_history[index][fidelity % self.patience] = score
@@ -0,0 +1,183 @@
+import random
+from collections.abc import MutableSet
+from enum import IntFlag
+from typing import Iterable, Iterator
+
+import numpy as np
+
+
+class Status(IntFlag):
+    """Status flags of a candidate configuration of an optimizer."""
+
+    EVALED = 1  # evaluated successfully (at some fidelity)
+    STOPPED = 2  # not to be continued, e.g. early stopped or at the maximum fidelity
+    FAILED = 4
+    PENDING = 8  # handed out by `ask`, waiting for `tell`
+
+
+_FLAGS = tuple(Status)
+# candidates with none of these flags are still open (see `StatusTracker._n_open`)
+_DONE = Status.EVALED | Status.STOPPED | Status.FAILED
+# candidates with any of these flags can not be selected
+_BLOCKED = Status.STOPPED | Status.FAILED | Status.PENDING
+_LEGACY_ATTRS = {
+    "evaled": Status.EVALED,
+    "stoped": Status.STOPPED,
+    "failed": Status.FAILED,
+    "pending": Status.PENDING,
+}
+
+
+class StatusView(MutableSet):
+    """
+    Set-like view of the candidates with a status flag, e.g. `optimizer.evaled`.
+
+    Adding or discarding an index changes the status array of the optimizer. Set
+    operations (`|`, `-`, ...) return plain sets.
+    """
+
+    def __init__(self, tracker: "StatusTracker", flag: Status):
+        self._tracker = tracker
+        self._flag = flag
+
+    def __contains__(self, index) -> bool:
+        status = self._tracker._status
+        try:
+            return 0 <= index < len(status) and bool(status[index] & self._flag)
+        except TypeError:
+            return False
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(np.flatnonzero(self._tracker._status & self._flag).tolist())
+
+    def __len__(self) -> int:
+        return int(self._tracker._status_counts[_FLAGS.index(self._flag)])
+
+    def add(self, index: int) -> None:
+        self._tracker._set_status(index, self._flag)
+
+    def discard(self, index: int) -> None:
+        if index in self:
+            self._tracker._clear_status(index, self._flag)
+
+    @classmethod
+    def _from_iterable(cls, it: Iterable) -> set:
+        return set(it)
+
+    def __repr__(self) -> str:
+        return f"{self._flag.name.lower()}({set(self)})"
+
+
+class StatusTracker:
+    """
+    Tracks the status of the candidates of an optimizer in a numpy array with one set of
+    `Status` flags per candidate, plus counters.
+
+    Whether all candidates are done (`_n_open`) and the mask of the selectable
+    candidates (`_selectable`) are maintained on every status change, so neither
+    requires a pass over the candidates. The attributes `evaled`, `stoped`, `failed`
+    and `pending` are set-like views of the array.
+    """
+
+    _status: np.ndarray
+    _status_counts: np.ndarray
+    _selectable: np.ndarray
+    _n_open: int = 0
+    _n_selectable: int = 0
+
+    def _init_status(self, n: int) -> None:
+        """Reset the status of `n` candidates."""
+        self._status = np.zeros(n, dtype=np.uint8)
+        self._status_counts = np.zeros(len(_FLAGS), dtype=np.int64)
+        self._selectable = np.ones(n, dtype=bool)
+        self._n_open = n
+        self._n_selectable = n
+
+    def _grow_status(self, n: int) -> None:
+        """Append `n` new candidates."""
+        self._status = np.concatenate([self._status, np.zeros(n, dtype=np.uint8)])
+        self._selectable = np.concatenate([self._selectable, np.ones(n, dtype=bool)])
+        self._n_open += n
+        self._n_selectable += n
+
+    def _set_status(self, index: int, flag: Status) -> None:
+        self._update_status(index, int(self._status[index]) | flag)
+
+    def _clear_status(self, index: int, flag: Status) -> None:
+        self._update_status(index, int(self._status[index]) & ~flag)
+
+    def _update_status(self, index: int, new: int) -> None:
+        old = int(self._status[index])
+        if old == new:
+            return
+        self._status[index] = new
+        for i, flag in enumerate(_FLAGS):
+            if (old ^ new) & flag:
+                self._status_counts[i] += 1 if new & flag else -1
+        self._n_open += bool(old & _DONE) - bool(new & _DONE)
+        selectable = not new & _BLOCKED
+        self._n_selectable += selectable - bool(self._selectable[index])
+        self._selectable[index] = selectable
+
+    def _set_flag_indices(self, flag: Status, indices: Iterable[int]) -> None:
+        """Set `flag` for exactly the given candidates."""
+        for index in np.flatnonzero(self._status & flag).tolist():
+            self._clear_status(index, flag)
+        for index in indices:
+            self._set_status(index, flag)
+
+    def _sample_selectable(self, k: int) -> list[int]:
+        """Sample up to `k` distinct selectable candidates uniformly at random."""
+        n = len(self._status)
+        k = min(k, self._n_selectable)
+        if 2 * self._n_selectable >= n:
+            # mostly selectable: rejection sampling, without a pass over the candidates
+            out: dict[int, None] = {}
+            while len(out) < k:
+                index = random.randrange(n)
+                if self._selectable[index]:
+                    out[index] = None
+            return list(out)
+        return random.sample(np.flatnonzero(self._selectable).tolist(), k)
+
+    @property
+    def evaled(self) -> StatusView:
+        return StatusView(self, Status.EVALED)
+
+    @evaled.setter
+    def evaled(self, value: Iterable[int]) -> None:
+        self._set_flag_indices(Status.EVALED, value)
+
+    @property
+    def stoped(self) -> StatusView:
+        return StatusView(self, Status.STOPPED)
+
+    @stoped.setter
+    def stoped(self, value: Iterable[int]) -> None:
+        self._set_flag_indices(Status.STOPPED, value)
+
+    @property
+    def failed(self) -> StatusView:
+        return StatusView(self, Status.FAILED)
+
+    @failed.setter
+    def failed(self, value: Iterable[int]) -> None:
+        self._set_flag_indices(Status.FAILED, value)
+
+    @property
+    def pending(self) -> StatusView:
+        return StatusView(self, Status.PENDING)
+
+    @pending.setter
+    def pending(self, value: Iterable[int]) -> None:
+        self._set_flag_indices(Status.PENDING, value)
+
+    def __setstate__(self, state: dict) -> None:
+        # optimizers saved before the status array tracked the candidates in sets
+        legacy = {_LEGACY_ATTRS[key]: state.pop(key) for key in list(state) if key in _LEGACY_ATTRS}
+        self.__dict__.update(state)
+        if "_status" not in state:
+            self._init_status(state.get("N", 0))
+            for flag, indices in legacy.items():
+                for index in indices:
+                    self._set_status(index, flag)
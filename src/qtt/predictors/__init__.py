@@ -1,5 +1,22 @@
-from .cost import CostPredictor
-from .perf import PerfPredictor
-from .predictor import Predictor
+from typing import TYPE_CHECKING
 
-__all__ = ["PerfPredictor", "CostPredictor", "Predictor"]
+from .._lazy import lazy_attrs
+
+if TYPE_CHECKING:
+    from .cost import CostPredictor
+    from .perf import PerfPredictor
+    from .predictor import Predictor
+    from .remote import PredictorServer, RemotePredictor
+
+__getattr__, __dir__ = lazy_attrs(
+    __name__,
+    {
+        "CostPredictor": ".cost",
+        "PerfPredictor": ".perf",
+        "Predictor": ".predictor",
+        "PredictorServer": ".remote",
+        "RemotePredictor": ".remote",
+    },
+)
+
+__all__ = ["PerfPredictor", "CostPredictor", "Predictor", "PredictorServer", "RemotePredictor"]
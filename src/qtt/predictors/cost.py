@@ -1,6 +1,7 @@
 import logging
 import os
 import random
+from typing import Literal
 
 import numpy as np
 import pandas as pd
@@ -8,16 +9,19 @@ import torch
 import torch.nn as nn
 from numpy.typing import ArrayLike
 from sklearn import preprocessing  # type: ignore
-from torch.utils.data import DataLoader, random_split
+from torch.utils.data import random_split
 
 from ..utils.log_utils import set_logger_verbosity
 from .data import (
     SimpleTorchTabularDataset,
+    TabularPreprocessor,
     create_preprocessor,
     get_feature_mapping,
     get_types_of_features,
+    make_batch_loader,
+    preprocessor_state,
 )
-from .models import MLP
+from .models import MLP, grouped_mlp
 from .predictor import Predictor
 from .utils import MetricLogger, get_torch_device
 
@@ -38,6 +42,10 @@ class CostPredictor(Predictor):
     """A predictor that predicts the cost of training a configuration on a new dataset."""
 
     temp_file_name = "temp_model.pt"
+    # Number of rows predicted at once and (optional) reduced precision of the MLP
+    # during inference, e.g. torch.bfloat16 on CPUs that support it.
+    chunk_size: int = 1024
+    inference_dtype: torch.dtype | None = None
 
     def __init__(
         self,
@@ -96,6 +104,15 @@ class CostPredictor(Predictor):
             )
 
     def _validate_predict_data(self, pipeline):
+        if isinstance(pipeline, (np.ndarray, torch.Tensor)):
+            n_features = sum(len(v) for v in self._feature_mapping.values())
+            if pipeline.ndim != 2 or pipeline.shape[1] != n_features:
+                raise ValueError(
+                    "preprocessed pipeline must be a 2D array with the number of encoded features"
+                    f" (expected: {n_features}, got: {tuple(pipeline.shape)})"
+                )
+            return
+
         if not isinstance(pipeline, pd.DataFrame):
             raise ValueError("pipeline and curve must be pandas.DataFrame instances")
 
@@ -160,6 +177,25 @@ class CostPredictor(Predictor):
         X = np.nan_to_num(X)
         return X
 
+    def _preprocess(self, **kwargs) -> np.ndarray:
+        """Preprocess the configurations `X` into the encoded feature matrix of the model.
+
+        The output can be passed as `X` to `predict` instead of the DataFrame, which
+        skips the preprocessing on repeated calls with the same configurations.
+
+        Args:
+            X (pd.DataFrame): the configurations to preprocess.
+        """
+        if not self.is_fit:
+            raise AssertionError("Model is not fitted yet")
+
+        X: pd.DataFrame = kwargs.pop("X", None)
+        if not isinstance(X, pd.DataFrame):
+            raise ValueError("X must be a pandas.DataFrame instance")
+        self._validate_predict_data(X)
+        x = self._preprocess_predict_data(X)
+        return x.astype(np.float32)
+
     def _fit_model(
         self,
         dataset,
@@ -209,11 +245,11 @@ class CostPredictor(Predictor):
             val_set = None
 
         bs = min(batch_size, int(2 ** (3 + np.floor(np.log10(len(train_set))))))
-        train_loader = DataLoader(train_set, batch_size=bs, shuffle=True, drop_last=True)
+        train_loader = make_batch_loader(train_set, batch_size=bs, shuffle=True, drop_last=True)
         val_loader = None
         if val_set is not None:
             bs = min(batch_size, int(2 ** (3 + np.floor(np.log10(len(val_set))))))
-            val_loader = DataLoader(val_set, batch_size=bs)
+            val_loader = make_batch_loader(val_set, batch_size=bs)
 
         cache_dir = os.path.expanduser("~/.cache")
         cache_dir = os.path.join(cache_dir, "qtt", self.name)
@@ -302,43 +338,165 @@ class CostPredictor(Predictor):
 
         return self
 
+    def fit_encoded(self, x: np.ndarray, y: np.ndarray, encoding: dict):
+        """
+        Fit the predictor on already encoded pipelines, e.g. the memory-mapped feature
+        matrix of a meta-dataset (see `save_meta_dataset`). The matrix is used as is,
+        float32 arrays are not copied.
+
+        Args:
+            x (np.ndarray): The encoded pipelines (see `fit_feature_encoding`).
+            y (np.ndarray): The costs, one row per pipeline.
+            encoding (dict): The encoding of `x`, as returned by `fit_feature_encoding`.
+
+        Returns:
+            CostPredictor: The fitted predictor.
+        """
+        if self.is_fit:
+            raise AssertionError("Predictor is already fit! Create a new one.")
+        y = np.array(y)
+        if y.ndim != 2 or y.shape[1] != 1:
+            raise ValueError("y must have only one column")
+        n_features = sum(len(v) for v in encoding["feature_mapping"].values())
+        if x.ndim != 2 or x.shape != (len(y), n_features):
+            raise ValueError(
+                "x must be a 2D array with one row per cost and the number of encoded "
+                f"features (expected: {(len(y), n_features)}, got: {x.shape})"
+            )
+
+        self._original_features = encoding["original_features"]
+        self._input_features = encoding["input_features"]
+        self.features_to_drop = encoding["features_to_drop"]
+        self.types_of_features = encoding["types_of_features"]
+        self._feature_mapping = encoding["feature_mapping"]
+        self.preprocessor = TabularPreprocessor.from_dict(encoding["preprocessor"])
+        self.label_scaler = preprocessing.StandardScaler()
+        train_dataset = SimpleTorchTabularDataset(x, self.label_scaler.fit_transform(y))
+
+        self.model = self._get_model()
+
+        self._fit_model(train_dataset, **self.fit_params)
+
+        return self
+
     def _predict(self, **kwargs) -> np.ndarray:
-        """Predict the costs of training a configuration on a new dataset.
+        """Predict the costs of training a configuration on a new dataset, in the units
+        of the costs the predictor was fitted on.
 
         Args:
-            X (pd.DataFrame): the configuration to predict.
+            X (pd.DataFrame | np.ndarray): the configuration to predict, raw or
+                preprocessed (see `preprocess`).
+            chunk_size (int, optional): number of rows predicted at once, defaults to
+                `chunk_size`.
         """
         if not self.is_fit or self.model is None:
             raise AssertionError("Model is not fitted yet")
 
         X: pd.DataFrame = kwargs.pop("X", None)
+        chunk_size: int | None = kwargs.pop("chunk_size", None)
         if X is None:
             raise ValueError("X (pipeline configuration) must be provided")
 
         self._validate_predict_data(X)
-        x = self._preprocess_predict_data(X)
+        x = X
+        if isinstance(X, pd.DataFrame):
+            x = self._preprocess_predict_data(X)
 
         self.model.eval()
         self.model.to(self.device)
-        x_t = torch.tensor(x, dtype=torch.float32).to(self.device)
-
-        with torch.no_grad():
-            pred = self.model.predict(x_t)
-        out = pred.cpu().squeeze().numpy()
-        return out
+        x_t = torch.as_tensor(x, dtype=torch.float32, device=self.device)
+
+        out = None
+        bs = chunk_size or self.chunk_size
+        autocast = torch.autocast(
+            self.device.type,
+            dtype=self.inference_dtype,
+            enabled=self.inference_dtype is not None,
+        )
+        with torch.no_grad(), autocast:
+            for i in range(0, x_t.shape[0], bs):
+                pred = self.model.predict(x_t[i : i + bs]).float()
+                if out is None:
+                    out = np.empty((x_t.shape[0], *pred.shape[1:]), dtype=np.float32)
+                out[i : i + bs] = pred.cpu().numpy()
+        if out is None:
+            raise ValueError("X must contain at least one configuration")
+        # the model is trained on standardized costs, return them in the fitted units
+        out = self.label_scaler.inverse_transform(out.reshape(len(out), -1))
+        return out.squeeze()
+
+    def _get_checkpoint(self) -> tuple[dict, dict]:
+        config: dict = {
+            "fit_params": self.fit_params,
+            "seed": self.seed,
+            "verbosity": self.verbose,
+            "chunk_size": self.chunk_size,
+            "inference_dtype": str(self.inference_dtype) if self.inference_dtype else None,
+            "fit": self.is_fit,
+        }
+        if not self.is_fit:
+            return config, {}
+        config.update(
+            original_features=self._original_features,
+            input_features=self._input_features,
+            features_to_drop=self.features_to_drop,
+            types_of_features=self.types_of_features,
+            feature_mapping=self._feature_mapping,
+            preprocessor=preprocessor_state(self.preprocessor),
+            label_mean=self.label_scaler.mean_,
+            label_scale=self.label_scaler.scale_,
+        )
+        tensors = {f"model.{k}": v for k, v in self.model.state_dict().items()}
+        return config, tensors
+
+    def _set_checkpoint(self, config: dict, tensors: dict) -> None:
+        self.fit_params = config["fit_params"]
+        self.seed = config["seed"]
+        self.verbose = config["verbosity"]
+        self.chunk_size = config["chunk_size"]
+        if config["inference_dtype"] is not None:
+            self.inference_dtype = getattr(torch, config["inference_dtype"].split(".")[-1])
+        set_logger_verbosity(self.verbose, logger)
+        if not config["fit"]:
+            return
+
+        self._original_features = config["original_features"]
+        self._input_features = config["input_features"]
+        self.features_to_drop = config["features_to_drop"]
+        self.types_of_features = config["types_of_features"]
+        self._feature_mapping = config["feature_mapping"]
+        self.preprocessor = TabularPreprocessor.from_dict(config["preprocessor"])
+        self.label_scaler = preprocessing.StandardScaler()
+        self.label_scaler.mean_ = np.asarray(config["label_mean"])
+        self.label_scaler.scale_ = np.asarray(config["label_scale"])
+        self.label_scaler.var_ = self.label_scaler.scale_**2
+        self.label_scaler.n_features_in_ = len(self.label_scaler.mean_)
+
+        model = self._get_model()
+        state = {k[len("model.") :]: v for k, v in tensors.items() if k.startswith("model.")}
+        model.load_state_dict(state, assign=True)
+        self.device = get_torch_device()
+        self.model = model.to(self.device).eval()
 
-    def save(self, path: str | None = None, verbose=True) -> str:
+    def save(
+        self,
+        path: str | None = None,
+        verbose=True,
+        format: Literal["checkpoint", "pickle"] = "checkpoint",
+    ) -> str:
+        if format == "checkpoint":
+            return super().save(path, verbose, format)
         # Save on CPU to ensure the model can be loaded on a box without GPU
         if self.model is not None:
             self.model = self.model.to(torch.device("cpu"))
-        path = super().save(path, verbose)
+        path = super().save(path, verbose, format)
         # Put the model back to the device after the save
         if self.model is not None:
             self.model.to(self.device)
         return path
 
     @classmethod
-    def load(cls, path: str, reset_paths=True, verbose=True):
+    def load(cls, path: str, reset_paths=True, verbose=True, exclude=()):
         """
         Loads the model from disk to memory.
         The loaded model will be on the same device it was trained on (cuda/mps);
@@ -357,13 +515,17 @@ class CostPredictor(Predictor):
             If False, the actual valid path and self.path may differ, leading to strange behaviour and potential exceptions if the model needs to load any other files at a later time.
         verbose : bool, default True
             Whether to log the location of the loaded file.
+        exclude : tuple of str, default ()
+            Prefixes of the checkpoint tensors not to load.
 
         Returns
         -------
         model : cls
             Loaded model object.
         """
-        model: CostPredictor = super().load(path=path, reset_paths=reset_paths, verbose=verbose)
+        model: CostPredictor = super().load(
+            path=path, reset_paths=reset_paths, verbose=verbose, exclude=exclude
+        )
         return model
 
 
@@ -390,14 +552,7 @@ class SimpleMLPRegressor(torch.nn.Module):
         self.head = MLP(enc_dims, 1, enc_nlayers, enc_hidden_dim, act_fn=nn.GELU)
 
     def forward(self, X) -> torch.Tensor:
-        x = []
-        start = 0
-        for i, dim in enumerate(self.in_dim):
-            end = start + dim
-            output = self.config_encoder[i](X[:, start:end])
-            x.append(output)
-            start = end
-        t = torch.cat(x, dim=1)
+        t = grouped_mlp(self.config_encoder, self.in_dim, X)
         t = self.head(t)
         return t
 
@@ -1,6 +1,11 @@
 from collections import OrderedDict
+from typing import Callable, Iterable, Iterator
 
+import json
 import logging
+import os
+import warnings
+
 import numpy as np
 import pandas as pd
 import torch
@@ -8,7 +13,7 @@ from sklearn.compose import ColumnTransformer  # type: ignore
 from sklearn.impute import SimpleImputer  # type: ignore
 from sklearn.pipeline import Pipeline  # type: ignore
 from sklearn.preprocessing import OneHotEncoder, StandardScaler  # type: ignore
-from torch.utils.data import Dataset
+from torch.utils.data import BatchSampler, DataLoader, Dataset, RandomSampler, SequentialSampler
 
 logger = logging.getLogger(__name__)
 
@@ -114,10 +119,145 @@ def get_feature_mapping(processor):
     return OrderedDict([(key, feature_mapping[key]) for key in feature_mapping])
 
 
+def _category_to_json(value):
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, float) and np.isnan(value):
+        return None
+    return value
+
+
+class TabularPreprocessor:
+    """
+    Fitted preprocessing of `create_preprocessor` as plain arrays, which can be stored
+    as JSON and applied without sklearn: the continuous features are imputed with zeros
+    and standardized, the categorical features are one-hot encoded (unknown categories
+    are all zeros) and the bool features are standardized. Remaining columns are passed
+    through. The output columns are in the same order as the ones of the
+    `ColumnTransformer`.
+
+    Args:
+        state: the state, as returned by `to_dict`.
+    """
+
+    def __init__(self, state: dict):
+        self.state = state
+
+    @classmethod
+    def from_column_transformer(cls, processor: ColumnTransformer) -> "TabularPreprocessor":
+        state: dict = {}
+        for name, tf, features in processor.transformers_:
+            if name == "remainder":
+                if tf == "drop" or not len(features):
+                    continue
+                if tf != "passthrough":
+                    raise ValueError(f"Unsupported remainder: {tf}")
+                features = list(processor.feature_names_in_[features])
+                state[name] = {"features": features}
+                continue
+            steps = dict(tf.steps)
+            if name in ("continuous", "bool"):
+                scaler = steps["scaler"]
+                state[name] = {
+                    "features": list(features),
+                    "mean": scaler.mean_.tolist(),
+                    "scale": scaler.scale_.tolist(),
+                }
+            elif name == "categorical":
+                state[name] = {
+                    "features": list(features),
+                    "categories": [
+                        [_category_to_json(c) for c in categories]
+                        for categories in steps["onehot"].categories_
+                    ],
+                }
+            else:
+                raise ValueError(f"Unknown transformer {name}")
+        return cls(state)
+
+    def to_dict(self) -> dict:
+        return self.state
+
+    @classmethod
+    def from_dict(cls, state: dict) -> "TabularPreprocessor":
+        return cls(state)
+
+    def transform(self, df: pd.DataFrame) -> np.ndarray:
+        out = []
+        for name, spec in self.state.items():
+            values = df[spec["features"]]
+            if name == "categorical":
+                for i, categories in enumerate(spec["categories"]):
+                    column = values.iloc[:, i]
+                    for category in categories:
+                        if category is None:
+                            out.append(column.isna().to_numpy(dtype=float))
+                        else:
+                            out.append((column == category).to_numpy(dtype=float))
+                continue
+            x = values.to_numpy(dtype=float, na_value=np.nan)
+            if name == "continuous":
+                x = np.nan_to_num(x, nan=0.0)
+            if name != "remainder":
+                x = (x - np.asarray(spec["mean"])) / np.asarray(spec["scale"])
+            out.extend(x.T)
+        if not out:
+            return np.empty((len(df), 0))
+        return np.stack(out, axis=1)
+
+
+def preprocessor_state(processor: "ColumnTransformer | TabularPreprocessor") -> dict:
+    """JSON-serializable state of a fitted preprocessor (see `TabularPreprocessor`)."""
+    if not isinstance(processor, TabularPreprocessor):
+        processor = TabularPreprocessor.from_column_transformer(processor)
+    return processor.to_dict()
+
+
+def fit_feature_encoding(df: pd.DataFrame) -> tuple[np.ndarray, dict]:
+    """
+    Fit the preprocessing of the predictors on the pipelines `df` and encode them.
+
+    The encoding is the one the predictors fit on their training data. Pass both outputs
+    to `fit_encoded` of a predictor to train it without preprocessing the pipelines
+    again, e.g. on the encoded matrix of a meta-dataset (see `save_meta_dataset`).
+
+    Args:
+        df (pd.DataFrame): The pipelines.
+
+    Returns:
+        tuple[np.ndarray, dict]: The encoded features as float32 array and the
+            JSON-serializable encoding: the feature types and the preprocessor state.
+    """
+    original_features = list(df.columns)
+    df, types_of_features, features_to_drop = get_types_of_features(df.copy())
+    preprocessor = create_preprocessor(
+        types_of_features["continuous"],
+        types_of_features["categorical"],
+        types_of_features["bool"],
+    )
+    x = np.asarray(preprocessor.fit_transform(df), dtype=np.float32)
+    feature_mapping = get_feature_mapping(preprocessor)
+    if x.shape[1] != sum(len(v) for v in feature_mapping.values()):
+        raise ValueError(
+            "Error during one-hot encoding data processing for neural network. "
+            "Number of columns in df array does not match feature_mapping."
+        )
+    encoding = {
+        "original_features": original_features,
+        "input_features": list(df.columns),
+        "features_to_drop": features_to_drop,
+        "types_of_features": types_of_features,
+        "feature_mapping": dict(feature_mapping),
+        "preprocessor": preprocessor_state(preprocessor),
+    }
+    return x, encoding
+
+
 class SimpleTorchTabularDataset(Dataset):
     def __init__(self, *args):
         super().__init__()
-        self.data = [torch.tensor(arg, dtype=torch.float32) for arg in args]
+        # float32 arrays (e.g. memory-mapped) are shared, not copied
+        self.data = [_as_float_tensor(arg) for arg in args]
 
     def __len__(self):
         return self.data[0].shape[0]
@@ -126,37 +266,432 @@ class SimpleTorchTabularDataset(Dataset):
         return [arg[idx] for arg in self.data]
 
 
+def _as_float_tensor(array) -> torch.Tensor:
+    """The array as float32 tensor, sharing the memory of float32 numpy arrays. Read-only
+    arrays (e.g. memory-mapped) are shared as well, the datasets never write to them."""
+    if isinstance(array, np.ndarray) and array.dtype == np.float32 and not array.flags.writeable:
+        with warnings.catch_warnings():
+            warnings.filterwarnings("ignore", message="The given NumPy array is not writable")
+            return torch.as_tensor(array)
+    return torch.as_tensor(array, dtype=torch.float32)
+
+
 class CurveRegressionDataset(Dataset):
-    """ """
+    """
+    Regression dataset built from pipelines `x` and their learning curves `y`. Each
+    observed (non-NaN) point of a curve is a sample: the pipeline, the curve up to that
+    point (zero-padded) and the observed value as target.
+
+    The pipelines and curves are stored once as contiguous tensors, together with the
+    (row, fidelity) index of each sample, so the memory scales with the size of the
+    curves and not with the number of prefixes. The padded curves are built on access,
+    and indexing with a list or tensor of indices returns a whole batch at once. Use
+    `make_batch_loader` to iterate over the dataset in batches and `to` to move the
+    storage to the device the batches are needed on.
+
+    An optional boolean `mask` of the shape of `y` restricts the samples to the masked
+    points; the curve prefixes still contain all observed points.
+    """
 
-    def __init__(self, x: np.ndarray, y: np.ndarray):
+    def __init__(self, x: np.ndarray, y: np.ndarray, mask: np.ndarray | None = None):
         super().__init__()
 
-        true_indices = np.where(~np.isnan(y.flatten()))[0]
-        self.mapping = list(true_indices)
-        self.x = x
-        self.y = y
+        observed = ~np.isnan(y)
+        if mask is not None:
+            observed &= mask
+        rows, fidelities = np.nonzero(observed)
+        self.rows = torch.as_tensor(rows, dtype=torch.int32)
+        self.fidelities = torch.as_tensor(fidelities, dtype=torch.int32)
+        self.x = _as_float_tensor(x)
+        self.y = torch.as_tensor(np.nan_to_num(np.asarray(y, dtype=np.float32)))
         self.y_dim = y.shape[1]
 
+    @classmethod
+    def from_tensors(
+        cls,
+        x: torch.Tensor,
+        y: torch.Tensor,
+        rows: torch.Tensor,
+        fidelities: torch.Tensor,
+    ) -> "CurveRegressionDataset":
+        """Create the dataset from its stored tensors (see the attributes of the same name)."""
+        dataset = cls.__new__(cls)
+        dataset.x, dataset.y = x, y
+        dataset.rows, dataset.fidelities = rows, fidelities
+        dataset.y_dim = y.shape[1]
+        return dataset
+
     def __len__(self):
-        return len(self.mapping)
+        return len(self.rows)
 
     def __getitem__(self, idx):
-        idx = self.mapping[idx]
-        true_index = idx // self.y_dim
-        fidelity = idx % self.y_dim
-        curve = np.concatenate(
-            (self.y[true_index, :fidelity], np.zeros(self.y.shape[1] - fidelity))
-        )
-        target = self.y[true_index, fidelity]
-        x = torch.tensor(self.x[true_index], dtype=torch.float32)
-        curve = torch.tensor(curve, dtype=torch.float32)
-        target = torch.tensor(target, dtype=torch.float32)
+        rows = self.rows[idx]
+        fidelities = self.fidelities[idx]
+        steps = torch.arange(self.y_dim, device=self.y.device)
+        mask = steps < fidelities.unsqueeze(-1)
+        x = self.x[rows]
+        curve = self.y[rows] * mask
+        target = self.y[rows, fidelities]
         return x, curve, target
 
+    def to(self, device: torch.device | str) -> "CurveRegressionDataset":
+        """
+        Move the stored pipelines, curves and sample index to `device`. Batches are
+        then built directly on the device.
+
+        Args:
+            device (torch.device | str): The device to move the data to.
+
+        Returns:
+            CurveRegressionDataset: The dataset itself.
+        """
+        self.rows = self.rows.to(device)
+        self.fidelities = self.fidelities.to(device)
+        self.x = self.x.to(device)
+        self.y = self.y.to(device)
+        return self
+
+
+def make_batch_loader(
+    dataset: Dataset,
+    batch_size: int,
+    shuffle: bool = False,
+    drop_last: bool = False,
+) -> DataLoader:
+    """
+    Create a DataLoader that fetches whole batches from the dataset with a single
+    index operation, instead of collating the samples one at a time. The dataset
+    (or `Subset` of it) must support indexing with a list of indices.
+
+    Args:
+        dataset (Dataset): The dataset to load.
+        batch_size (int): The batch size.
+        shuffle (bool, optional): Whether to shuffle the data. Defaults to False.
+        drop_last (bool, optional): Whether to drop the last incomplete batch. Defaults to False.
+
+    Returns:
+        DataLoader: The DataLoader.
+    """
+    sampler = RandomSampler(dataset) if shuffle else SequentialSampler(dataset)  # type: ignore
+    batch_sampler = BatchSampler(sampler, batch_size, drop_last)
+    return DataLoader(dataset, sampler=batch_sampler, batch_size=None)
+
+
+CurveChunks = Iterable[tuple[pd.DataFrame, np.ndarray]]
+
+
+def read_curve_shards(path: str, shuffle: bool = False) -> Iterator[tuple[pd.DataFrame, np.ndarray]]:
+    """
+    Read a meta-dataset that is stored as shards in the directory `path`. A shard
+    consists of the pipelines `<name>.parquet` (or `<name>.csv`) and the learning curves
+    `<name>.npy` with one row per pipeline. The shards are read one at a time.
+
+    Args:
+        path (str): The directory with the shards.
+        shuffle (bool, optional): Whether to read the shards in random order. Defaults to False.
+
+    Yields:
+        tuple[pd.DataFrame, np.ndarray]: The pipelines and curves of each shard.
+    """
+    names = sorted(f[: -len(".npy")] for f in os.listdir(path) if f.endswith(".npy"))
+    if not names:
+        raise ValueError(f"No shards found in {path}")
+    if shuffle:
+        names = [names[i] for i in np.random.permutation(len(names))]
+
+    for name in names:
+        base = os.path.join(path, name)
+        if os.path.exists(base + ".parquet"):
+            pipeline = pd.read_parquet(base + ".parquet")
+        elif os.path.exists(base + ".csv"):
+            pipeline = pd.read_csv(base + ".csv", index_col=0)
+        else:
+            raise ValueError(f"No pipelines found for shard {name} in {path}")
+        curve = np.load(base + ".npy")
+        if len(pipeline) != len(curve):
+            raise ValueError(f"Shard {name}: pipelines and curves differ in length")
+        yield pipeline, curve
+
+
+def sample_curve_chunks(
+    chunks: CurveChunks,
+    size: int,
+    seed: int | None = None,
+) -> tuple[pd.DataFrame, np.ndarray]:
+    """
+    Draw a uniform random sample of pipelines and their curves from a stream of chunks
+    (reservoir sampling). At most `size` rows plus one chunk are held in memory.
+
+    Args:
+        chunks (Iterable): The (pipeline, curve) chunks.
+        size (int): The number of rows to sample.
+        seed (int, optional): The random seed. Defaults to None.
+
+    Returns:
+        tuple[pd.DataFrame, np.ndarray]: The sampled pipelines and curves.
+    """
+    rng = np.random.default_rng(seed)
+    keys = np.empty(0)
+    pipeline: pd.DataFrame | None = None
+    curve = np.empty(0)
+    for df, c in chunks:
+        if pipeline is None:
+            keys, pipeline, curve = rng.random(len(df)), df.reset_index(drop=True), c
+        else:
+            if c.shape[1] != curve.shape[1]:
+                raise ValueError("All chunks must have curves of the same length")
+            keys = np.concatenate((keys, rng.random(len(df))))
+            pipeline = pd.concat((pipeline, df), ignore_index=True)
+            curve = np.concatenate((curve, c))
+        if len(keys) > size:
+            keep = np.sort(np.argpartition(keys, size)[:size])
+            keys, pipeline, curve = keys[keep], pipeline.iloc[keep], curve[keep]
+            pipeline = pipeline.reset_index(drop=True)
+    if pipeline is None:
+        raise ValueError("No data in chunks")
+    return pipeline, curve
+
+
+class CurveChunkLoader:
+    """
+    Load the samples of a stream of (pipeline, curve) chunks in batches. Each chunk is
+    transformed into the encoded feature matrix, wrapped in a `CurveRegressionDataset`
+    and loaded in batches, so that only one chunk is held in memory at a time. Batches
+    are shuffled within a chunk only.
+
+    A fraction of the pipelines of each chunk can be held out for validation. The split
+    only depends on the seed and the position of the chunk in the stream, so it is the
+    same in every epoch if the chunks are.
+
+    Args:
+        chunks (Callable): Returns a new iterator over the chunks on each call.
+        transform (Callable): Transforms the pipelines of a chunk into the feature matrix.
+        batch_size (int): The batch size.
+        shuffle (bool, optional): Whether to shuffle the samples of a chunk. Defaults to False.
+        holdout (float, optional): Fraction of pipelines held out for validation. Defaults to 0.
+        split (str, optional): Load the "train" or the "val" part. Defaults to "train".
+        seed (int, optional): The seed of the holdout split. Defaults to 0.
+        device (torch.device | str, optional): The device to build the batches on.
+    """
+
+    def __init__(
+        self,
+        chunks: Callable[[], CurveChunks],
+        transform: Callable[[pd.DataFrame], np.ndarray],
+        batch_size: int,
+        shuffle: bool = False,
+        holdout: float = 0.0,
+        split: str = "train",
+        seed: int = 0,
+        device: torch.device | str = "cpu",
+    ):
+        if split not in ("train", "val"):
+            raise ValueError(f"Unknown split: {split}")
+        self.chunks = chunks
+        self.transform = transform
+        self.batch_size = batch_size
+        self.shuffle = shuffle
+        self.holdout = holdout
+        self.split = split
+        self.seed = seed
+        self.device = device
+
+    def __iter__(self):
+        for i, (pipeline, curve) in enumerate(self.chunks()):
+            x = self.transform(pipeline)
+            if self.holdout > 0:
+                rng = np.random.default_rng([self.seed, i])
+                val = rng.random(len(x)) < self.holdout
+                keep = val if self.split == "val" else ~val
+                x, curve = x[keep], curve[keep]
+            dataset = CurveRegressionDataset(x, curve).to(self.device)
+            if len(dataset) == 0:
+                continue
+            yield from make_batch_loader(
+                dataset,
+                batch_size=min(self.batch_size, len(dataset)),
+                shuffle=self.shuffle,
+            )
+
+
+META_DATASET_VERSION = 2
+
+
+def save_meta_dataset(
+    path: str,
+    config: pd.DataFrame,
+    curve: np.ndarray,
+    cost: np.ndarray | None = None,
+    meta: pd.DataFrame | None = None,
+    encode: bool = True,
+) -> str:
+    """
+    Save a meta-dataset in a binary format that can be memory-mapped by
+    `load_meta_dataset`. Each column of the configurations and meta-features is stored
+    as its own `.npy` file, object columns as integer codes into their categories. The
+    curves and costs are stored as float32 and the column schema as `schema.json`.
+
+    With `encode`, the pipelines are also stored encoded as one float32 matrix, together
+    with their encoding (see `fit_feature_encoding`). The predictors train on it with
+    `fit_encoded`, so training processes share its pages instead of each encoding the
+    pipelines into their own copy.
+
+    Args:
+        path (str): The directory to save the meta-dataset to.
+        config (pd.DataFrame): The pipeline configurations.
+        curve (np.ndarray): The learning curves, one row per configuration.
+        cost (np.ndarray, optional): The costs, one row per configuration.
+        meta (pd.DataFrame, optional): The meta-features, one row per configuration.
+        encode (bool, optional): Whether to store the encoded pipelines. Defaults to True.
+
+    Returns:
+        str: The path of the meta-dataset.
+    """
+    n = len(config)
+    if curve.ndim != 2 or len(curve) != n:
+        raise ValueError("curve must be a 2D array with one row per configuration")
+    if cost is not None and len(cost) != n:
+        raise ValueError("cost must have one row per configuration")
+    if meta is not None and len(meta) != n:
+        raise ValueError("meta must have one row per configuration")
+
+    os.makedirs(os.path.join(path, "columns"), exist_ok=True)
+    groups = [("config", config)] + ([("meta", meta)] if meta is not None else [])
+    columns = []
+    for group, df in groups:
+        for name in df.columns:
+            values = df[name].to_numpy()
+            column = {"name": name, "group": group, "dtype": str(values.dtype)}
+            if values.dtype == object:
+                codes, categories = pd.factorize(df[name], use_na_sentinel=True)
+                values = codes.astype(np.int32)
+                column["categories"] = [c.item() if hasattr(c, "item") else c for c in categories]
+            np.save(os.path.join(path, "columns", f"{len(columns)}.npy"), values)
+            columns.append(column)
+
+    np.save(os.path.join(path, "curve.npy"), np.asarray(curve, dtype=np.float32))
+    if cost is not None:
+        np.save(os.path.join(path, "cost.npy"), np.asarray(cost, dtype=np.float32))
+    encoding = None
+    if encode:
+        pipeline = config if meta is None else pd.concat([config, meta], axis=1)
+        x, encoding = fit_feature_encoding(pipeline)
+        np.save(os.path.join(path, "x.npy"), x)
+
+    schema = {
+        "version": META_DATASET_VERSION,
+        "size": n,
+        "columns": columns,
+        "cost": cost is not None,
+        "encoding": encoding,
+    }
+    with open(os.path.join(path, "schema.json"), "w") as f:
+        json.dump(schema, f, indent=2)
+    return path
+
+
+class MetaDataset:
+    """
+    A meta-dataset saved with `save_meta_dataset`. The arrays are memory-mapped, so
+    opening is independent of the size of the data and processes reading the same
+    meta-dataset share the pages. The configurations and meta-features are decoded
+    into DataFrames on access, either at once or in chunks (see `chunks`).
+
+    If the meta-dataset was saved with `encode`, `x` is the encoded feature matrix of
+    the pipelines and `encoding` its encoding, e.g. for
+    `PerfPredictor().fit_encoded(data.x, data.curve, data.encoding)`.
+
+    Args:
+        path (str): The directory of the meta-dataset.
+        mmap (bool, optional): Whether to memory-map the arrays. Defaults to True.
+    """
+
+    def __init__(self, path: str, mmap: bool = True):
+        with open(os.path.join(path, "schema.json")) as f:
+            schema = json.load(f)
+        if schema.get("version") not in range(1, META_DATASET_VERSION + 1):
+            raise ValueError(f"Unsupported meta-dataset version: {schema.get('version')}")
+
+        mmap_mode = "r" if mmap else None
+        self.path = path
+        self.schema = schema
+        self.columns = [
+            np.load(os.path.join(path, "columns", f"{i}.npy"), mmap_mode=mmap_mode)
+            for i in range(len(schema["columns"]))
+        ]
+        self.curve: np.ndarray = np.load(os.path.join(path, "curve.npy"), mmap_mode=mmap_mode)
+        self.cost: np.ndarray | None = None
+        if schema["cost"]:
+            self.cost = np.load(os.path.join(path, "cost.npy"), mmap_mode=mmap_mode)
+        self.x: np.ndarray | None = None
+        self.encoding: dict | None = schema.get("encoding")
+        if self.encoding is not None:
+            self.x = np.load(os.path.join(path, "x.npy"), mmap_mode=mmap_mode)
+
+    def __len__(self):
+        return self.schema["size"]
+
+    def _frame(self, group: str | None, rows: slice) -> pd.DataFrame:
+        data = {}
+        for column, values in zip(self.schema["columns"], self.columns):
+            if group is not None and column["group"] != group:
+                continue
+            values = values[rows]
+            if "categories" in column:
+                categories = np.array(column["categories"] + [np.nan], dtype=object)
+                values = categories[values]
+            data[column["name"]] = values
+        return pd.DataFrame(data)
+
+    @property
+    def config(self) -> pd.DataFrame:
+        """The pipeline configurations."""
+        return self._frame("config", slice(None))
+
+    @property
+    def meta(self) -> pd.DataFrame:
+        """The meta-features (empty if there are none)."""
+        return self._frame("meta", slice(None))
+
+    @property
+    def pipeline(self) -> pd.DataFrame:
+        """The configurations together with their meta-features."""
+        return self._frame(None, slice(None))
+
+    def chunks(self, chunk_size: int = 100_000) -> Iterator[tuple[pd.DataFrame, np.ndarray]]:
+        """
+        Iterate over the pipelines and curves in chunks, e.g. for `PerfPredictor.fit_stream`.
+
+        Args:
+            chunk_size (int, optional): The number of rows per chunk. Defaults to 100_000.
+
+        Yields:
+            tuple[pd.DataFrame, np.ndarray]: The pipelines and curves of each chunk.
+        """
+        for start in range(0, len(self), chunk_size):
+            rows = slice(start, start + chunk_size)
+            yield self._frame(None, rows), np.asarray(self.curve[rows])
+
+
+def load_meta_dataset(path: str, mmap: bool = True) -> MetaDataset:
+    """
+    Open a meta-dataset saved with `save_meta_dataset`.
+
+    Args:
+        path (str): The directory of the meta-dataset.
+        mmap (bool, optional): Whether to memory-map the arrays. Defaults to True.
+
+    Returns:
+        MetaDataset: The meta-dataset.
+    """
+    return MetaDataset(path, mmap)
+
 
 def make_regression_from_series_dataset(pipeline: pd.DataFrame, curve: np.ndarray):
     """
+    Deprecated: the padded output takes O(N * m^2) memory for N curves of length m. Use
+    `CurveRegressionDataset`, which builds the same samples on access from the curves.
+
     This method takes a pandas DataFrame `pipeline` containing features and a numpy
     array `curve` representing learning curves. For each point in the curve
     array the function creates a training sample.
@@ -175,22 +710,22 @@ def make_regression_from_series_dataset(pipeline: pd.DataFrame, curve: np.ndarra
     sequences in `curve`.
     3. `y`: A 1D numpy array representing the flattened and filtered values
     from `curve`.
+
+    Only the observed (non-NaN) points are expanded.
     """
-    _, m = curve.shape
-    y = curve.flatten()
-    curve_out = np.vstack(
-        [np.concatenate((row[:i], np.zeros(m - i))) for row in curve for i in range(m)]
+    warnings.warn(
+        "make_regression_from_series_dataset is deprecated and will be removed, use "
+        "CurveRegressionDataset(x, curve) instead, which does not materialize the padded "
+        "curves.",
+        DeprecationWarning,
+        stacklevel=2,
     )
-    mask = np.isnan(y)
-    y = y[~mask]
-    curve_out = curve_out[~mask]
-    X = pipeline.values.repeat(m, axis=0)[~mask]
-
-    X = pd.DataFrame(X, columns=pipeline.columns)
-    for col in pipeline.columns:
-        X[col] = X[col].astype(pipeline[col].dtype)
-    curve_out = np.array(curve_out)
-    y = np.array(y)
+    m = curve.shape[1]
+    rows, fidelities = np.nonzero(~np.isnan(curve))
+    mask = np.arange(m) < fidelities[:, None]
+    curve_out = np.where(mask, curve[rows], 0.0)
+    y = curve[rows, fidelities]
+    X = pipeline.iloc[rows].reset_index(drop=True)
 
     if X.shape[0] != curve_out.shape[0] or curve_out.shape[0] != y.shape[0]:
         raise ValueError("Data size mismatch")
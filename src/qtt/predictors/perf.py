@@ -3,23 +3,31 @@ import logging
 import os
 import random
 import shutil
-from typing import Tuple
+import time
+from typing import Callable, Iterable, Literal, Tuple
 
 import gpytorch  # type: ignore
 import numpy as np
 import pandas as pd
 import torch
 from numpy.typing import ArrayLike
-from torch.utils.data import DataLoader, random_split
+from torch.utils.data import random_split
 
 from qtt.predictors.models import FeatureEncoder
 from qtt.utils.log_utils import set_logger_verbosity
 
 from .data import (
+    CurveChunkLoader,
     CurveRegressionDataset,
+    TabularPreprocessor,
     create_preprocessor,
     get_feature_mapping,
     get_types_of_features,
+    load_meta_dataset,
+    make_batch_loader,
+    preprocessor_state,
+    read_curve_shards,
+    sample_curve_chunks,
 )
 from .predictor import Predictor
 from .utils import MetricLogger, get_torch_device
@@ -43,13 +51,34 @@ DEFAULT_REFIT_PARAMS = {
     "early_stop": True,
     "patience": 5,
     "tol": 1e-4,
+    "max_steps": None,
+    "max_time": None,
 }
 
 
 class PerfPredictor(Predictor):
     temp_file_name: str = "temp_model.pt"
     train_data_size: int = 4096
+    # Use LOVE to compute (and cache) the predictive variances of the GP. The caches
+    # are kept alive until the training data or the hyperparameters of the GP change.
+    fast_pred_var: bool = True
+    # Number of rows encoded / predicted at once. Small chunks keep the kernel matrix
+    # between the chunk and the training data of the GP in cache.
+    chunk_size: int = 1024
+    # Inference options of the feature encoder: run it in reduced precision with
+    # autocast (e.g. torch.bfloat16 on CPUs that support it) and/or compile it with
+    # torch.compile. The GP always runs in float32.
+    inference_dtype: torch.dtype | None = None
+    compile_encoder: bool = False
+    _compiled_encoder = None
+    # GP head of the surrogate: "exact" conditions on `train_data_size` sampled points,
+    # "svgp" is a sparse variational GP with `num_inducing` inducing points trained on
+    # all of the data (linear in the number of samples)
+    gp_head: str = "exact"
+    num_inducing: int = 512
     _fit_data = None
+    # AdamW state kept across warm-started refits (see `fit_extra`)
+    _refit_optimizer = None
 
     def __init__(
         self,
@@ -58,8 +87,14 @@ class PerfPredictor(Predictor):
         path: str | None = None,
         seed: int | None = None,
         verbosity: int = 2,
+        gp_head: Literal["exact", "svgp"] = "exact",
+        num_inducing: int = 512,
     ) -> None:
         super().__init__(path=path)
+        if gp_head not in ("exact", "svgp"):
+            raise ValueError(f"Unknown GP head: {gp_head}")
+        self.gp_head = gp_head
+        self.num_inducing = num_inducing
         self.fit_params = self._validate_fit_params(fit_params, DEFAULT_FIT_PARAMS)
         self.refit_params = self._validate_fit_params(refit_params, DEFAULT_REFIT_PARAMS)
         self.seed = seed
@@ -148,13 +183,14 @@ class PerfPredictor(Predictor):
                 "Error during one-hot encoding data processing for neural network. "
                 "Number of columns in df array does not match feature_mapping."
             )
-        return np.array(out)
+        return np.asarray(out)
 
     def _validate_predict_data(self, pipeline, curve):
         """Validate data for prediction. Applies the same steps as _validate_fit_data
 
         Args:
-            pipeline (pandas.DataFrame): Pipeline data.
+            pipeline (pandas.DataFrame | numpy.ndarray | torch.Tensor): Pipeline data, either
+                raw or already preprocessed (see `preprocess`).
             curve (numpy.ndarray): Curve data.
 
         Raises:
@@ -165,21 +201,32 @@ class PerfPredictor(Predictor):
         Returns:
             tuple: Validated pipeline and curve data.
         """
-        if not isinstance(pipeline, pd.DataFrame) or not isinstance(curve, np.ndarray):
-            raise ValueError("pipeline and curve must be pandas.DataFrame instances")
-
-        if pipeline.shape[0] != curve.shape[0]:
-            raise ValueError("pipeline and curve must have the same number of samples")
+        if not isinstance(curve, np.ndarray):
+            raise ValueError("curve must be a numpy.ndarray instance")
 
-        if len(set(pipeline.columns)) < len(pipeline.columns):
+        if isinstance(pipeline, (np.ndarray, torch.Tensor)):
+            n_features = sum(len(v) for v in self.feature_mapping.values())
+            if pipeline.ndim != 2 or pipeline.shape[1] != n_features:
+                raise ValueError(
+                    "preprocessed pipeline must be a 2D array with the number of encoded features"
+                    f" (expected: {n_features}, got: {tuple(pipeline.shape)})"
+                )
+        elif not isinstance(pipeline, pd.DataFrame):
+            raise ValueError(
+                "pipeline must be a pandas.DataFrame instance or a preprocessed numpy.ndarray"
+            )
+        elif len(set(pipeline.columns)) < len(pipeline.columns):
             raise ValueError(
                 "Column names are not unique, please change duplicated column names (in pandas: train_data.rename(columns={'current_name':'new_name'})"
             )
 
+        if pipeline.shape[0] != curve.shape[0]:
+            raise ValueError("pipeline and curve must have the same number of samples")
+
         if curve.shape[1] != self._curve_dim:
             raise ValueError(
                 "curve must have the same number of features as the curve used for fitting"
-                " (expected: {self._curve_length}, got: {curve.shape[1]})"
+                f" (expected: {self._curve_dim}, got: {curve.shape[1]})"
             )
 
     def _preprocess_predict_data(self, df: pd.DataFrame, fill_missing=True):
@@ -209,6 +256,35 @@ class PerfPredictor(Predictor):
         X = np.nan_to_num(X)
         return X
 
+    def _preprocess(self, **kwargs) -> np.ndarray:
+        """
+        Preprocess the configurations `X` into the encoded feature matrix of the model.
+
+        The output can be passed as `X` to `predict`, `encode` and `fit_extra` instead
+        of the DataFrame, which skips the preprocessing on repeated calls with the same
+        configurations.
+
+        Args:
+            X: the configurations to preprocess.
+            fill_missing: whether to fill missing values in the dataset.
+
+        Returns:
+            The encoded features as float32 array.
+        """
+        if not self.is_fit:
+            raise AssertionError("Model is not fitted yet")
+
+        X: pd.DataFrame = kwargs.pop("X", None)
+        fill_missing: bool = kwargs.pop("fill_missing", False)
+        if not isinstance(X, pd.DataFrame):
+            raise ValueError("X must be a pandas.DataFrame instance")
+        if len(set(X.columns)) < len(X.columns):
+            raise ValueError(
+                "Column names are not unique, please change duplicated column names (in pandas: train_data.rename(columns={'current_name':'new_name'})"
+            )
+        x = self._preprocess_predict_data(X, fill_missing)
+        return x.astype(np.float32)
+
     def _get_model(self):
         """
         Return a new instance of the model.
@@ -222,6 +298,8 @@ class PerfPredictor(Predictor):
                 len(self.types_of_features["categorical"]) + len(self.types_of_features["bool"]),
             ],
             "in_curve_dim": self._curve_dim,
+            "gp_head": self.gp_head,
+            "num_inducing": self.num_inducing,
         }
         return SurrogateModel(**params)
 
@@ -260,12 +338,9 @@ class PerfPredictor(Predictor):
         self.device = get_torch_device()
         dev = self.device
         self.model.to(dev)
-
-        optimizer = torch.optim.AdamW(self.model.parameters(), learning_rate_init)
-
-        patience_counter = 0
-        best_iter = 0
-        best_val_metric = np.inf
+        # stage the compact curve storage on the device, the padded batches are
+        # then built there instead of being copied over one by one
+        dataset.to(dev)
 
         if patience is not None:
             if early_stop:
@@ -289,33 +364,84 @@ class PerfPredictor(Predictor):
             train_set = dataset
             val_set = None
 
-        train_loader = DataLoader(
+        if self.gp_head == "svgp":
+            a, b, _ = dataset[torch.randperm(len(dataset), device=dev)[: self.num_inducing]]
+            self.model.init_inducing_points(a, b, num_data=len(train_set))
+
+        train_loader = make_batch_loader(
             train_set,
             batch_size=min(batch_size, len(train_set)),
             shuffle=True,
             drop_last=True,
-            num_workers=4,
         )
         val_loader = None
         if val_set is not None:
-            val_loader = DataLoader(
+            val_loader = make_batch_loader(
                 val_set,
                 batch_size=min(batch_size, len(val_set)),
-                num_workers=4,
             )
 
+        self._train_loop(
+            train_loader,
+            val_loader,
+            learning_rate_init=learning_rate_init,
+            max_iter=max_iter,
+            early_stop=early_stop,
+            patience=patience,
+            tol=tol,
+        )
+
+        # after training the gp, set its training data
+        # TODO: check if this can be improved
+        self.model.eval()
+        size = min(self.train_data_size, len(dataset))
+        a, b, c = dataset[torch.randperm(len(dataset), device=dev)[:size]]
+        self.model.set_train_data(a, b, c)
+        dataset.to("cpu")
+
+    def _train_loop(
+        self,
+        train_loader,
+        val_loader,
+        learning_rate_init: float,
+        max_iter: int,
+        early_stop: bool,
+        patience: int | None,
+        tol: float,
+    ):
+        """Run the training epochs of `_train_model` on the given loaders.
+
+        Args:
+            train_loader: Batches to train on.
+            val_loader: Batches to validate on, or None to stop on the training loss.
+            learning_rate_init (float): Initial learning rate.
+            max_iter (int): Maximum number of iterations to train for.
+            early_stop (bool): If True, load the best model after training.
+            patience (int or None): Number of iterations to wait before stopping training
+                if validation loss does not improve.
+            tol (float): Tolerance for determining when to stop training.
+        """
+        dev = self.device
+        optimizer = torch.optim.AdamW(self.model.parameters(), learning_rate_init)
+
+        patience_counter = 0
+        best_iter = 0
+        best_val_metric = np.inf
+
         cache_dir = os.path.join(self.path, ".tmp")
         os.makedirs(cache_dir, exist_ok=True)
         temp_save_file_path = os.path.join(cache_dir, self.temp_file_name)
+        # chunked loaders do not know their length
+        log_freq = 100
+        if hasattr(train_loader, "__len__"):
+            log_freq = max(len(train_loader) // 10, 1)
         for it in range(1, max_iter + 1):
             self.model.train()
 
             train_loss = []
             header = f"TRAIN: ({it}/{max_iter})"
             metric_logger = MetricLogger(delimiter=" ")
-            for batch in metric_logger.log_every(
-                train_loader, max(len(train_loader) // 10, 1), header, logger
-            ):
+            for batch in metric_logger.log_every(train_loader, log_freq, header, logger):
                 # forward
                 batch = (b.to(dev) for b in batch)
                 X, curve, y = batch
@@ -338,7 +464,7 @@ class PerfPredictor(Predictor):
                 self.model.eval()
 
                 val_loss = []
-                with torch.no_grad():
+                with torch.no_grad(), gpytorch.settings.skip_posterior_variances():
                     for batch in val_loader:
                         batch = (b.to(dev) for b in batch)
                         X, curve, y = batch
@@ -377,15 +503,6 @@ class PerfPredictor(Predictor):
         if os.path.exists(cache_dir):
             shutil.rmtree(cache_dir)
 
-        # after training the gp, set its training data
-        # TODO: check if this can be improved
-        self.model.eval()
-        size = min(self.train_data_size, len(dataset))
-        loader = DataLoader(dataset, batch_size=size, shuffle=True)
-        a, b, c = next(iter(loader))
-        a, b, c = a.to(dev), b.to(dev), c.to(dev)
-        self.model.set_train_data(a, b, c)
-
     def _fit(self, X: pd.DataFrame, y: ArrayLike, **kwargs):
         if self.is_fit:
             raise AssertionError("Predictor is already fit! Create a new one.")
@@ -396,6 +513,52 @@ class PerfPredictor(Predictor):
         train_dataset = CurveRegressionDataset(x, y)
 
         self.model = self._get_model()
+        self._refit_optimizer = None
+        self._compiled_encoder = None
+        self._train_model(train_dataset, **self.fit_params)
+
+        self._model_fit = copy.deepcopy(self.model)
+        self._fit_data = train_dataset
+
+        return self
+
+    def fit_encoded(self, x: np.ndarray, curve: np.ndarray, encoding: dict):
+        """
+        Fit the predictor on already encoded pipelines, e.g. the memory-mapped feature
+        matrix of a meta-dataset (see `save_meta_dataset`). The matrix is used as is,
+        float32 arrays are not copied.
+
+        Args:
+            x (np.ndarray): The encoded pipelines (see `fit_feature_encoding`).
+            curve (np.ndarray): The learning curves, one row per pipeline.
+            encoding (dict): The encoding of `x`, as returned by `fit_feature_encoding`.
+
+        Returns:
+            PerfPredictor: The fitted predictor.
+        """
+        if self.is_fit:
+            raise AssertionError("Predictor is already fit! Create a new one.")
+        if not isinstance(curve, np.ndarray):
+            raise ValueError("curve must be a numpy.ndarray instance")
+        n_features = sum(len(v) for v in encoding["feature_mapping"].values())
+        if x.ndim != 2 or x.shape != (len(curve), n_features):
+            raise ValueError(
+                "x must be a 2D array with one row per curve and the number of encoded "
+                f"features (expected: {(len(curve), n_features)}, got: {x.shape})"
+            )
+
+        self._curve_dim = curve.shape[1]
+        self.original_features = encoding["original_features"]
+        self.input_features = encoding["input_features"]
+        self.features_to_drop = encoding["features_to_drop"]
+        self.types_of_features = encoding["types_of_features"]
+        self.feature_mapping = encoding["feature_mapping"]
+        self.preprocessor = TabularPreprocessor.from_dict(encoding["preprocessor"])
+        train_dataset = CurveRegressionDataset(x, curve)
+
+        self.model = self._get_model()
+        self._refit_optimizer = None
+        self._compiled_encoder = None
         self._train_model(train_dataset, **self.fit_params)
 
         self._model_fit = copy.deepcopy(self.model)
@@ -403,23 +566,279 @@ class PerfPredictor(Predictor):
 
         return self
 
+    def fit_stream(
+        self,
+        data: str | Callable[[], Iterable] | Iterable,
+        sample_size: int = 100_000,
+        scan: bool = True,
+    ):
+        """
+        Fit the predictor on a meta-dataset that is too large to be held in memory. The
+        data is read as a stream of (pipeline, curve) chunks, one chunk at a time.
+
+        The preprocessor is fit on a sample of the pipelines, which is also kept as the
+        training data of the GP and for `fit_extra`. Categories that do not appear in the
+        sample are encoded as unknown. The model is then trained on batches from each
+        chunk, holding out `validation_fraction` of the pipelines of each chunk for early
+        stopping. Batches are only shuffled within a chunk, so the chunks should not be
+        ordered by configuration.
+
+        Args:
+            data: A meta-dataset directory (see `save_meta_dataset`), a directory of shards
+                (see `read_curve_shards`), a callable returning a new iterator over the
+                chunks on each call, or a re-iterable collection of chunks (e.g. a list).
+                The data is read once per training iteration.
+            sample_size (int, optional): Number of pipelines to sample. Defaults to 100_000.
+            scan (bool, optional): If True, sample uniformly over a full pass of the data,
+                otherwise take the first `sample_size` pipelines. Defaults to True.
+
+        Returns:
+            PerfPredictor: The fitted predictor.
+        """
+        if self.is_fit:
+            raise AssertionError("Predictor is already fit! Create a new one.")
+
+        if isinstance(data, str):
+            path = data
+            if os.path.exists(os.path.join(path, "schema.json")):
+                meta_dataset = load_meta_dataset(path)
+
+                def source():
+                    return meta_dataset.chunks()
+            else:
+
+                def source():
+                    return read_curve_shards(path, shuffle=True)
+        elif callable(data):
+            source = data
+        elif iter(data) is not data:
+            collection = data
+
+            def source():
+                return iter(collection)
+        else:
+            raise ValueError(
+                "data must be a directory, a callable or a re-iterable collection of chunks, "
+                "a single iterator can not be read more than once"
+            )
+
+        num_data = 0
+
+        def counted(chunks):
+            nonlocal num_data
+            for df, curve in chunks:
+                num_data += int(np.sum(~np.isnan(curve)))
+                yield df, curve
+
+        if scan:
+            X, y = sample_curve_chunks(counted(source()), sample_size, self.seed)
+        else:
+            head, curves = [], []
+            n = 0
+            for df, curve in source():
+                head.append(df)
+                curves.append(curve)
+                n += len(df)
+                if n >= sample_size:
+                    break
+            X = pd.concat(head, ignore_index=True).iloc[:sample_size]
+            y = np.concatenate(curves)[:sample_size]
+
+        self._validate_fit_data(X, y)
+        x = self._preprocess_fit_data(X)
+        sample = CurveRegressionDataset(x, y)
+        if not scan:
+            num_data = len(sample)
+
+        def chunks():
+            for df, curve in source():
+                self._validate_predict_data(df, curve)
+                yield df, curve
+
+        self.model = self._get_model()
+        self._refit_optimizer = None
+        self._compiled_encoder = None
+        self._train_model_stream(chunks, sample, num_data, **self.fit_params)
+
+        self._model_fit = copy.deepcopy(self.model)
+        self._fit_data = sample
+
+        return self
+
+    def _train_model_stream(
+        self,
+        chunks: Callable[[], Iterable],
+        sample: CurveRegressionDataset,
+        num_data: int,
+        learning_rate_init: float,
+        batch_size: int,
+        max_iter: int,
+        early_stop: bool,
+        patience: int | None,
+        validation_fraction: float,
+        tol: float,
+    ):
+        """Train the model on a stream of chunks, see `fit_stream` and `_train_model`.
+
+        Args:
+            chunks (Callable): Returns a new iterator over the (pipeline, curve) chunks.
+            sample (CurveRegressionDataset): Sample the training data of the GP is drawn from.
+            num_data (int): (Estimated) number of samples in the stream.
+            learning_rate_init (float): Initial learning rate.
+            batch_size (int): Batch size to use.
+            max_iter (int): Maximum number of iterations to train for.
+            early_stop (bool): If True, stop training when validation loss stops improving.
+            patience (int or None): Number of iterations to wait before stopping training
+                if validation loss does not improve.
+            validation_fraction (float): Fraction of the pipelines to use for validation.
+            tol (float): Tolerance for determining when to stop training.
+        """
+        if self.seed is not None:
+            random.seed(self.seed)
+            np.random.seed(self.seed)
+            torch.manual_seed(self.seed)
+
+        if self.model is None:
+            raise ValueError("Model must be set before training")
+
+        self.device = get_torch_device()
+        dev = self.device
+        self.model.to(dev)
+
+        holdout = 0.0
+        if patience is not None:
+            if early_stop:
+                if validation_fraction <= 0 or validation_fraction >= 1:
+                    raise AssertionError(
+                        "validation_fraction must be between 0 and 1 when early_stop is True"
+                    )
+                logger.info(
+                    f"Early stopping on validation loss with patience {patience} "
+                    f"using {validation_fraction} of the data for validation"
+                )
+                holdout = validation_fraction
+            else:
+                logger.info(f"Early stopping on training loss with patience {patience}")
+
+        def transform(df: pd.DataFrame) -> np.ndarray:
+            return self._preprocess_predict_data(df, fill_missing=False)
+
+        if self.gp_head == "svgp":
+            a, b, _ = sample[torch.randperm(len(sample))[: self.num_inducing]]
+            self.model.init_inducing_points(a.to(dev), b.to(dev), num_data=num_data)
+
+        seed = self.seed if self.seed is not None else 0
+        train_loader = CurveChunkLoader(
+            chunks,
+            transform,
+            batch_size=batch_size,
+            shuffle=True,
+            holdout=holdout,
+            seed=seed,
+            device=dev,
+        )
+        val_loader = None
+        if holdout > 0:
+            val_loader = CurveChunkLoader(
+                chunks,
+                transform,
+                batch_size=batch_size,
+                holdout=holdout,
+                split="val",
+                seed=seed,
+                device=dev,
+            )
+
+        self._train_loop(
+            train_loader,
+            val_loader,
+            learning_rate_init=learning_rate_init,
+            max_iter=max_iter,
+            early_stop=early_stop,
+            patience=patience,
+            tol=tol,
+        )
+
+        self.model.eval()
+        size = min(self.train_data_size, len(sample))
+        a, b, c = sample[torch.randperm(len(sample))[:size]]
+        self.model.set_train_data(a.to(dev), b.to(dev), c.to(dev))
+
     def fit_extra(
         self,
-        X: pd.DataFrame,
+        X: pd.DataFrame | np.ndarray,
         curve: np.ndarray,
         fit_params: dict = {},
+        new: np.ndarray | None = None,
+        warm_start: bool = False,
     ):
+        """
+        Refit the model on new observations, e.g. those of an ongoing optimization.
+
+        Args:
+            X: the configurations, raw or preprocessed (see `preprocess`).
+            curve: the observed curves. All observed points are used for validation and
+                as training data of the GP.
+            fit_params: overrides the `refit_params` of the predictor. The optional
+                `max_steps` and `max_time` (seconds) bound the cost of the refit.
+            new: boolean mask of the shape of `curve`. If given, the model is only
+                trained on the masked (new) observations.
+            warm_start: whether to continue with the optimizer state of the previous
+                warm-started refit.
+        """
         if not self.is_fit:
             raise AssertionError("Model is not fitted yet")
 
         self._validate_predict_data(X, curve)
+        if new is not None and new.shape != curve.shape:
+            raise ValueError("new must have the same shape as curve")
 
-        x = self._preprocess_predict_data(X)
+        x = X
+        if isinstance(X, pd.DataFrame):
+            x = self._preprocess_predict_data(X)
 
         tune_dataset = CurveRegressionDataset(x, curve)
+        if len(tune_dataset) == 0:
+            logger.info("No observations, skipping refit")
+            return
+        train_dataset = None
+        if new is not None:
+            train_dataset = CurveRegressionDataset(x, curve, mask=new)
+            if len(train_dataset) == 0:
+                logger.info("No new observations, skipping refit")
+                return
+
+        refit_params = {**DEFAULT_REFIT_PARAMS, **self.refit_params}
+        fit_params = self._validate_fit_params(fit_params, refit_params)
+        self._refit_model(
+            tune_dataset,
+            train_dataset=train_dataset,
+            warm_start=warm_start,
+            **fit_params,
+        )
 
-        fit_params = self._validate_fit_params(fit_params, self.refit_params)
-        self._refit_model(tune_dataset, **fit_params)
+    def __getstate__(self):
+        # a compiled encoder can not be pickled, it is compiled again on first use
+        state = self.__dict__.copy()
+        state["_compiled_encoder"] = None
+        return state
+
+    def copy(self) -> "PerfPredictor":
+        """
+        Return a copy of the predictor with its own model (and refit optimizer state),
+        sharing the read-only training data. The copy can be refit while the original
+        keeps serving predictions.
+
+        Returns:
+            PerfPredictor: The copy.
+        """
+        other = copy.copy(self)
+        other.model = copy.deepcopy(self.model)
+        if self._refit_optimizer is not None:
+            optimizer = torch.optim.AdamW(other.model.parameters())  # type: ignore
+            optimizer.load_state_dict(self._refit_optimizer.state_dict())
+            other._refit_optimizer = optimizer
+        return other
 
     def _refit_model(
         self,
@@ -430,9 +849,14 @@ class PerfPredictor(Predictor):
         early_stop,
         patience,
         tol,
+        max_steps=None,
+        max_time=None,
+        train_dataset=None,
+        warm_start=False,
     ):
         learning_rate_init = 0.001
         logger.info("Refitting model...")
+        start_time = time.time()
         if self.seed is not None:
             random.seed(self.seed)
             np.random.seed(self.seed)
@@ -441,7 +865,6 @@ class PerfPredictor(Predictor):
         os.makedirs(cache_dir, exist_ok=True)
         temp_save_file_path = os.path.join(cache_dir, self.temp_file_name)
 
-        num_workers = 4
         self.device = get_torch_device()
         dev = self.device
 
@@ -449,30 +872,53 @@ class PerfPredictor(Predictor):
         self.model.eval()
         torch.save(self.model.state_dict(), temp_save_file_path)
 
+        # The tuning set is small, it is staged on the device and batches are drawn from
+        # it by index. Samples of the (large) fitting set are drawn with replacement and
+        # only the sampled rows are moved to the device.
+        dataset.to(dev)
+        if train_dataset is None:
+            train_dataset = dataset
+        train_dataset.to(dev)
+        if self._fit_data is None:
+            raise AssertionError("The fitting data is not loaded, the model can not be refit")
+        fitting_set = self._fit_data
+
+        def sample_fitting_set(size):
+            index = torch.randint(len(fitting_set), (size,))
+            return [b.to(dev) for b in fitting_set[index]]
+
+        def gp_train_data():
+            index = torch.randperm(len(dataset), device=dev)[: self.train_data_size]
+            batch = dataset[index]
+            if len(dataset) < self.train_data_size:
+                extra = sample_fitting_set(self.train_data_size - len(dataset))
+                batch = [torch.cat([p, q]) for p, q in zip(batch, extra)]
+            return batch
+
+        val_bs = min(batch_size, len(dataset))
+
+        def validate():
+            # only the mean enters the loss, skip the predictive variances
+            val_loss = []
+            cache = self.model.mean_cache()  # solve the train system once per pass
+            for start in range(0, len(dataset), val_bs):
+                X, curve, y = dataset[start : start + val_bs]
+                mean = self.model.predict_mean(X, curve, cache)
+                loss = torch.nn.functional.l1_loss(mean, y)
+                val_loss.append(loss.item())
+            return np.mean(val_loss)
+
         # initial validation loss
-        loader = DataLoader(
-            dataset,
-            batch_size=min(len(dataset), batch_size),
-            num_workers=num_workers,
-        )
-        val_metric = []
-        for batch in loader:
-            batch = (b.to(dev) for b in batch)
-            X, curve, y = batch
-            pred = self.model.predict(X, curve)
-            loss = torch.nn.functional.l1_loss(pred.mean, y)
-            val_metric.append(loss.item())
-        best_val_metric = np.mean(val_metric)
+        best_val_metric = validate()
         logger.info(f"Initial validation loss: {best_val_metric}")
         patience_counter = 0
         best_iter = 0
 
-        assert self._fit_data is not None
-        fitting_set = self._fit_data
         logger.debug(f"Number of samples in the tuning set: {len(dataset)}")
-        if len(dataset) < batch_size:
+        logger.debug(f"Number of samples to train on: {len(train_dataset)}")
+        if len(train_dataset) < batch_size:
             logger.warning(
-                f"Tuning-set size is small ({len(dataset)})."
+                f"Tuning-set size is small ({len(train_dataset)})."
                 "Using all samples for training + validation. "
                 f"Adding samples from training set to reach minimal sample size {batch_size}"
             )
@@ -483,41 +929,35 @@ class PerfPredictor(Predictor):
             else:
                 logger.info(f"Early stopping on training loss with patience {patience}")
 
-        loader_bs = min(int(2 ** np.floor(np.log2(len(dataset) - 1))), batch_size)
-        train_loader = DataLoader(
-            dataset,
-            batch_size=loader_bs,
-            shuffle=True,
-            drop_last=True,
-            num_workers=num_workers,
-        )
-        val_loader = DataLoader(
-            dataset,
-            batch_size=min(batch_size, len(dataset)),
-            num_workers=num_workers,
-        )
-        extra_loader = None
+        n_train = len(train_dataset)
+        loader_bs = min(int(2 ** np.floor(np.log2(max(n_train - 1, 1)))), batch_size)
+        n_batches = n_train // loader_bs
+        extra_bs = 0
         if loader_bs < self.train_data_size:
-            extra_loader = DataLoader(
-                fitting_set,
-                batch_size=batch_size - loader_bs,
-                shuffle=True,
-                num_workers=num_workers,
-            )
+            extra_bs = batch_size - loader_bs
 
-        optimizer = torch.optim.AdamW(self.model.parameters(), learning_rate_init)
+        optimizer = self._refit_optimizer if warm_start else None
+        if optimizer is None:
+            optimizer = torch.optim.AdamW(self.model.parameters(), learning_rate_init)
+        if warm_start:
+            self._refit_optimizer = optimizer
+
+        steps = 0
+        out_of_budget = False
         for it in range(1, max_iter + 1):
             self.model.train()
 
             train_loss = []
             header = f"TRAIN: ({it}/{max_iter})"
             metric_logger = MetricLogger(delimiter=" ")
-            for batch in metric_logger.log_every(train_loader, 1, header, logger):
+            perm = torch.randperm(n_train, device=dev)
+            batches = perm[: n_batches * loader_bs].view(n_batches, loader_bs)
+            for index in metric_logger.log_every(batches, 1, header, logger):
                 # forward
-                if extra_loader is not None:
-                    b1 = next(iter(extra_loader))
-                    batch = [torch.cat([b1, b2]) for b1, b2 in zip(batch, b1)]
-                batch = (b.to(dev) for b in batch)
+                batch = train_dataset[index]
+                if extra_bs > 0:
+                    extra = sample_fitting_set(extra_bs)
+                    batch = [torch.cat([p, q]) for p, q in zip(batch, extra)]
                 X, curve, y = batch
                 loss = self.model.train_step(X, curve, y)
                 train_loss.append(loss.item())
@@ -531,39 +971,18 @@ class PerfPredictor(Predictor):
                 metric_logger.update(loss=loss.item())
                 metric_logger.update(lengthscale=self.model.lengthscale)
                 metric_logger.update(noise=self.model.noise)  # type: ignore
-            logger.info(f"[{it}/{max_iter}]Averaged stats: {str(metric_logger)}")
-            val_metric = np.mean(train_loss)
 
-            if val_loader is not None:
-                self.model.eval()
-
-                l1 = DataLoader(
-                    dataset,
-                    batch_size=len(dataset),
-                    shuffle=True,
+                steps += 1
+                out_of_budget = (max_steps is not None and steps >= max_steps) or (
+                    max_time is not None and time.time() - start_time >= max_time
                 )
-                batch = next(iter(l1))
-                if len(dataset) < self.train_data_size:
-                    l2 = DataLoader(
-                        fitting_set,
-                        batch_size=self.train_data_size - loader_bs,
-                        shuffle=True,
-                    )
-                    b2 = next(iter(l2))
-                    batch = [torch.cat([p, q]) for p, q in zip(batch, b2)]
-                batch = (b.to(dev) for b in batch)
-                a, b, c = batch
-                self.model.set_train_data(a, b, c)
+                if out_of_budget:
+                    break
+            logger.info(f"[{it}/{max_iter}]Averaged stats: {str(metric_logger)}")
 
-                val_loss = []
-                with torch.no_grad():
-                    for batch in val_loader:
-                        batch = (b.to(dev) for b in batch)
-                        X, curve, y = batch
-                        pred = self.model.predict(X, curve)
-                        loss = torch.nn.functional.l1_loss(pred.mean, y)
-                        val_loss.append(loss.item())
-                val_metric = np.mean(val_loss)
+            self.model.eval()
+            self.model.set_train_data(*gp_train_data())
+            val_metric = validate()
 
             if patience is not None:
                 if val_metric + tol < best_val_metric:
@@ -586,9 +1005,13 @@ class PerfPredictor(Predictor):
                     )
                     break
 
+            if out_of_budget:
+                logger.info(f"Refit budget exhausted after {steps} steps")
+                break
+
         if patience:
             logger.info(f"Loading best model from iteration {best_iter}")
-            self.model.load_state_dict(torch.load(temp_save_file_path))
+            self.model.load_state_dict(torch.load(temp_save_file_path, weights_only=True))
 
         # remove cache dir
         if os.path.exists(cache_dir):
@@ -596,42 +1019,52 @@ class PerfPredictor(Predictor):
 
         # after training the model, reset GPs training data
         self.model.eval()
-        if len(dataset) < self.train_data_size:
-            l1 = DataLoader(dataset, batch_size=len(dataset), shuffle=True)
-            l2 = DataLoader(
-                fitting_set,
-                batch_size=self.train_data_size - len(dataset),
-                shuffle=True,
-            )
-            b1 = next(iter(l1))
-            b2 = next(iter(l2))
-            batch = [torch.cat([a, b]) for a, b in zip(b1, b2)]
-            batch = (b.to(dev) for b in batch)
-        else:
-            loader = DataLoader(dataset, batch_size=self.train_data_size, shuffle=True)
-            batch = next(iter(loader))
-            batch = (b.to(dev) for b in batch)
-        a, b, c = batch
-        self.model.set_train_data(a, b, c)
+        self.model.set_train_data(*gp_train_data())
 
     def _predict(self, **kwargs) -> Tuple[np.ndarray, np.ndarray]:
         """
         Predict the performance of a configuration `X` on a new dataset `curve`.
 
         Args:
-            X: the configuration to predict.
+            X: the configuration to predict, raw or preprocessed (see `preprocess`).
             curve: the dataset to predict on.
             fill_missing: whether to fill missing values in the dataset.
+            chunk_size: number of rows predicted at once, defaults to `chunk_size`.
 
         Returns:
             The mean and standard deviation of the predicted performance.
         """
-        if not self.is_fit or self.model is None:
-            raise AssertionError("Model is not fitted yet")
-
         X: pd.DataFrame = kwargs.pop("X", None)
         curve: np.ndarray = kwargs.pop("curve", None)
         fill_missing: bool = kwargs.pop("fill_missing", False)
+        chunk_size: int | None = kwargs.pop("chunk_size", None)
+
+        encoding = self.encode(X, curve, fill_missing, chunk_size)
+        return self.posterior(encoding, chunk_size)
+
+    def encode(
+        self,
+        X: pd.DataFrame | np.ndarray | torch.Tensor,
+        curve: np.ndarray,
+        fill_missing: bool = False,
+        chunk_size: int | None = None,
+    ) -> torch.Tensor:
+        """
+        Encode configurations `X` and their learning curves `curve` with the feature
+        encoder of the model. The encoding is the input of the GP and can be reused for
+        multiple calls of `posterior`.
+
+        Args:
+            X: the configuration to encode, raw or preprocessed (see `preprocess`).
+            curve: the learning curves observed so far.
+            fill_missing: whether to fill missing values in the dataset.
+            chunk_size: number of rows encoded at once, defaults to `chunk_size`.
+
+        Returns:
+            The encoded inputs (float32), located on the device of the model.
+        """
+        if not self.is_fit or self.model is None:
+            raise AssertionError("Model is not fitted yet")
 
         if X is None:
             raise ValueError("X (pipeline configuration) is a required argument for this predictor")
@@ -639,36 +1072,227 @@ class PerfPredictor(Predictor):
             raise ValueError("curve is a required argument for this predictor")
 
         self._validate_predict_data(X, curve)
-        x = self._preprocess_predict_data(X, fill_missing)
+        x = X
+        if isinstance(X, pd.DataFrame):
+            x = self._preprocess_predict_data(X, fill_missing)
         curve = np.nan_to_num(curve)
 
         device = self.device
         self.model.eval()
         self.model.to(device)
-        x = torch.tensor(x, dtype=torch.float32, device=device)
-        c = torch.tensor(curve, dtype=torch.float32, device=device)
-        mean = np.array([])
-        std = np.array([])
-        with torch.no_grad():
-            bs = 4096  # TODO: make this a parameter
+        x = torch.as_tensor(x, dtype=torch.float32, device=device)
+        c = torch.as_tensor(curve, dtype=torch.float32, device=device)
+
+        encoder = self._inference_encoder()
+        encoding = None
+        bs = chunk_size or self.chunk_size
+        autocast = torch.autocast(
+            device.type,
+            dtype=self.inference_dtype,
+            enabled=self.inference_dtype is not None,
+        )
+        with torch.no_grad(), autocast:
             for i in range(0, x.shape[0], bs):
-                pred = self.model.predict(x[i : i + bs], c[i : i + bs])
-                mean = np.append(mean, pred.mean.cpu().numpy())
-                std = np.append(std, pred.stddev.cpu().numpy())
+                out = encoder(x[i : i + bs], c[i : i + bs])
+                if encoding is None:
+                    encoding = torch.empty((x.shape[0], out.shape[1]), device=device)
+                encoding[i : i + bs] = out
+        if encoding is None:
+            raise ValueError("X must contain at least one configuration")
+        return encoding
+
+    def _inference_encoder(self):
+        """Return the encoder used for inference, compiled if `compile_encoder` is set."""
+        if not self.compile_encoder:
+            return self.model.encoder
+        if self._compiled_encoder is None:
+            self._compiled_encoder = torch.compile(self.model.encoder)
+        return self._compiled_encoder
+
+    def posterior(
+        self,
+        encoding: torch.Tensor,
+        chunk_size: int | None = None,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Compute the predictive distribution of the GP for the encoded inputs.
+
+        Args:
+            encoding: the encoded inputs, as returned by `encode`.
+            chunk_size: number of rows predicted at once, defaults to `chunk_size`.
+
+        Returns:
+            The mean and standard deviation of the predicted performance.
+        """
+        if not self.is_fit or self.model is None:
+            raise AssertionError("Model is not fitted yet")
+
+        mean = np.empty(encoding.shape[0])
+        std = np.empty(encoding.shape[0])
+        bs = chunk_size or self.chunk_size
+        fast = self.fast_pred_var and self.model.gp_head == "exact"
+        with gpytorch.settings.fast_pred_var(self.fast_pred_var):
+            for i in range(0, encoding.shape[0], bs):
+                if fast:
+                    m, s = self.model.predict_encoding_fast(encoding[i : i + bs])
+                else:
+                    pred = self.model.predict_encoding(encoding[i : i + bs])
+                    m, s = pred.mean, pred.stddev
+                mean[i : i + bs] = m.cpu().numpy()
+                std[i : i + bs] = s.cpu().numpy()
         return mean, std
 
-    def save(self, path: str | None = None, verbose=True) -> str:
+    def covariance(
+        self,
+        encoding: torch.Tensor,
+        index: ArrayLike,
+        chunk_size: int | None = None,
+    ) -> np.ndarray:
+        """
+        Compute the posterior covariance of the (noise-free) GP between all encoded
+        inputs and the inputs at `index`.
+
+        This is much cheaper than the full posterior covariance and allows to update
+        the predictive variance when conditioning on additional observations, e.g.
+        pending evaluations.
+
+        Args:
+            encoding: the encoded inputs, as returned by `encode`.
+            index: the rows of `encoding` to compute the covariance with.
+            chunk_size: number of rows computed at once, defaults to `chunk_size`.
+
+        Returns:
+            The covariance matrix of shape (len(encoding), len(index)).
+        """
+        if not self.is_fit or self.model is None:
+            raise AssertionError("Model is not fitted yet")
+
+        index = torch.as_tensor(np.asarray(index), dtype=torch.long, device=encoding.device)
+        x2 = encoding[index]
+        out = np.empty((encoding.shape[0], x2.shape[0]))
+        bs = chunk_size or self.chunk_size
+        with gpytorch.settings.fast_pred_var(self.fast_pred_var):
+            solved = self.model.solve_train_covariance(x2)  # the same for all chunks
+            for i in range(0, encoding.shape[0], bs):
+                covar = self.model.posterior_covariance(encoding[i : i + bs], x2, solved)
+                out[i : i + bs] = covar.cpu().numpy()
+        return out
+
+    def clear_cache(self) -> None:
+        """
+        Clear the precomputed prediction caches of the GP (e.g. the LOVE caches of the
+        predictive variance).
+
+        The caches are cleared automatically when the model is (re)fitted. Call this
+        method after modifying the model or its training data by other means.
+        """
+        if self.model is not None:
+            self.model.clear_cache()
+
+    # options of the instance that are stored in checkpoints
+    _checkpoint_options = ("train_data_size", "fast_pred_var", "chunk_size", "compile_encoder")
+
+    def _get_checkpoint(self) -> tuple[dict, dict]:
+        config: dict = {
+            "fit_params": self.fit_params,
+            "refit_params": self.refit_params,
+            "seed": self.seed,
+            "verbosity": self.verbosity,
+            "gp_head": self.gp_head,
+            "num_inducing": self.num_inducing,
+            "options": {key: getattr(self, key) for key in self._checkpoint_options},
+            "inference_dtype": str(self.inference_dtype) if self.inference_dtype else None,
+            "fit": self.is_fit,
+        }
+        tensors: dict[str, torch.Tensor] = {}
+        if not self.is_fit:
+            return config, tensors
+
+        config.update(
+            curve_dim=self._curve_dim,
+            original_features=self.original_features,
+            input_features=self.input_features,
+            features_to_drop=self.features_to_drop,
+            types_of_features=self.types_of_features,
+            feature_mapping=self.feature_mapping,
+            preprocessor=preprocessor_state(self.preprocessor),
+        )
+        for key, value in self.model.state_dict().items():
+            tensors[f"model.{key}"] = value
+        if self.gp_head == "exact" and self.model.gp_model.train_inputs is not None:
+            tensors["gp.train_x"] = self.model.gp_model.train_inputs[0]
+            tensors["gp.train_y"] = self.model.gp_model.train_targets
+        if self.gp_head == "svgp":
+            config["num_data"] = self.model.mll.num_data
+        if isinstance(self._fit_data, CurveRegressionDataset):
+            for key in ("x", "y", "rows", "fidelities"):
+                tensors[f"fit_data.{key}"] = getattr(self._fit_data, key)
+        return config, tensors
+
+    def _set_checkpoint(self, config: dict, tensors: dict) -> None:
+        self.fit_params = config["fit_params"]
+        self.refit_params = config["refit_params"]
+        self.seed = config["seed"]
+        self.verbosity = config["verbosity"]
+        self.gp_head = config["gp_head"]
+        self.num_inducing = config["num_inducing"]
+        for key, value in config["options"].items():
+            setattr(self, key, value)
+        if config["inference_dtype"] is not None:
+            self.inference_dtype = getattr(torch, config["inference_dtype"].split(".")[-1])
+        set_logger_verbosity(self.verbosity, logger)
+        if not config["fit"]:
+            return
+
+        self._curve_dim = config["curve_dim"]
+        self.original_features = config["original_features"]
+        self.input_features = config["input_features"]
+        self.features_to_drop = config["features_to_drop"]
+        self.types_of_features = config["types_of_features"]
+        self.feature_mapping = config["feature_mapping"]
+        self.preprocessor = TabularPreprocessor.from_dict(config["preprocessor"])
+
+        # the (memory-mapped) tensors are assigned to the model without copies
+        model = self._get_model()
+        state = {k[len("model.") :]: v for k, v in tensors.items() if k.startswith("model.")}
+        model.load_state_dict(state, assign=True)
+        if "gp.train_x" in tensors:
+            model.gp_model.set_train_data(tensors["gp.train_x"], tensors["gp.train_y"], False)
+        if self.gp_head == "svgp":
+            model.mll.num_data = config["num_data"]
+        self.device = get_torch_device()
+        self.model = model.to(self.device).eval()
+
+        if "fit_data.x" in tensors:
+            self._fit_data = CurveRegressionDataset.from_tensors(
+                *(tensors[f"fit_data.{key}"] for key in ("x", "y", "rows", "fidelities"))
+            )
+
+    def save(
+        self,
+        path: str | None = None,
+        verbose=True,
+        format: Literal["checkpoint", "pickle"] = "checkpoint",
+    ) -> str:
+        if format == "checkpoint":
+            return super().save(path, verbose, format)
         # Save on CPU to ensure the model can be loaded on a box without GPU
         if self.model is not None:
             self.model = self.model.to(torch.device("cpu"))
-        path = super().save(path, verbose)
+        path = super().save(path, verbose, format)
         # Put the model back to the device after the save
         if self.model is not None:
             self.model.to(self.device)
         return path
 
     @classmethod
-    def load(cls, path: str, reset_paths=True, verbose=True) -> "PerfPredictor":
+    def load(
+        cls,
+        path: str,
+        reset_paths=True,
+        verbose=True,
+        exclude: tuple[str, ...] = (),
+    ) -> "PerfPredictor":
         """
         Loads the model from disk to memory.
 
@@ -686,11 +1310,16 @@ class PerfPredictor(Predictor):
                 inconsistencies between the actual valid path and `self.path`, potentially leading
                 to strange behavior and exceptions if the model needs to load other files later.
             verbose (bool, optional): Whether to log the location of the loaded file. Defaults to True.
+            exclude (tuple[str, ...], optional): Prefixes of the checkpoint tensors not to
+                load. Use `("fit_data",)` to skip the meta-training data if the predictor
+                is not refit.
 
         Returns:
             cls: The loaded model object.
         """
-        model: PerfPredictor = super().load(path=path, reset_paths=reset_paths, verbose=verbose)
+        model: PerfPredictor = super().load(
+            path=path, reset_paths=reset_paths, verbose=verbose, exclude=exclude
+        )
 
         verbosity = model.verbosity
         set_logger_verbosity(verbosity, logger)
@@ -698,6 +1327,8 @@ class PerfPredictor(Predictor):
 
 
 class GPRegressionModel(gpytorch.models.ExactGP):
+    _fast_cache = None
+
     def __init__(
         self,
         train_x: torch.Tensor | None,
@@ -713,8 +1344,75 @@ class GPRegressionModel(gpytorch.models.ExactGP):
         covar = self.covar_module(x)
         return gpytorch.distributions.MultivariateNormal(mean, covar)  # type: ignore
 
+    @torch.no_grad()
+    def fast_predict(self, x: torch.Tensor) -> Tuple[torch.Tensor, torch.Tensor]:
+        """
+        Predictive mean and variance of the latent function with LOVE, computed directly
+        from the prediction caches. Equivalent to calling the model in eval mode under
+        `gpytorch.settings.fast_pred_var`, but the kernel between `x` and the training
+        data is evaluated only once and the kernel scale is folded into the caches.
+        """
+        strategy = self.prediction_strategy
+        if strategy is None:
+            with gpytorch.settings.fast_pred_var():
+                self(x[:1])  # initialize the prediction caches
+            strategy = self.prediction_strategy
+        if self._fast_cache is None or self._fast_cache[0] is not strategy:
+            lengthscale = self.covar_module.base_kernel.lengthscale
+            outputscale = self.covar_module.outputscale
+            train_x = self.train_inputs[0] / lengthscale
+            weights = torch.cat([strategy.mean_cache.unsqueeze(-1), strategy.covar_cache], dim=-1)
+            self._fast_cache = (
+                strategy,
+                lengthscale,
+                outputscale,
+                train_x.T.contiguous(),
+                -0.5 * (train_x * train_x).sum(-1),
+                weights * outputscale,
+            )
+        _, lengthscale, outputscale, train_xt, bias, weights = self._fast_cache
+
+        # scaled RBF kernel: exp(-0.5 * |z - t|^2) = exp(z.t - 0.5 * |z|^2 - 0.5 * |t|^2)
+        z = x / lengthscale
+        covar = torch.addmm(bias, z, train_xt)
+        covar.add_(-0.5 * (z * z).sum(-1, keepdim=True)).clamp_max_(0).exp_()
+        out = covar @ weights
+        mean = self.mean_module.constant + out[:, 0]
+        var = outputscale - (out[:, 1:] ** 2).sum(-1)
+        return mean, var
+
+    def __getstate__(self):
+        # do not persist the prediction caches, they are recomputed on first use
+        state = self.__dict__.copy()
+        state["prediction_strategy"] = None
+        state["_fast_cache"] = None
+        return state
+
+
+class SVGPRegressionModel(gpytorch.models.ApproximateGP):
+    def __init__(self, inducing_points: torch.Tensor):
+        variational_distribution = gpytorch.variational.CholeskyVariationalDistribution(
+            inducing_points.size(0)
+        )
+        variational_strategy = gpytorch.variational.VariationalStrategy(
+            self,
+            inducing_points,
+            variational_distribution,
+            learn_inducing_locations=True,
+        )
+        super().__init__(variational_strategy)
+        self.mean_module = gpytorch.means.ConstantMean()
+        self.covar_module = gpytorch.kernels.ScaleKernel(gpytorch.kernels.RBFKernel())
+
+    def forward(self, x: torch.Tensor):
+        mean = self.mean_module(x)
+        covar = self.covar_module(x)
+        return gpytorch.distributions.MultivariateNormal(mean, covar)  # type: ignore
+
 
 class SurrogateModel(torch.nn.Module):
+    gp_head: str = "exact"
+
     def __init__(
         self,
         in_dim: int | list[int],
@@ -724,6 +1422,8 @@ class SurrogateModel(torch.nn.Module):
         enc_out_dim: int = 32,
         enc_nlayers: int = 3,
         out_curve_dim: int = 16,
+        gp_head: str = "exact",
+        num_inducing: int = 512,
     ):
         super().__init__()
         self.encoder = FeatureEncoder(
@@ -736,15 +1436,27 @@ class SurrogateModel(torch.nn.Module):
             out_curve_dim,
         )
         self.likelihood = gpytorch.likelihoods.GaussianLikelihood()
-        self.gp_model = GPRegressionModel(
-            train_x=None,
-            train_y=None,
-            likelihood=self.likelihood,
-        )
-        self.mll = gpytorch.mlls.ExactMarginalLogLikelihood(
-            self.likelihood,
-            self.gp_model,
-        )
+        self.gp_head = gp_head
+        if gp_head == "exact":
+            self.gp_model = GPRegressionModel(
+                train_x=None,
+                train_y=None,
+                likelihood=self.likelihood,
+            )
+            self.mll = gpytorch.mlls.ExactMarginalLogLikelihood(
+                self.likelihood,
+                self.gp_model,
+            )
+        elif gp_head == "svgp":
+            # the inducing points are placed on the data by `init_inducing_points`
+            self.gp_model = SVGPRegressionModel(torch.randn(num_inducing, out_dim))
+            self.mll = gpytorch.mlls.VariationalELBO(
+                self.likelihood,
+                self.gp_model,
+                num_data=1,
+            )
+        else:
+            raise ValueError(f"Unknown GP head: {gp_head}")
 
     def forward(self, pipeline, curve):
         encoding = self.encoder(pipeline, curve)
@@ -755,9 +1467,92 @@ class SurrogateModel(torch.nn.Module):
     def predict(self, pipeline, curve):
         return self(pipeline, curve)
 
+    @torch.no_grad()
+    def encode(self, pipeline, curve) -> torch.Tensor:
+        return self.encoder(pipeline, curve)
+
+    @torch.no_grad()
+    def mean_cache(self) -> tuple[torch.Tensor, torch.Tensor] | None:
+        """The train inputs and their weights in the predictive mean of the exact GP
+        (see `predict_mean`). None for the variational head, which does not need it."""
+        gp_model = self.gp_model
+        if self.gp_head == "svgp":
+            return None
+        train_x = gp_model.train_inputs[0]
+        train_y = gp_model.train_targets
+        lik_train_train_covar = self.likelihood(gp_model.forward(train_x)).lazy_covariance_matrix
+        residual = train_y - gp_model.mean_module(train_x)
+        alpha = lik_train_train_covar.solve(residual.unsqueeze(-1)).squeeze(-1)
+        return train_x, alpha
+
+    @torch.no_grad()
+    def predict_mean(
+        self, pipeline, curve, cache: tuple[torch.Tensor, torch.Tensor] | None = None
+    ) -> torch.Tensor:
+        """Predictive mean of the GP, without computing the predictive variances.
+
+        Unlike `predict` under `gpytorch.settings.skip_posterior_variances`, this does not
+        change any (process-wide) gpytorch settings, so it is safe to use while another
+        thread predicts with a different model.
+
+        `cache` is the result of `mean_cache`, pass it to predict many batches with the
+        same training data without solving the train system for each of them.
+        """
+        gp_model = self.gp_model
+        if self.gp_head == "svgp":
+            return gp_model(self.encoder(pipeline, curve)).mean
+        train_x, alpha = cache if cache is not None else self.mean_cache()  # type: ignore
+        x = self.encoder(pipeline, curve)
+        return gp_model.mean_module(x) + gp_model.covar_module(x, train_x) @ alpha
+
+    @torch.no_grad()
+    def predict_encoding(self, encoding):
+        return self.likelihood(self.gp_model(encoding))
+
+    @torch.no_grad()
+    def predict_encoding_fast(self, encoding) -> Tuple[torch.Tensor, torch.Tensor]:
+        """Mean and standard deviation of `predict_encoding` with LOVE (exact GP only)."""
+        mean, var = self.gp_model.fast_predict(encoding)
+        var = (var + self.likelihood.noise).clamp_min(1e-6)
+        return mean, var.sqrt()
+
+    @torch.no_grad()
+    def solve_train_covariance(self, x2) -> torch.Tensor | None:
+        """The (noisy) train covariance solved for the covariance between the train
+        inputs and the encoded inputs `x2`, i.e. the part of `posterior_covariance` that
+        does not depend on `x1`. None for the variational head, which does not need it."""
+        gp_model = self.gp_model
+        if self.gp_head == "svgp":
+            return None
+        if gp_model.prediction_strategy is None:
+            gp_model(x2)  # initialize the prediction caches
+        train_x = gp_model.train_inputs[0]
+        train_train_covar = gp_model.prediction_strategy.lik_train_train_covar
+        train_x2_covar = gp_model.covar_module(train_x, x2).to_dense()
+        return train_train_covar.solve(train_x2_covar)
+
+    @torch.no_grad()
+    def posterior_covariance(self, x1, x2, solved: torch.Tensor | None = None) -> torch.Tensor:
+        """Posterior covariance of the GP between the encoded inputs `x1` and `x2`.
+
+        `solved` is the result of `solve_train_covariance(x2)`, pass it to compute the
+        covariance of many chunks of `x1` with the same `x2`.
+        """
+        gp_model = self.gp_model
+        if self.gp_head == "svgp":
+            covar = gp_model(torch.cat([x1, x2])).lazy_covariance_matrix
+            return covar[: len(x1), len(x1) :].to_dense()
+        if solved is None:
+            solved = self.solve_train_covariance(x2)
+        train_x = gp_model.train_inputs[0]
+        covar = gp_model.covar_module(x1, x2).to_dense()
+        train_x1_covar = gp_model.covar_module(train_x, x1).to_dense()
+        return covar - train_x1_covar.T @ solved
+
     def train_step(self, pipeline, curve, y) -> torch.Tensor:
         encoding = self.encoder(pipeline, curve)
-        self.gp_model.set_train_data(encoding, y, False)
+        if self.gp_head == "exact":
+            self.gp_model.set_train_data(encoding, y, False)
         output = self.gp_model(encoding)
         loss = -self.mll(output, y)  # type: ignore
         return loss
@@ -765,8 +1560,29 @@ class SurrogateModel(torch.nn.Module):
     @torch.no_grad()
     def set_train_data(self, pipeline, curve, y) -> None:
         self.eval()
+        if self.gp_head != "exact":
+            # the variational posterior summarizes all the data it was trained on
+            self.clear_cache()
+            return
         encoding = self.encoder(pipeline, curve)
         self.gp_model.set_train_data(encoding, y, False)
+        self.clear_cache()
+
+    @torch.no_grad()
+    def init_inducing_points(self, pipeline, curve, num_data: int) -> None:
+        """Place the inducing points of the SVGP head at the encodings of the given
+        samples and set the number of training samples of the ELBO."""
+        inducing_points = self.gp_model.variational_strategy.inducing_points
+        encoding = self.encoder(pipeline, curve)[: len(inducing_points)]
+        inducing_points[: len(encoding)] = encoding
+        self.mll.num_data = num_data
+
+    def clear_cache(self) -> None:
+        if self.gp_head == "exact":
+            self.gp_model.prediction_strategy = None
+            self.gp_model._fast_cache = None
+        else:
+            self.gp_model.variational_strategy._clear_cache()
 
     @property
     def lengthscale(self) -> float:
@@ -774,4 +1590,4 @@ class SurrogateModel(torch.nn.Module):
 
     @property
     def noise(self) -> float:
-        return self.gp_model.likelihood.noise.item()  # type: ignore
+        return self.likelihood.noise.item()  # type: ignore
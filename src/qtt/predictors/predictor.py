@@ -1,13 +1,19 @@
 import logging
 import os
 import pickle
-from typing import Tuple
+from typing import Literal, Tuple
 
 import numpy as np
 import pandas as pd
 from numpy.typing import ArrayLike
 
 from qtt.utils import setup_outputdir
+from qtt.utils.checkpoint import (
+    has_checkpoint,
+    load_checkpoint_tensors,
+    read_checkpoint,
+    save_checkpoint,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -24,6 +30,12 @@ class Predictor:
     """
 
     model_file_name = "model.pkl"
+    # all subclasses by module and name, the classes checkpoints can be loaded as
+    _registry: dict[tuple[str, str], type] = {}
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        Predictor._registry[(cls.__module__, cls.__name__)] = cls
 
     def __init__(
         self,
@@ -119,11 +131,63 @@ class Predictor:
         """
         return self._preprocess(**kwargs)
 
+    def _get_checkpoint(self) -> tuple[dict, dict]:
+        """
+        Return the state of the predictor for `save`: a JSON-serializable config (e.g.
+        hyperparameters and the fitted preprocessing) and the tensors by name.
+
+        Predictors that support the checkpoint format override this method and
+        `_set_checkpoint`.
+        """
+        raise NotImplementedError(f"{type(self).__name__} only supports format='pickle'")
+
+    def _set_checkpoint(self, config: dict, tensors: dict) -> None:
+        """Restore the state returned by `_get_checkpoint` (see `load`)."""
+        raise NotImplementedError
+
     @classmethod
-    def load(cls, path: str, reset_paths: bool = True, verbose: bool = True):
+    def _supports_checkpoint(cls) -> bool:
+        """Whether the predictor implements the checkpoint format (`_get_checkpoint`)."""
+        return cls._get_checkpoint is not Predictor._get_checkpoint
+
+    def _to_checkpoint(self) -> tuple[dict, dict]:
+        """Full checkpoint config (including the class) and tensors of the predictor."""
+        config, tensors = self._get_checkpoint()
+        config = {
+            "class": type(self).__name__,
+            "module": type(self).__module__,
+            "name": self.name,
+            "path": self.path,
+            **config,
+        }
+        return config, tensors
+
+    @classmethod
+    def _from_checkpoint(cls, config: dict, tensors: dict, path: str, reset_paths: bool = True):
+        """Create a predictor from the checkpoint config and tensors of `_to_checkpoint`."""
+        if config["class"] != cls.__name__:
+            raise ValueError(f"Checkpoint of a {config['class']}, not of a {cls.__name__}")
+        model = cls.__new__(cls)
+        model.name = config["name"]
+        model.path = path if reset_paths else config["path"]
+        model.model = None
+        model._set_checkpoint(config, tensors)
+        return model
+
+    @classmethod
+    def load(
+        cls,
+        path: str,
+        reset_paths: bool = True,
+        verbose: bool = True,
+        exclude: tuple[str, ...] = (),
+    ):
         """
         Loads the model from disk to memory.
 
+        Checkpoints (see `save`) are preferred over pickled models. Their tensors are
+        memory-mapped where possible.
+
         Args:
             path (str):
                 Path to the saved model, minus the file name.
@@ -135,10 +199,20 @@ class Predictor:
                 If False, the actual valid path and self.path may differ, leading to strange behaviour and potential exceptions if the model needs to load any other files at a later time.
             verbose (bool):
                 Whether to log the location of the loaded file.
+            exclude (tuple[str, ...]):
+                Prefixes of the checkpoint tensors not to load, e.g. `("fit_data",)` to
+                load a `PerfPredictor` for inference only.
 
         Returns:
             model (Predictor): Loaded model object.
         """
+        if has_checkpoint(path):
+            tensors = load_checkpoint_tensors(path, exclude=exclude)
+            model = cls._from_checkpoint(read_checkpoint(path), tensors, path, reset_paths)
+            if verbose:
+                logger.info(f"Model loaded from checkpoint: {path}")
+            return model
+
         file_path = os.path.join(path, cls.model_file_name)
         with open(file_path, "rb") as f:
             model = pickle.load(f)
@@ -148,16 +222,28 @@ class Predictor:
             logger.info(f"Model loaded from: {file_path}")
         return model
 
-    def save(self, path: str | None = None, verbose: bool = True) -> str:
+    def save(
+        self,
+        path: str | None = None,
+        verbose: bool = True,
+        format: Literal["checkpoint", "pickle"] = "checkpoint",
+    ) -> str:
         """
         Saves the model to disk.
 
+        The checkpoint format stores the tensors in a single (safetensors or torch)
+        file next to a small JSON config with the hyperparameters and the fitted
+        preprocessing. It does not depend on the layout of the classes and its tensors
+        can be loaded partially (see `qtt.utils.checkpoint.load_checkpoint_tensors`).
+
         Args:
             path (str): Path to the saved model, minus the file name.
                 This should generally be a directory path ending with a '/' character (or appropriate path separator value depending on OS).
                 If None, self.path is used.
                 The final model file is typically saved to os.path.join(path, self.model_file_name).
             verbose (bool): Whether to log the location of the saved file.
+            format (str): "checkpoint" or "pickle" (the whole object). Predictors that do
+                not implement the checkpoint format are pickled.
 
         Returns:
             path: Path to the saved model, minus the file name. Use this value to load the model from disk via cls.load(path), cls being the class of the model object, such as ```model = PerfPredictor.load(path)```
@@ -165,6 +251,13 @@ class Predictor:
         if path is None:
             path = self.path
         path = setup_outputdir(path, create_dir=True, warn_if_exist=True)
+        if format == "checkpoint" and self._supports_checkpoint():
+            config, tensors = self._to_checkpoint()
+            save_checkpoint(path, config, tensors)
+            if verbose:
+                logger.info(f"Model checkpoint saved to: {path}")
+            return path
+
         file_path = os.path.join(path, self.model_file_name)
         with open(file_path, "wb") as f:
             pickle.dump(self, f, protocol=pickle.HIGHEST_PROTOCOL)
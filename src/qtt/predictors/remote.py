@@ -0,0 +1,414 @@
+import copy
+import logging
+import os
+import queue
+import secrets
+import threading
+from concurrent.futures import Future
+from multiprocessing.connection import Client, Connection, Listener
+from pathlib import Path
+from typing import Any, Literal, Mapping
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+Address = str | tuple[str, int]
+PredictorKind = Literal["perf", "cost"]
+
+AUTHKEY_ENV = "QTT_PREDICTOR_AUTHKEY"
+AUTHKEY_FILE = "~/.cache/qtt/predictor.key"
+
+
+def load_authkey(
+    authkey: bytes | None = None,
+    path: str = AUTHKEY_FILE,
+    create: bool = False,
+) -> bytes | None:
+    """
+    Get the authentication key of a `PredictorServer`.
+
+    The key is `authkey` if given, else the `QTT_PREDICTOR_AUTHKEY` environment
+    variable, else the contents of the key file `path`. The key file must only be
+    accessible by its owner.
+
+    Args:
+        authkey: Explicit key.
+        path: Key file.
+        create: Whether to write a random key to the key file if there is no key.
+
+    Returns:
+        The key, or None if there is none.
+
+    Raises:
+        PermissionError: If the key file is accessible by other users.
+    """
+    if authkey is not None:
+        return authkey
+    if os.environ.get(AUTHKEY_ENV):
+        return os.environ[AUTHKEY_ENV].encode()
+
+    file = Path(path).expanduser()
+    if create and not file.exists():
+        file.parent.mkdir(parents=True, exist_ok=True)
+        tmp = file.with_name(f"{file.name}.{os.getpid()}.tmp")
+        fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "w") as f:
+            f.write(secrets.token_hex(32))
+        try:
+            os.link(tmp, file)  # atomic, a concurrently created key wins
+            logger.info(f"Created authentication key file {file}")
+        except FileExistsError:
+            pass
+        finally:
+            os.unlink(tmp)
+    if not file.is_file():
+        return None
+    if file.stat().st_mode & 0o077:
+        raise PermissionError(
+            f"Authentication key file {file} must only be accessible by its owner (chmod 600)"
+        )
+    key = file.read_text().strip()
+    if not key:
+        raise ValueError(f"Authentication key file {file} is empty")
+    return key.encode()
+
+
+def _is_tcp(address: Address) -> bool:
+    return isinstance(address, tuple)
+
+
+def _connect(address: Address, authkey: bytes | None) -> Connection:
+    """Connect to a server, which authenticates itself with the key as well."""
+    authkey = load_authkey(authkey)
+    if _is_tcp(address) and authkey is None:
+        raise ValueError(
+            f"Refusing to connect to {address} without an authentication key: the messages "
+            f"are pickled, so a fake server could run code in this process. Pass `authkey` "
+            f"or set {AUTHKEY_ENV}."
+        )
+    return Client(address, authkey=authkey)
+
+
+class PredictorServer:
+    """
+    Serve the predictors of (pretrained) optimizers to many tuners on the same host.
+
+    Every optimizer is loaded once and its predictors are shared by all clients. The
+    clients connect with `RemotePredictor` proxies, usually obtained via
+    `get_pretrained_optimizer(version, server=address)`. All requests are handled by a
+    single worker thread, which batches the predict requests of all clients for the
+    same predictor into one call.
+
+    The messages are pickled, so every client must be trusted. Clients on a TCP
+    address must authenticate with a key (see `load_authkey`), the server creates a
+    random one in `~/.cache/qtt/predictor.key` if there is none. A Unix socket is only
+    accessible by the user of the server (mode 600). Without a key, it relies on these
+    file permissions alone, so place it in a directory not writable by others.
+
+    Args:
+        address: Unix socket path or (host, port) tuple to listen on.
+        optimizers: Optimizers to serve, by name. Other names are loaded on first use
+            with `get_pretrained_optimizer`.
+        authkey: Authentication key the clients must provide. Defaults to the key of
+            `load_authkey`.
+        path: Directory of the pretrained optimizers (see `get_pretrained_optimizer`).
+        download: Whether to download missing pretrained optimizers.
+        allow_unverified: Whether to use pretrained optimizers without a known checksum
+            (see `get_pretrained_optimizer`).
+        batch_wait: Seconds to wait for further requests before predicting a batch.
+    """
+
+    def __init__(
+        self,
+        address: Address,
+        optimizers: Mapping[str, Any] | None = None,
+        *,
+        authkey: bytes | None = None,
+        path: str = "~/.cache/qtt/pretrained",
+        download: bool = True,
+        allow_unverified: bool | None = None,
+        batch_wait: float = 0.002,
+    ):
+        self.address = address
+        self.authkey = authkey
+        self.path = path
+        self.download = download
+        self.allow_unverified = allow_unverified
+        self.batch_wait = batch_wait
+        self._optimizers: dict[str, Any] = dict(optimizers or {})
+        self._queue: queue.Queue = queue.Queue()
+        self._listener: Listener | None = None
+        self._closed = threading.Event()
+
+    def serve_forever(self) -> None:
+        """Accept clients and serve their requests until `close` is called."""
+        authkey = load_authkey(self.authkey, create=_is_tcp(self.address))
+        self._listener = Listener(self.address, authkey=authkey)
+        if not _is_tcp(self.address):
+            os.chmod(self._listener.address, 0o600)
+        logger.info(f"Serving predictors at {self._listener.address}")
+        worker = threading.Thread(target=self._work, name="qtt-predictor-server", daemon=True)
+        worker.start()
+        while not self._closed.is_set():
+            try:
+                conn = self._listener.accept()
+            except OSError:
+                break  # listener closed
+            except Exception as e:  # e.g. failed authentication
+                logger.warning(f"Rejected connection: {e!r}")
+                continue
+            threading.Thread(target=self._handle, args=(conn,), daemon=True).start()
+
+    def start(self) -> threading.Thread:
+        """Serve in a background thread and return it."""
+        thread = threading.Thread(target=self.serve_forever, name="qtt-server", daemon=True)
+        thread.start()
+        return thread
+
+    def close(self) -> None:
+        self._closed.set()
+        if self._listener is not None:
+            self._listener.close()
+
+    def _handle(self, conn: Connection) -> None:
+        """Forward the requests of a client to the worker and send back the replies."""
+        with conn:
+            while True:
+                try:
+                    request = conn.recv()
+                except (EOFError, OSError):
+                    return
+                future: Future = Future()
+                self._queue.put((request, future))
+                try:
+                    conn.send(("ok", future.result()))
+                except Exception as e:
+                    try:
+                        conn.send(("error", e))
+                    except Exception:  # the exception can not be pickled
+                        conn.send(("error", RuntimeError(repr(e))))
+
+    def _work(self) -> None:
+        while True:
+            jobs = [self._queue.get()]
+            # collect the requests of other clients arriving in the meantime
+            try:
+                while True:
+                    jobs.append(self._queue.get(timeout=self.batch_wait))
+            except queue.Empty:
+                pass
+
+            batches: dict[tuple, list] = {}
+            for request, future in jobs:
+                op, name, kind, kwargs = request
+                if op == "predict" and _batchable(kwargs):
+                    shapes = tuple((k, v.shape[1]) for k, v in sorted(kwargs.items()))
+                    batches.setdefault((name, kind, shapes), []).append((kwargs, future))
+                else:
+                    try:
+                        future.set_result(self._call(op, name, kind, kwargs))
+                    except Exception as e:
+                        future.set_exception(e)
+            for (name, kind, _), batch in batches.items():
+                self._predict_batch(name, kind, batch)
+
+    def _get_optimizer(self, name: str):
+        if name not in self._optimizers:
+            from ..utils.pretrained import get_pretrained_optimizer
+
+            logger.info(f"Loading optimizer '{name}'")
+            self._optimizers[name] = get_pretrained_optimizer(
+                name,
+                download=self.download,
+                path=self.path,
+                allow_unverified=self.allow_unverified,
+            )
+        return self._optimizers[name]
+
+    def _get_predictor(self, name: str, kind: PredictorKind):
+        optimizer = self._get_optimizer(name)
+        predictor = optimizer.perf_predictor if kind == "perf" else optimizer.cost_predictor
+        if predictor is None:
+            raise ValueError(f"Optimizer '{name}' has no {kind} predictor")
+        return predictor
+
+    def _call(self, op: str, name: str, kind: PredictorKind, kwargs: dict):
+        match op:
+            case "optimizer":
+                return self._client_optimizer(name)
+            case "preprocess":
+                return self._get_predictor(name, kind).preprocess(**kwargs)
+            case "predict":
+                return self._get_predictor(name, kind).predict(**kwargs)
+            case _:
+                raise ValueError(f"Unknown request: {op}")
+
+    def _client_optimizer(self, name: str):
+        """Copy of the optimizer with its predictors replaced by proxies."""
+        optimizer = copy.copy(self._get_optimizer(name))
+        address = self._listener.address if self._listener is not None else self.address
+        # a key from the environment or the key file is not copied into the proxies (and
+        # the saved optimizers of the clients), they look it up again
+        optimizer.perf_predictor = RemotePredictor(address, name, "perf", self.authkey)
+        if optimizer.cost_predictor is not None:
+            optimizer.cost_predictor = RemotePredictor(address, name, "cost", self.authkey)
+        # the predictors are shared, they can not be refit by a single client
+        optimizer.refit = False
+        return optimizer
+
+    def _predict_batch(self, name: str, kind: PredictorKind, batch: list) -> None:
+        """Predict the requests of several clients for the same predictor at once."""
+        try:
+            predictor = self._get_predictor(name, kind)
+            sizes = [len(kwargs["X"]) for kwargs, _ in batch]
+            kwargs = {
+                key: np.concatenate([kw[key] for kw, _ in batch]) for key in batch[0][0]
+            }
+            logger.debug(f"Predicting {sum(sizes)} rows of {len(batch)} requests")
+            result = predictor.predict(**kwargs)
+            if not isinstance(result, tuple):
+                result = np.reshape(result, -1)
+        except Exception as e:
+            for _, future in batch:
+                future.set_exception(e)
+            return
+        start = 0
+        for size, (_, future) in zip(sizes, batch):
+            end = start + size
+            if isinstance(result, tuple):
+                future.set_result(tuple(r[start:end] for r in result))
+            else:
+                future.set_result(result[start:end])
+            start = end
+
+
+def _batchable(kwargs: dict) -> bool:
+    """Whether a predict request can be concatenated with others, i.e. it only consists
+    of preprocessed features (and curves)."""
+    return set(kwargs) <= {"X", "curve"} and all(
+        isinstance(v, np.ndarray) and v.ndim == 2 for v in kwargs.values()
+    )
+
+
+class RemotePredictor:
+    """
+    Proxy of a predictor served by a `PredictorServer`.
+
+    It provides `preprocess` and `predict` with the same interface as `PerfPredictor`
+    and `CostPredictor`. The inputs are preprocessed by the server, the returned
+    features are passed to `predict` as usual. The predictor can not be (re)fit.
+
+    Args:
+        address: Address of the server.
+        name: Name of the optimizer on the server, e.g. "mtlbm/micro".
+        kind: Which predictor of the optimizer to use, "perf" or "cost".
+        authkey: Authentication key of the server. Defaults to the key of
+            `load_authkey`, which is required for a TCP address.
+    """
+
+    is_fit = True
+
+    def __init__(
+        self,
+        address: Address,
+        name: str,
+        kind: PredictorKind,
+        authkey: bytes | None = None,
+    ):
+        self.address = address
+        self.name = name
+        self.kind = kind
+        self.authkey = authkey
+        self._conn: Connection | None = None
+        self._lock = threading.Lock()
+
+    def _request(self, op: str, **kwargs):
+        with self._lock:
+            if self._conn is None:
+                self._conn = _connect(self.address, self.authkey)
+            self._conn.send((op, self.name, self.kind, kwargs))
+            status, result = self._conn.recv()
+        if status == "error":
+            raise result
+        return result
+
+    def preprocess(self, **kwargs):
+        return self._request("preprocess", **kwargs)
+
+    def predict(self, **kwargs):
+        return self._request("predict", **kwargs)
+
+    def reset_path(self, path: str | None = None):
+        pass
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def __getstate__(self):
+        # connections are opened again on first use
+        state = self.__dict__.copy()
+        state["_conn"] = None
+        state["_lock"] = None
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+
+def get_remote_optimizer(name: str, address: Address, authkey: bytes | None = None):
+    """
+    Get an optimizer whose predictors are served by a `PredictorServer`.
+
+    Args:
+        name: Name of the optimizer on the server, e.g. "mtlbm/micro".
+        address: Address of the server.
+        authkey: Authentication key of the server. Defaults to the key of
+            `load_authkey`, which is required for a TCP address.
+
+    Returns:
+        QuickOptimizer: A copy of the served optimizer with `RemotePredictor` proxies.
+    """
+    with _connect(address, authkey) as conn:
+        conn.send(("optimizer", name, "perf", {}))
+        status, result = conn.recv()
+    if status == "error":
+        raise result
+    return result
+
+
+if __name__ == "__main__":
+    import argparse
+
+    # use the classes of the package, the proxies are unpickled by the clients
+    from qtt.predictors.remote import PredictorServer
+
+    parser = argparse.ArgumentParser(description="Serve the predictors of pretrained optimizers.")
+    parser.add_argument(
+        "address",
+        help="host:port, or a Unix socket path (anything containing a '/', e.g. ./sock)",
+    )
+    parser.add_argument("versions", nargs="*", help="optimizers to load at startup")
+    parser.add_argument("--path", default="~/.cache/qtt/pretrained")
+    parser.add_argument(
+        "--allow-unverified",
+        action="store_true",
+        default=None,
+        help="use pretrained optimizers without a known checksum (trusted sources only)",
+    )
+    args = parser.parse_args()
+
+    address: Address = args.address
+    host, sep, port = args.address.rpartition(":")
+    if sep and host and "/" not in args.address and port.isdigit():
+        address = (host.strip("[]"), int(port))
+    # the key is not passed on the command line (visible to other users), but read from
+    # the environment or the key file, see `load_authkey`
+    server = PredictorServer(address, path=args.path, allow_unverified=args.allow_unverified)
+    for version in args.versions:
+        server._get_optimizer(version)
+    server.serve_forever()
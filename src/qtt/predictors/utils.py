@@ -93,26 +93,33 @@ class MetricLogger(object):
         start_time = time.time()
         end = time.time()
         iter_time = SmoothedValue(fmt="{avg:.3f}")
-        space_fmt = ":" + str(len(str(len(iterable)))) + "d"
-        log_msg = self.delimiter.join(
-            [
-                header,
-                "[{0" + space_fmt + "}/{1}]",
-                "eta: {eta}",
-                "{meters}",
-                "time: {time}",
-            ]
-        )
+        # streamed iterables do not know their length, log without eta then
+        total = len(iterable) if hasattr(iterable, "__len__") else None
+        if total is not None:
+            space_fmt = ":" + str(len(str(total))) + "d"
+            log_msg = self.delimiter.join(
+                [
+                    header,
+                    "[{0" + space_fmt + "}/{1}]",
+                    "eta: {eta}",
+                    "{meters}",
+                    "time: {time}",
+                ]
+            )
+        else:
+            log_msg = self.delimiter.join([header, "[{0}]", "{meters}", "time: {time}"])
         for obj in iterable:
             yield obj
             iter_time.update(time.time() - end)
-            if i % print_freq == 0 or i == len(iterable):
-                eta_seconds = iter_time.global_avg * (len(iterable) - i)
-                eta_string = str(datetime.timedelta(seconds=int(eta_seconds)))
+            if i % print_freq == 0 or i == total:
+                eta_string = ""
+                if total is not None:
+                    eta_seconds = iter_time.global_avg * (total - i)
+                    eta_string = str(datetime.timedelta(seconds=int(eta_seconds)))
                 _print(
                     log_msg.format(
                         i,
-                        len(iterable),
+                        total,
                         eta=eta_string,
                         meters=str(self),
                         time=str(iter_time),
@@ -122,7 +129,7 @@ class MetricLogger(object):
             end = time.time()
         total_time = time.time() - start_time
         total_time_str = str(datetime.timedelta(seconds=int(total_time)))
-        _print(f"Total time: {total_time_str} ({total_time / len(iterable):.3f} s / it)")
+        _print(f"Total time: {total_time_str} ({total_time / max(i - 1, 1):.3f} s / it)")
 
 
 def get_torch_device():
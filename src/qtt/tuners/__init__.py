@@ -1,4 +1,17 @@
-from .image.classification.tuner import QuickImageCLSTuner
-from .quick import QuickTuner
+from typing import TYPE_CHECKING
+
+from .._lazy import lazy_attrs
+
+if TYPE_CHECKING:
+    from .image.classification.tuner import QuickImageCLSTuner
+    from .quick import QuickTuner
+
+__getattr__, __dir__ = lazy_attrs(
+    __name__,
+    {
+        "QuickImageCLSTuner": ".image.classification.tuner",
+        "QuickTuner": ".quick",
+    },
+)
 
 __all__ = ["QuickTuner", "QuickImageCLSTuner"]
@@ -13,6 +13,11 @@ class QuickImageCLSTuner(QuickTuner):
         data_path (str): Path to the dataset.
         path (str, optional): Path to save the optimizer. Defaults to None.
         verbosity (int, optional): Verbosity level. Defaults to 2.
+        n_workers (int, optional): Number of trials to evaluate in parallel. Each worker
+            is pinned to one GPU. Defaults to 1.
+        allow_unverified (bool, optional): Whether to use the pretrained optimizer if
+            no checksum is known for it (see `get_pretrained_optimizer`). Defaults to
+            the `QTT_ALLOW_UNVERIFIED` environment variable being "1".
     """
 
     def __init__(
@@ -21,15 +26,19 @@ class QuickImageCLSTuner(QuickTuner):
         n: int = 512,
         path: str | None = None,
         verbosity: int = 2,
+        n_workers: int = 1,
+        allow_unverified: bool | None = None,
     ):
-        quick_opt: QuickOptimizer = get_pretrained_optimizer("mtlbm/full")
+        quick_opt: QuickOptimizer = get_pretrained_optimizer(
+            "mtlbm/full", allow_unverified=allow_unverified
+        )
 
         trial_info, metafeat = extract_image_dataset_metafeat(data_path)
         quick_opt.setup(n, metafeat=metafeat)
 
         self.trial_info = trial_info
 
-        super().__init__(quick_opt, fn, path=path, verbosity=verbosity)
+        super().__init__(quick_opt, fn, path=path, verbosity=verbosity, n_workers=n_workers)
 
     def run(
         self,
@@ -1,8 +1,10 @@
+import inspect
 import json
 import pickle
 import logging
 import os
 import time
+from concurrent.futures import FIRST_COMPLETED, Executor, Future, ThreadPoolExecutor, wait
 from typing import Callable, Any
 
 import numpy as np
@@ -15,6 +17,7 @@ from ..utils import (
     set_logger_verbosity,
     setup_outputdir,
 )
+from ..utils.timing import BIN_EDGES
 
 logger = logging.getLogger(__name__)
 
@@ -35,6 +38,16 @@ class QuickTuner:
             - None: do not save.
         verbosity (int, optional): Verbosity level of the logger. Defaults to 2.
         resume (bool, optional): Whether to resume the tuner from a previous state. Defaults to False.
+        n_workers (int, optional): Number of trials to evaluate in parallel. Defaults to 1.
+            If larger than 1, the tuner keeps `n_workers` trials in flight and asks the
+            optimizer for a new trial whenever one of them finishes.
+        executor (Executor, optional): A `concurrent.futures.Executor` used to evaluate the
+            trials, e.g. a `ProcessPoolExecutor`. If None and `n_workers > 1`, a
+            `ThreadPoolExecutor` with `n_workers` threads is used. Defaults to None.
+        timing_callback (Callable[[str, float], None], optional): Called with the phase
+            and duration in seconds of every timed step, e.g. "ask", "ask.encode",
+            "evaluate" or "save". The statistics of all phases are also written to
+            `timings.json` in the output directory. Defaults to None.
     """
 
     log_to_file: bool = True
@@ -50,10 +63,15 @@ class QuickTuner:
         save_freq: str | None = "step",
         verbosity: int = 2,
         resume: bool = False,
+        n_workers: int = 1,
+        executor: Executor | None = None,
+        timing_callback: Callable[[str, float], None] | None = None,
         **kwargs,
     ):
         if resume and path is None:
             raise ValueError("Cannot resume without specifying a path.")
+        if n_workers < 1:
+            raise ValueError("'n_workers' must be at least 1.")
         self._validate_kwargs(kwargs)
 
         self.verbosity = verbosity
@@ -69,6 +87,9 @@ class QuickTuner:
         self.optimizer = optimizer
         self.optimizer.reset_path(self.output_dir)
         self.f = f
+        self.n_workers = n_workers
+        self.executor = executor
+        self.timing_callback = timing_callback
 
         # trackers
         self.inc_score: float = 0.0
@@ -193,6 +214,8 @@ class QuickTuner:
         state = self.__dict__.copy()
         state.pop("optimizer")
         state.pop("f")
+        state.pop("executor", None)
+        state.pop("timing_callback", None)
         return state
 
     def _save_state(self, save: bool = True):
@@ -225,18 +248,50 @@ class QuickTuner:
         except Exception as e:
             logger.warning(f"Optimizer state not saved: {e!r}")
 
-    def save(self, incumbent: bool = True, history: bool = True, state: bool = True):
+    def _save_timings(self, save: bool = True):
+        """
+        Saves the statistics of the timed phases of the optimizer and the evaluations
+        (see `Optimizer.timer`) to a JSON file.
+
+        Args:
+            save (bool, optional): Whether to save the timings. Defaults to True.
+        """
+        if not save:
+            return
+        try:
+            timings = {
+                "unit": "seconds",
+                "bin_edges": BIN_EDGES,
+                "phases": self.optimizer.timer.summary(),
+            }
+            with open(os.path.join(self.output_dir, "timings.json"), "w") as f:
+                json.dump(timings, f, indent=2)
+        except Exception as e:
+            logger.warning(f"Timings not saved: {e!r}")
+
+    def save(
+        self,
+        incumbent: bool = True,
+        history: bool = True,
+        state: bool = True,
+        timings: bool = True,
+    ):
         logger.info("Saving current state to disk...")
-        self._save_incumbent(incumbent)
-        self._save_history(history)
-        self._save_state(state)
+        with self.optimizer.span("save"):
+            self._save_incumbent(incumbent)
+            self._save_history(history)
+            self._save_state(state)
+        self._save_timings(timings)
 
     def load(self, path: str):
         logger.info(f"Loading state from {path}")
         with open(path, "rb") as f:
             state = pickle.load(f)
         self.__dict__.update(state)
-        self.optimizer = Optimizer.load(os.path.join(self.output_dir, "optimizer"))
+        # the tuner's own output, the state above is pickled as well
+        self.optimizer = Optimizer.load(
+            os.path.join(self.output_dir, "optimizer"), allow_pickle=True
+        )
 
     def run(
         self,
@@ -261,6 +316,36 @@ class QuickTuner:
         logger.info(f"QuickTuneTool will save results to {self.output_dir}")
 
         self.start = time.time()
+        timer = self.optimizer.timer
+        if self.timing_callback is not None and self.timing_callback not in timer.callbacks:
+            timer.callbacks.append(self.timing_callback)
+        if self.n_workers > 1 or self.executor is not None:
+            self._run_parallel(fevals, time_budget, trial_info)
+        else:
+            self._run_serial(fevals, time_budget, trial_info)
+
+        self._log_end()
+        self.save()
+
+        return (
+            np.array(self.traj),
+            np.array(self.runtime),
+            np.array(self.history, dtype=object),
+        )
+
+    def _run_serial(
+        self,
+        fevals: int | None = None,
+        time_budget: float | None = None,
+        trial_info: dict | None = None,
+    ) -> None:
+        """Run the optimization loop, evaluating one trial at a time.
+
+        Args:
+            fevals (int, optional): Number of function evaluations to run. Defaults to None.
+            time_budget (float, optional): Time budget in seconds. Defaults to None.
+            trial_info (dict, optional): Additional information to pass to the objective function. Defaults to None.
+        """
         while True:
             self.optimizer.ante()
 
@@ -271,7 +356,8 @@ class QuickTuner:
             _trial_info = self._add_trial_info(trial_info)
 
             self._log_job_submission(trial)
-            result = self.f(trial, trial_info=_trial_info)
+            with self.optimizer.span("evaluate"):
+                result = self.f(trial, trial_info=_trial_info)
 
             self._log_report(result)
             self.optimizer.tell(result)
@@ -281,14 +367,91 @@ class QuickTuner:
                 logger.info("Budget exhausted. Stopping run...")
                 break
 
-        self._log_end()
-        self.save()
+    def _run_parallel(
+        self,
+        fevals: int | None = None,
+        time_budget: float | None = None,
+        trial_info: dict | None = None,
+    ) -> None:
+        """Run the optimization loop with multiple trials in flight.
 
-        return (
-            np.array(self.traj),
-            np.array(self.runtime),
-            np.array(self.history, dtype=object),
-        )
+        Whenever worker slots are free, the optimizer is asked for a batch of new trials
+        (one per free slot), which are submitted to the executor. Results are told to the optimizer as they complete.
+        Once the budget is exhausted, no new trials are submitted and the running ones
+        are awaited.
+
+        Args:
+            fevals (int, optional): Number of function evaluations to run. Defaults to None.
+            time_budget (float, optional): Time budget in seconds. Defaults to None.
+            trial_info (dict, optional): Additional information to pass to the objective function. Defaults to None.
+        """
+        executor = self.executor
+        if executor is None:
+            executor = ThreadPoolExecutor(max_workers=self.n_workers)
+        n_slots = max(self.n_workers, 1)
+
+        running: dict[Future, int] = {}
+        submitted: dict[Future, float] = {}
+        free_slots = list(range(n_slots))
+        exhausted = False
+        try:
+            while True:
+                n_free = len(free_slots)
+                if fevals is not None:
+                    n_free = min(n_free, fevals - len(self.traj) - len(running))
+                if n_free > 0 and not exhausted:
+                    self.optimizer.ante()
+
+                    # ask for a batch of new configurations, one per free slot
+                    for trial in self._ask_batch(n_free):
+                        slot = free_slots.pop(0)
+                        _trial_info = self._add_trial_info(trial_info)
+                        _trial_info["worker-id"] = slot
+
+                        self._log_job_submission(trial)
+                        future = executor.submit(self.f, trial, trial_info=_trial_info)
+                        running[future] = slot
+                        submitted[future] = time.perf_counter()
+
+                if not running:
+                    break
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    free_slots.append(running.pop(future))
+                    # wall time in flight, the trials are not queued by the executor
+                    elapsed = time.perf_counter() - submitted.pop(future)
+                    self.optimizer.timer.add("evaluate", elapsed)
+                    result = future.result()
+
+                    self._log_report(result)
+                    self.optimizer.tell(result)
+
+                    self.optimizer.post()
+                free_slots.sort()
+
+                if not exhausted and self._is_budget_exhausted(fevals, time_budget):
+                    logger.info("Budget exhausted. Waiting for running trials to finish...")
+                    exhausted = True
+        finally:
+            if self.executor is None:
+                executor.shutdown(wait=True, cancel_futures=True)
+
+    def _ask_batch(self, k: int) -> list[dict]:
+        """Ask the optimizer for up to `k` trials.
+
+        Optimizers implementing `ask(self)` without the number of trials are asked
+        repeatedly; they must not hand out a trial that is still running again.
+        """
+        if _accepts_k(self.optimizer.ask):
+            return self.optimizer.ask(k) or []  # type: ignore
+        trials = []
+        for _ in range(k):
+            trial = self.optimizer.ask()
+            if trial is None:
+                break
+            trials.append(trial)
+        return trials  # type: ignore
 
     def _update_trackers(self, traj, runtime, history):
         self.traj.append(traj)
@@ -344,6 +507,12 @@ class QuickTuner:
         logger.info(f"Best Config ID    : {self.inc_id}")
         logger.info(f"Best Configuration: {self.inc_config}")
         logger.info(separator)
+        for phase, stats in self.optimizer.timer.summary().items():
+            logger.info(
+                f"{phase:<18}: {stats['count']:>5} x {stats['mean']:.4f}s "
+                f"(p90 {stats['p90']:.4f}s, total {stats['total']:.2f}s)"
+            )
+        logger.info(separator)
 
     def _validate_kwargs(self, kwargs: dict) -> None:
         for key, value in kwargs.items():
@@ -368,3 +537,17 @@ class QuickTuner:
             self.inc_cost,
             self.inc_info,
         )
+
+
+def _accepts_k(ask: Callable) -> bool:
+    """Whether the `ask` method of an optimizer takes the number of trials."""
+    try:
+        parameters = inspect.signature(ask).parameters.values()
+    except (TypeError, ValueError):  # no signature, assume the current interface
+        return True
+    positional = (
+        inspect.Parameter.POSITIONAL_ONLY,
+        inspect.Parameter.POSITIONAL_OR_KEYWORD,
+        inspect.Parameter.VAR_POSITIONAL,
+    )
+    return any(p.kind in positional for p in parameters)
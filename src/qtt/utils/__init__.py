@@ -1,6 +1,24 @@
-from .config import config_to_serializible_dict, encode_config_space
-from .log_utils import add_log_to_file, set_logger_verbosity, setup_default_logging
-from .setup import fix_random_seeds, setup_outputdir
+from typing import TYPE_CHECKING
+
+from .._lazy import lazy_attrs
+
+if TYPE_CHECKING:
+    from .config import config_to_serializible_dict, encode_config_space
+    from .log_utils import add_log_to_file, set_logger_verbosity, setup_default_logging
+    from .setup import fix_random_seeds, setup_outputdir
+
+__getattr__, __dir__ = lazy_attrs(
+    __name__,
+    {
+        "config_to_serializible_dict": ".config",
+        "encode_config_space": ".config",
+        "add_log_to_file": ".log_utils",
+        "set_logger_verbosity": ".log_utils",
+        "setup_default_logging": ".log_utils",
+        "fix_random_seeds": ".setup",
+        "setup_outputdir": ".setup",
+    },
+)
 
 __all__ = [
     "config_to_serializible_dict",
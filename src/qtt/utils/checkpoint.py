@@ -0,0 +1,166 @@
+import importlib
+import importlib.util
+import json
+import os
+from typing import TYPE_CHECKING, Any, Mapping
+
+import numpy as np
+
+if TYPE_CHECKING:
+    import torch
+
+# torch (and safetensors, if installed) are imported on use, reading the config of a
+# checkpoint does not need them
+HAS_SAFETENSORS = importlib.util.find_spec("safetensors") is not None
+
+CHECKPOINT_VERSION = 1
+CHECKPOINT_FILE_NAME = "checkpoint.json"
+
+
+def has_checkpoint(path: str) -> bool:
+    """Whether `path` contains a checkpoint written by `save_checkpoint`."""
+    return os.path.isfile(os.path.join(path, CHECKPOINT_FILE_NAME))
+
+
+def _to_json(obj: Any) -> Any:
+    if isinstance(obj, np.generic):
+        return obj.item()
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    if isinstance(obj, (set, tuple)):
+        return list(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def save_checkpoint(path: str, config: Mapping[str, Any], tensors: Mapping[str, "torch.Tensor"]):
+    """
+    Save a checkpoint: the tensors in a single file (safetensors if available, else
+    torch.save) and the JSON-serializable `config` next to it.
+
+    The config is written last (atomically), so a directory only contains a checkpoint
+    once it is complete.
+
+    Args:
+        path: Directory to save the checkpoint to.
+        config: Configuration, e.g. hyperparameters and preprocessing.
+        tensors: Tensors by name, saved on the CPU.
+    """
+    import torch
+
+    os.makedirs(path, exist_ok=True)
+    # safetensors refuses tensors sharing memory (e.g. tied modules), copy those
+    out: dict[str, "torch.Tensor"] = {}
+    seen: set[tuple[int, int]] = set()
+    for key, tensor in tensors.items():
+        tensor = tensor.detach().cpu().contiguous()
+        storage = (tensor.untyped_storage().data_ptr(), tensor.storage_offset())
+        if storage in seen:
+            tensor = tensor.clone()
+        seen.add(storage)
+        out[key] = tensor
+
+    if HAS_SAFETENSORS:
+        from safetensors.torch import save_file
+
+        tensor_file = "tensors.safetensors"
+        save_file(out, os.path.join(path, tensor_file))
+    else:
+        tensor_file = "tensors.pt"
+        torch.save(out, os.path.join(path, tensor_file))
+
+    config = {"version": CHECKPOINT_VERSION, "tensor_file": tensor_file, **config}
+    file_path = os.path.join(path, CHECKPOINT_FILE_NAME)
+    with open(file_path + ".tmp", "w") as f:
+        json.dump(config, f, indent=2, default=_to_json)
+    os.replace(file_path + ".tmp", file_path)
+
+
+def resolve_class(registry: Mapping[tuple[str, str], type], module: str, name: str) -> type:
+    """
+    Find the class `name` of `module`, as named in a checkpoint, among the known
+    classes in `registry` (by module and name).
+
+    A checkpoint never imports arbitrary modules: only modules of this package are
+    imported on demand, other classes (e.g. user subclasses) must be defined, i.e.
+    their module imported, before the checkpoint is loaded.
+
+    Raises:
+        ValueError: If the class is not known.
+    """
+    if (module, name) not in registry and module.partition(".")[0] == __name__.partition(".")[0]:
+        try:
+            importlib.import_module(module)
+        except ImportError:
+            pass
+    try:
+        return registry[(module, name)]
+    except KeyError:
+        raise ValueError(
+            f"Unknown class {module}.{name} in the checkpoint, import the module defining "
+            "it before loading"
+        ) from None
+
+
+def read_checkpoint(path: str) -> dict:
+    """
+    Read the config of the checkpoint in `path`.
+
+    Raises:
+        ValueError: If the checkpoint was written by a newer version of the format.
+    """
+    with open(os.path.join(path, CHECKPOINT_FILE_NAME)) as f:
+        config = json.load(f)
+    if config.get("version", 0) > CHECKPOINT_VERSION:
+        raise ValueError(
+            f"Checkpoint version {config['version']} is not supported "
+            f"(supported: <= {CHECKPOINT_VERSION}), please update qtt"
+        )
+    return config
+
+
+def load_checkpoint_tensors(
+    path: str,
+    prefix: str | None = None,
+    exclude: tuple[str, ...] = (),
+) -> dict[str, "torch.Tensor"]:
+    """
+    Load the tensors of the checkpoint in `path`, memory-mapped where possible.
+
+    Only the selected tensors are read from disk, e.g.
+    `load_checkpoint_tensors(path, prefix="model.encoder.")` returns the state dict of
+    the feature encoder of a `PerfPredictor` checkpoint.
+
+    Args:
+        path: Directory of the checkpoint.
+        prefix: If given, only load the tensors whose name starts with `prefix` and
+            strip the prefix from their names.
+        exclude: Prefixes of the tensors not to load.
+
+    Returns:
+        The tensors by name, on the CPU.
+    """
+    import torch
+
+    tensor_file = read_checkpoint(path)["tensor_file"]
+    file_path = os.path.join(path, tensor_file)
+
+    def selected(key: str) -> bool:
+        if prefix is not None and not key.startswith(prefix):
+            return False
+        return not any(key.startswith(e) for e in exclude)
+
+    if tensor_file.endswith(".safetensors"):
+        if not HAS_SAFETENSORS:
+            raise ImportError("Loading this checkpoint requires the safetensors package")
+        from safetensors import safe_open
+
+        with safe_open(file_path, framework="pt") as f:
+            tensors = {key: f.get_tensor(key) for key in f.keys() if selected(key)}
+    else:
+        # the file is memory-mapped, only the selected tensors are actually read
+        tensors = torch.load(file_path, mmap=True, weights_only=True)
+        tensors = {key: value for key, value in tensors.items() if selected(key)}
+
+    if prefix is not None:
+        tensors = {key[len(prefix) :]: value for key, value in tensors.items()}
+    return tensors
@@ -1,34 +1,63 @@
+import contextlib
+import hashlib
+import logging
+import os
+import shutil
 import tarfile
+import tempfile
+import urllib.error
+import urllib.request
 from pathlib import Path
 
-import requests
-
 from qtt.optimizers import QuickOptimizer
+from qtt.predictors.remote import get_remote_optimizer
+from qtt.utils.checkpoint import has_checkpoint
+
+try:
+    import fcntl
+except ImportError:  # not available on Windows, the cache is not locked there
+    fcntl = None  # type: ignore
+
+logger = logging.getLogger(__name__)
 
+DEFAULT_SOURCE = "https://ml.informatik.uni-freiburg.de/research-artifacts/quicktunetool"
+# Overrides the default source, e.g. a mirror or a shared directory on air-gapped clusters
+MIRROR_ENV_VAR = "QTT_PRETRAINED_MIRROR"
+# Set to "1" to accept archives without a known checksum, e.g. for callers that do not
+# pass `allow_unverified` themselves
+ALLOW_UNVERIFIED_ENV_VAR = "QTT_ALLOW_UNVERIFIED"
+CHUNK_SIZE = 1 << 20
+
+# "sha256" is the checksum of the archive, it is verified after each download. Archives
+# without a known checksum are refused unless the caller opts out (`allow_unverified`)
 VERSION_MAP = {
     "mtlbm/micro": dict(
-        url="https://ml.informatik.uni-freiburg.de/research-artifacts/quicktunetool/mtlbm/micro/archive.tar.gz",
+        url=f"{DEFAULT_SOURCE}/mtlbm/micro/archive.tar.gz",
         name="archive",
         final_name="model",
         extension="pkl",
+        sha256=None,
     ),
     "mtlbm/mini": dict(
-        url="https://ml.informatik.uni-freiburg.de/research-artifacts/quicktunetool/mtlbm/mini/archive.tar.gz",
+        url=f"{DEFAULT_SOURCE}/mtlbm/mini/archive.tar.gz",
         name="archive",
         final_name="model",
         extension="pkl",
+        sha256=None,
     ),
     "mtlbm/extended": dict(
-        url="https://ml.informatik.uni-freiburg.de/research-artifacts/quicktunetool/mtlbm/extended/archive.tar.gz",
+        url=f"{DEFAULT_SOURCE}/mtlbm/extended/archive.tar.gz",
         name="archive",
         final_name="model",
         extension="pkl",
+        sha256=None,
     ),
     "mtlbm/full": dict(
-        url="https://ml.informatik.uni-freiburg.de/research-artifacts/quicktunetool/mtlbm/full/archive.tar.gz",
+        url=f"{DEFAULT_SOURCE}/mtlbm/full/archive.tar.gz",
         name="archive",
         final_name="model",
         extension="pkl",
+        sha256=None,
     ),
 }
 
@@ -38,7 +67,12 @@ def FILENAME(version: str) -> str:
     return f"{VERSION_MAP[version].get('name')}.tar.gz"
 
 
-def FILE_URL(version: str) -> str:
+def FILE_URL(version: str, mirror: str | None = None) -> str:
+    mirror = mirror or os.environ.get(MIRROR_ENV_VAR)
+    if mirror:
+        if "://" not in mirror:  # a local directory
+            mirror = Path(mirror).expanduser().absolute().as_uri()
+        return f"{mirror.rstrip('/')}/{version}/{FILENAME(version)}"
     return f"{VERSION_MAP[version].get('url')}"
 
 
@@ -51,59 +85,204 @@ def WEIGHTS_FINAL_NAME(version: str) -> str:
 
 
 def get_pretrained_optimizer(
-    version: str, download: bool = True, path: str = "~/.cache/qtt/pretrained"
+    version: str,
+    download: bool = True,
+    path: str = "~/.cache/qtt/pretrained",
+    server: str | tuple[str, int] | None = None,
+    authkey: bytes | None = None,
+    mirror: str | None = None,
+    sha256: str | None = None,
+    allow_unverified: bool | None = None,
 ) -> QuickOptimizer:
     """Get a pretrained optimizer.
 
+    The optimizer is downloaded once into the cache directory `path`. Concurrent calls
+    (e.g. many jobs starting at once) wait for a single download instead of each
+    fetching the archive.
+
     Args:
         version (str):
             Name of the pretrained optimizer version.
+        download (bool):
+            Whether to download the optimizer if it is not in the cache.
+        path (str):
+            Cache directory of the pretrained optimizers.
+        server (str | tuple[str, int], optional):
+            Address of a `PredictorServer`. If given, the predictors of the optimizer are
+            served by it instead of being loaded into this process.
+        authkey (bytes, optional):
+            Authentication key of the server. Defaults to the `QTT_PREDICTOR_AUTHKEY`
+            environment variable or the key file (see `load_authkey`), a key is
+            required for a TCP address.
+        mirror (str, optional):
+            Base URL (http(s):// or file://) or local directory to download from instead
+            of the default source, laid out as `<mirror>/<version>/archive.tar.gz`.
+            Defaults to the `QTT_PRETRAINED_MIRROR` environment variable.
+        sha256 (str, optional):
+            Expected checksum of the archive. Defaults to the one of the version.
+        allow_unverified (bool, optional):
+            Download and load the archive even if no checksum is known for it. The
+            archive contains a pickle, only enable this for a trusted source. Defaults
+            to the `QTT_ALLOW_UNVERIFIED` environment variable being "1".
 
     Returns:
         Optimizer: A pretrained optimizer.
     """
     assert version in VERSION_MAP
 
+    if server is not None:
+        return get_remote_optimizer(version, server, authkey)
+
     base_dir = Path(path).expanduser() / version
-    model_path = base_dir / FILENAME(version)
 
-    if download and not model_path.exists():
-        base_dir.mkdir(parents=True, exist_ok=True)
-        download_and_decompress(FILE_URL(version), model_path)
-    elif not model_path.exists():
-        raise ValueError(f"Pretrained optimizer '{version}' not found at {model_path}.")
+    if not _is_extracted(base_dir):
+        if not download:
+            raise ValueError(f"Pretrained optimizer '{version}' not found at {base_dir}.")
+        base_dir.parent.mkdir(parents=True, exist_ok=True)
+        with _file_lock(base_dir.with_name(base_dir.name + ".lock")):
+            # another process may have fetched it while we were waiting for the lock
+            if not _is_extracted(base_dir):
+                download_and_decompress(
+                    FILE_URL(version, mirror),
+                    base_dir / FILENAME(version),
+                    sha256=sha256 or VERSION_MAP[version].get("sha256"),
+                    allow_unverified=(
+                        allow_unverified
+                        if allow_unverified is not None
+                        else os.environ.get(ALLOW_UNVERIFIED_ENV_VAR) == "1"
+                    ),
+                )
 
     return QuickOptimizer.load(str(base_dir))
 
 
-def download_and_decompress(url: str, path: Path) -> None:
+def _is_extracted(path: Path) -> bool:
+    """Whether `path` contains a complete (extracted) optimizer."""
+    return has_checkpoint(str(path)) or (path / QuickOptimizer.model_file_name).exists()
+
+
+@contextlib.contextmanager
+def _file_lock(path: Path):
+    """Exclusive lock across processes, held while the context is active."""
+    with open(path, "a") as f:
+        if fcntl is not None:
+            fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def download_and_decompress(
+    url: str, path: Path, sha256: str | None = None, allow_unverified: bool = False
+) -> None:
     """Helper function to download a file from a URL and decompress it and store by given name.
 
+    The archive is streamed to a partial file (an interrupted download is resumed if
+    the server supports range requests), verified and then extracted to a staging
+    directory, which replaces `path.parent` once it is complete.
+
     Args:
-        url (str): URL of the file to download
+        url (str): URL (http(s):// or file://) of the file to download
         path (Path): Path along with filename to save the downloaded file
+        sha256 (str, optional): Expected checksum of the file
+        allow_unverified (bool): Whether to accept the file without a checksum
 
-    Returns:
-        bool: Flag to indicate if the download and decompression was successful
+    Raises:
+        ValueError: If the download fails, the checksum does not match or is missing,
+            or the archive contains unsafe members.
     """
-    # Check if the file already exists
-    if path.exists():
-        return
-
-    # Send a HTTP request to the URL of the file
-    response = requests.get(url, allow_redirects=True)
+    if sha256 is None and not allow_unverified:
+        raise ValueError(
+            f"No sha256 checksum is known for {url}, refusing to download and unpickle "
+            "an unverified archive. Pass the expected `sha256`, or `allow_unverified=True` "
+            f"(or set {ALLOW_UNVERIFIED_ENV_VAR}=1) if you trust the source."
+        )
+    target = path.parent
+    target.parent.mkdir(parents=True, exist_ok=True)
+    part = target.with_name(f"{target.name}.{path.name}.part")
 
-    # Check if the request is successful
-    if response.status_code != 200:
+    digest = _fetch(url, part)
+    if sha256 is None:
+        logger.warning(f"Using {url} without verifying its checksum (sha256 {digest})")
+    elif digest != sha256.lower():
+        part.unlink()
         raise ValueError(
-            f"Failed to download the surrogate from {url}. "
-            f"Received HTTP status code: {response.status_code}."
+            f"Checksum mismatch for {url}: expected sha256 {sha256}, got {digest}. "
+            "The download was removed, please try again."
         )
+    logger.info(f"Downloaded {url} (sha256 {digest})")
+
+    staging = Path(tempfile.mkdtemp(prefix=f".{target.name}.", dir=target.parent))
+    try:
+        with tarfile.open(part, "r:gz") as tar:
+            if hasattr(tarfile, "data_filter"):
+                tar.extractall(staging, filter="data")
+            else:  # extraction filters are missing before Python 3.11.4
+                tar.extractall(staging, members=_safe_members(tar, staging))
+        os.replace(part, staging / path.name)
+        if target.exists():  # e.g. a partial extraction of an older version
+            shutil.rmtree(target)
+        os.replace(staging, target)
+    finally:
+        shutil.rmtree(staging, ignore_errors=True)
+
+
+def _safe_members(tar: tarfile.TarFile, dest: Path) -> list[tarfile.TarInfo]:
+    """Members of `tar`, checked like the "data" extraction filter: only regular files
+    and directories (and links to them) that stay inside `dest`."""
+    dest = dest.resolve()
+    members = []
+    for member in tar.getmembers():
+        if not (member.isfile() or member.isdir() or member.issym() or member.islnk()):
+            raise ValueError(f"Refusing to extract special file {member.name!r}")
+        paths = [dest / member.name]
+        if member.issym():
+            paths.append(dest / Path(member.name).parent / member.linkname)
+        elif member.islnk():
+            paths.append(dest / member.linkname)
+        for p in paths:
+            if not p.resolve().is_relative_to(dest):
+                raise ValueError(f"Refusing to extract {member.name!r} outside of {dest}")
+        member.mode &= 0o755  # no setuid/setgid/sticky bits or group/world writes
+        members.append(member)
+    return members
+
+
+def _fetch(url: str, part: Path) -> str:
+    """Stream `url` to `part`, resuming a previous partial download. Returns the
+    sha256 of the complete file."""
+    hasher = hashlib.sha256()
+    offset = part.stat().st_size if part.exists() else 0
+    if offset:
+        with open(part, "rb") as f:
+            for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+                hasher.update(chunk)
 
-    # Save the .tar.gz file
-    with open(path, "wb") as f:
-        f.write(response.content)
+    request = urllib.request.Request(url)
+    if offset and url.startswith(("http://", "https://")):
+        request.add_header("Range", f"bytes={offset}-")
+    try:
+        response = urllib.request.urlopen(request, timeout=60)
+    except urllib.error.HTTPError as e:
+        if e.code != 416:  # 416: the partial file is already complete
+            raise ValueError(
+                f"Failed to download the surrogate from {url}. "
+                f"Received HTTP status code: {e.code}."
+            ) from e
+        return hasher.hexdigest()
+    except urllib.error.URLError as e:
+        raise ValueError(f"Failed to download the surrogate from {url}: {e.reason}") from e
 
-    # Decompress the .tar.gz file
-    with tarfile.open(path, "r:gz") as tar:
-        tar.extractall(path.parent.absolute())
+    with response:
+        if getattr(response, "status", None) != 206:  # the whole file is sent
+            hasher = hashlib.sha256()
+            offset = 0
+        elif offset:
+            logger.info(f"Resuming the download of {url} at {offset} bytes")
+        with open(part, "ab" if offset else "wb") as f:
+            for chunk in iter(lambda: response.read(CHUNK_SIZE), b""):
+                f.write(chunk)
+                hasher.update(chunk)
+    return hasher.hexdigest()
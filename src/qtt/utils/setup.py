@@ -4,7 +4,6 @@ import random
 from datetime import datetime
 
 import numpy as np
-import torch
 
 logger = logging.getLogger(__name__)
 
@@ -43,5 +42,7 @@ def fix_random_seeds(seed=None):
         seed = 42
     random.seed(seed)
     np.random.seed(seed)
+    import torch  # imported here, importing it is slow
+
     torch.manual_seed(seed)
     torch.cuda.manual_seed_all(seed)
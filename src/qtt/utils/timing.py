@@ -0,0 +1,122 @@
+import bisect
+import contextlib
+import math
+import threading
+import time
+from typing import Callable, Iterator
+
+# log-spaced histogram bins from 10 us to ~3 h, 4 per decade
+BIN_EDGES: list[float] = [10 ** (e / 4) for e in range(-20, 17)]
+
+TimingCallback = Callable[[str, float], None]
+
+
+class PhaseStats:
+    """Count, total, extremes and histogram of the durations of one phase."""
+
+    __slots__ = ("count", "total", "min", "max", "bins")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = 0.0
+        # bins[i] counts the durations in [BIN_EDGES[i - 1], BIN_EDGES[i])
+        self.bins = [0] * (len(BIN_EDGES) + 1)
+
+    def add(self, seconds: float) -> None:
+        self.count += 1
+        self.total += seconds
+        self.min = min(self.min, seconds)
+        self.max = max(self.max, seconds)
+        self.bins[bisect.bisect_right(BIN_EDGES, seconds)] += 1
+
+    def quantile(self, q: float) -> float:
+        """Approximate quantile: the upper edge of the bin containing it, clipped to the
+        observed range."""
+        if not self.count:
+            return math.nan
+        rank = q * self.count
+        seen = 0
+        for i, n in enumerate(self.bins):
+            seen += n
+            if seen >= rank and n:
+                edge = BIN_EDGES[i] if i < len(BIN_EDGES) else self.max
+                return min(max(edge, self.min), self.max)
+        return self.max
+
+    def to_dict(self) -> dict:
+        return {
+            "count": self.count,
+            "total": self.total,
+            "mean": self.total / self.count if self.count else math.nan,
+            "min": self.min if self.count else math.nan,
+            "max": self.max,
+            "p50": self.quantile(0.5),
+            "p90": self.quantile(0.9),
+            "p99": self.quantile(0.99),
+            "histogram": self.bins,
+        }
+
+
+class Timer:
+    """
+    Collects the durations of named phases, e.g. the steps of `QuickOptimizer.ask`,
+    into per-phase statistics and histograms.
+
+    Durations are recorded with `span`, as a context manager, or `add`. Every recorded
+    duration is also passed to the registered callbacks as `(phase, seconds)`, e.g. to
+    forward it to a monitoring system.
+
+    Example:
+        >>> timer = Timer()
+        >>> with timer.span("ask"):
+        ...     pass
+        >>> timer.summary()["ask"]["count"]
+        1
+    """
+
+    def __init__(self):
+        self.stats: dict[str, PhaseStats] = {}
+        self.callbacks: list[TimingCallback] = []
+        self._lock = threading.Lock()
+
+    @contextlib.contextmanager
+    def span(self, phase: str) -> Iterator[None]:
+        """Time the enclosed block as `phase`."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(phase, time.perf_counter() - start)
+
+    def add(self, phase: str, seconds: float) -> None:
+        """Record a duration of `phase`."""
+        with self._lock:
+            stats = self.stats.get(phase)
+            if stats is None:
+                stats = self.stats[phase] = PhaseStats()
+            stats.add(seconds)
+        for callback in self.callbacks:
+            callback(phase, seconds)
+
+    def summary(self) -> dict[str, dict]:
+        """Statistics of all phases: count, total, mean, min, max, approximate
+        p50/p90/p99 (in seconds) and the histogram over `BIN_EDGES`."""
+        with self._lock:
+            return {phase: stats.to_dict() for phase, stats in sorted(self.stats.items())}
+
+    def reset(self) -> None:
+        with self._lock:
+            self.stats = {}
+
+    def __getstate__(self):
+        # the callbacks are bound to the running process
+        state = self.__dict__.copy()
+        state["callbacks"] = []
+        state["_lock"] = None
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
@@ -0,0 +1,69 @@
+import numpy as np
+import pandas as pd
+import pytest
+from ConfigSpace import Categorical, ConfigurationSpace, Float, Integer
+
+# relative cost of an epoch per model of the synthetic search space
+MODEL_COST = {"a": 1.0, "b": 2.0, "c": 5.0, "d": 20.0}
+MODEL_SCORE = {"a": 0.5, "b": 0.6, "c": 0.7, "d": 0.8}
+
+
+def make_cs(seed: int = 0) -> ConfigurationSpace:
+    cs = ConfigurationSpace(seed=seed)
+    cs.add(
+        [
+            Categorical("model", list(MODEL_COST)),
+            Float("lr", (1e-4, 1e-1), log=True),
+            Integer("bs", (8, 256), log=True),
+            Categorical("opt", ["sgd", "adam"]),
+        ]
+    )
+    return cs
+
+
+def make_meta(n: int = 512, m: int = 10, seed: int = 0):
+    """Synthetic meta-dataset: pipelines (with a `num-classes` meta-feature), partially
+    observed learning curves of length `m` and costs."""
+    rng = np.random.default_rng(seed)
+    X = pd.DataFrame([dict(c) for c in make_cs(seed).sample_configuration(n)])
+    X["num-classes"] = rng.integers(2, 100, size=n)
+    base = rng.uniform(0.3, 0.9, size=(n, 1))
+    curve = base * (1 - np.exp(-np.arange(1, m + 1) / 3.0)) + rng.normal(0, 0.01, (n, m))
+    for i, length in enumerate(rng.integers(1, m + 1, size=n)):
+        curve[i, length:] = np.nan
+    cost = rng.uniform(1, 20, size=(n, 1))
+    return X, curve, cost
+
+
+def objective(trial: dict) -> dict:
+    """Score and cost of a trial on the synthetic task, the cost of each step is the one
+    of an epoch of its model."""
+    model = trial["config"]["model"]
+    fidelity = trial["fidelity"]
+    result = dict(trial)
+    result.update(
+        status=True,
+        score=float(MODEL_SCORE[model] * (1 - np.exp(-fidelity / 3.0))),
+        cost=MODEL_COST[model],
+    )
+    return result
+
+
+@pytest.fixture(scope="session")
+def meta():
+    return make_meta()
+
+
+@pytest.fixture(scope="session")
+def fitted_predictors(meta, tmp_path_factory):
+    """A performance and a cost predictor, quickly fitted on the synthetic meta-dataset."""
+    from qtt import CostPredictor, PerfPredictor
+
+    X, curve, cost = meta
+    path = tmp_path_factory.mktemp("predictors")
+    perf = PerfPredictor(fit_params=dict(max_iter=3), path=str(path / "perf"), verbosity=0)
+    perf.fit(X.copy(), curve)
+    cost_predictor = CostPredictor(
+        fit_params=dict(max_iter=3), path=str(path / "cost"), verbosity=0
+    ).fit(X.copy(), cost)
+    return perf, cost_predictor
@@ -0,0 +1,117 @@
+import json
+import os
+import sys
+
+import numpy as np
+import pytest
+
+from qtt import CostPredictor, Optimizer, PerfPredictor, Predictor, RandomOptimizer
+from qtt.utils.checkpoint import CHECKPOINT_FILE_NAME, has_checkpoint
+
+from .conftest import make_cs, objective
+from .test_quick_optimizer import make_optimizer
+
+
+class ConstantPredictor(Predictor):
+    """A user predictor that does not implement the checkpoint format."""
+
+    def _fit(self, X, y, **kwargs):
+        self.value = float(np.nanmean(y))
+        return self
+
+    def _predict(self, **kwargs):
+        return np.full(len(kwargs["X"]), self.value)
+
+
+def test_predictors_round_trip(meta, fitted_predictors, tmp_path):
+    X, curve, _ = meta
+    perf, cost = fitted_predictors
+    x = perf.preprocess(X=X.iloc[:16])
+
+    perf.save(str(tmp_path / "perf"), verbose=False)
+    cost.save(str(tmp_path / "cost"), verbose=False)
+    assert has_checkpoint(str(tmp_path / "perf")) and has_checkpoint(str(tmp_path / "cost"))
+    perf2 = PerfPredictor.load(str(tmp_path / "perf"), verbose=False)
+    cost2 = CostPredictor.load(str(tmp_path / "cost"), verbose=False)
+
+    # the caches of the GP are rebuilt after loading with an iterative (CG) solve
+    for a, b in zip(perf.predict(X=x, curve=curve[:16]), perf2.predict(X=x, curve=curve[:16])):
+        np.testing.assert_allclose(a, b, atol=2e-3)
+    for key, value in perf.model.state_dict().items():
+        np.testing.assert_array_equal(value, perf2.model.state_dict()[key])
+    x = cost.preprocess(X=X.iloc[:16])
+    np.testing.assert_allclose(cost.predict(X=x), cost2.predict(X=x), rtol=1e-5)
+
+
+def test_predictor_without_checkpoint_support_is_pickled(meta, tmp_path):
+    X, _, cost = meta
+    predictor = ConstantPredictor(path=str(tmp_path)).fit(X, cost)
+
+    path = predictor.save(verbose=False)
+
+    assert not has_checkpoint(path)
+    assert ConstantPredictor.load(path, verbose=False).value == predictor.value
+
+
+def test_quick_optimizer_round_trip(fitted_predictors, tmp_path):
+    optimizer = make_optimizer(fitted_predictors, tmp_path / "run")
+    for _ in range(5):
+        optimizer.tell(objective(optimizer.ask()))
+
+    path = optimizer.save(str(tmp_path / "checkpoint"), verbose=False)
+    assert not os.path.exists(os.path.join(path, Optimizer.state_file_name))
+    loaded = Optimizer.load(path, verbose=False)
+
+    assert type(loaded) is type(optimizer)
+    np.testing.assert_array_equal(loaded.curves, optimizer.curves)
+    np.testing.assert_array_equal(loaded.fidelities, optimizer.fidelities)
+    assert loaded.evaled == optimizer.evaled
+    assert loaded.ask()["config-id"] == optimizer.ask()["config-id"]
+
+
+def test_random_optimizer_round_trip(tmp_path):
+    optimizer = RandomOptimizer(make_cs(), 10, 16, path=str(tmp_path / "run"), verbosity=0)
+    optimizer.tell(objective(optimizer.ask()))
+
+    loaded = Optimizer.load(optimizer.save(str(tmp_path / "checkpoint"), verbose=False))
+
+    assert isinstance(loaded, RandomOptimizer)
+    assert loaded.evaled == optimizer.evaled
+    assert loaded.candidates == optimizer.candidates
+
+
+def test_pickled_state_requires_opt_in(meta, fitted_predictors, tmp_path):
+    X, curve, _ = meta
+    optimizer = make_optimizer(fitted_predictors, tmp_path / "run")
+    # a user predictor without checkpoint support is pickled next to the checkpoint
+    optimizer.cost_predictor = ConstantPredictor(path=str(tmp_path)).fit(X, curve[:, :1])
+    path = optimizer.save(str(tmp_path / "checkpoint"), verbose=False)
+
+    with pytest.raises(ValueError, match="allow_pickle"):
+        Optimizer.load(path, verbose=False)
+    loaded = Optimizer.load(path, verbose=False, allow_pickle=True)
+    assert loaded.cost_predictor.value == optimizer.cost_predictor.value
+
+
+@pytest.mark.parametrize("key", ["optimizer", "predictor"])
+def test_checkpoint_does_not_import_unknown_modules(fitted_predictors, tmp_path, monkeypatch, key):
+    marker = tmp_path / "imported"
+    (tmp_path / "untrusted_module.py").write_text(
+        f"open({str(marker)!r}, 'w').close()\nclass QuickOptimizer: pass\n"
+    )
+    monkeypatch.syspath_prepend(str(tmp_path))
+    optimizer = make_optimizer(fitted_predictors, tmp_path / "run")
+    path = optimizer.save(str(tmp_path / "checkpoint"), verbose=False)
+
+    file_path = os.path.join(path, CHECKPOINT_FILE_NAME)
+    with open(file_path) as f:
+        config = json.load(f)
+    target = config if key == "optimizer" else config["predictors"]["perf_predictor"]
+    target["module"] = "untrusted_module"
+    with open(file_path, "w") as f:
+        json.dump(config, f)
+
+    with pytest.raises(ValueError, match="Unknown class"):
+        Optimizer.load(path, verbose=False)
+    assert not marker.exists()
+    assert "untrusted_module" not in sys.modules
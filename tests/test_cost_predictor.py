@@ -0,0 +1,21 @@
+import numpy as np
+
+from qtt import CostPredictor
+
+
+def test_predict_returns_costs_in_fitted_units(meta, tmp_path):
+    X = meta[0]
+    y = 5.0 + 2.0 * X["num-classes"].to_numpy(dtype=float)[:, None]  # 9 to 203 seconds
+    predictor = CostPredictor(
+        fit_params=dict(max_iter=40, learning_rate_init=3e-3, early_stop=False, patience=None),
+        path=str(tmp_path),
+        seed=0,
+        verbosity=0,
+    ).fit(X, y)
+
+    pred = predictor.predict(X=X)
+
+    assert pred.shape == (len(X),)
+    assert np.all(pred > 0)
+    assert np.median(np.abs(pred / y[:, 0] - 1)) < 0.1
+    np.testing.assert_allclose(pred.mean(), y.mean(), rtol=0.05)
@@ -0,0 +1,45 @@
+import pytest
+import torch
+from torch import nn
+
+from qtt.predictors.models import MLP, grouped_mlp
+
+
+def make_mlps(in_dim: list[int], out_dim: int = 4, nlayers: int = 2) -> nn.ModuleList:
+    torch.manual_seed(0)
+    return nn.ModuleList([MLP(dim, out_dim, nlayers, 8) for dim in in_dim])
+
+
+@pytest.mark.parametrize("in_dim", [[3], [3, 5, 2], [4, 4]])
+def test_grouped_mlp_matches_per_branch_mlps(in_dim):
+    mlps = make_mlps(in_dim)
+    x = torch.randn(16, sum(in_dim) + 2)  # trailing columns are ignored
+    x_split = torch.split(x[:, : sum(in_dim)], in_dim, dim=1)
+    expected = torch.cat([mlp(xi) for mlp, xi in zip(mlps, x_split)], dim=1)
+
+    for fused in (False, True):
+        out = grouped_mlp(mlps, in_dim, x, fused=fused)
+        torch.testing.assert_close(out, expected, rtol=1e-5, atol=1e-6)
+
+
+def test_fused_grouped_mlp_passes_gradients_to_the_modules():
+    in_dim = [3, 5, 2]
+    mlps = make_mlps(in_dim)
+    x = torch.randn(16, sum(in_dim))
+
+    grouped_mlp(mlps, in_dim, x, fused=False).square().sum().backward()
+    expected = [p.grad.clone() for p in mlps.parameters()]
+    mlps.zero_grad()
+    grouped_mlp(mlps, in_dim, x, fused=True).square().sum().backward()
+
+    for p, grad in zip(mlps.parameters(), expected):
+        torch.testing.assert_close(p.grad, grad, rtol=1e-4, atol=1e-6)
+
+
+def test_different_architectures_are_not_fused():
+    mlps = nn.ModuleList([MLP(3, 4, 2, 8), MLP(2, 4, 3, 8)])
+    x = torch.randn(5, 5)
+
+    out = grouped_mlp(mlps, [3, 2], x, fused=True)
+
+    torch.testing.assert_close(out, torch.cat([mlps[0](x[:, :3]), mlps[1](x[:, 3:])], dim=1))
@@ -0,0 +1,50 @@
+import gpytorch
+import numpy as np
+import pytest
+import torch
+
+
+@pytest.fixture
+def encoding(meta, fitted_predictors):
+    X, curve, _ = meta
+    perf = fitted_predictors[0]
+    return perf.encode(X=perf.preprocess(X=X.iloc[:64]), curve=curve[:64])
+
+
+@pytest.mark.parametrize("chunk_size", [7, 1024])
+def test_covariance_matches_gpytorch_posterior(fitted_predictors, encoding, chunk_size):
+    perf = fitted_predictors[0]
+    index = [3, 10, 42]
+
+    covar = perf.covariance(encoding, index, chunk_size=chunk_size)
+
+    gp_model = perf.model.gp_model
+    with torch.no_grad(), gpytorch.settings.fast_pred_var(False):
+        expected = gp_model(encoding).covariance_matrix[:, index].cpu().numpy()
+    # float32 solves, compare relative to the scale of the covariance
+    np.testing.assert_allclose(covar, expected, atol=1e-2 * np.abs(expected).max())
+
+
+def test_predict_mean_matches_gpytorch_posterior(meta, fitted_predictors):
+    X, curve, _ = meta
+    perf = fitted_predictors[0]
+    x = torch.as_tensor(perf.preprocess(X=X.iloc[:64]), dtype=torch.float32)
+    c = torch.as_tensor(np.nan_to_num(curve[:64]), dtype=torch.float32)
+    model = perf.model.cpu()
+
+    cache = model.mean_cache()
+    mean = model.predict_mean(x, c, cache)
+
+    np.testing.assert_allclose(mean, model.predict_mean(x, c), rtol=1e-5, atol=1e-6)
+    np.testing.assert_allclose(mean, model.predict(x, c).mean, rtol=1e-4, atol=1e-4)
+
+
+def test_fast_predict_matches_gpytorch_posterior(fitted_predictors, encoding):
+    gp_model = fitted_predictors[0].model.gp_model.eval()
+
+    mean, var = gp_model.fast_predict(encoding)
+
+    with torch.no_grad(), gpytorch.settings.fast_pred_var():
+        posterior = gp_model(encoding)
+    torch.testing.assert_close(mean, posterior.mean, rtol=1e-4, atol=1e-4)
+    torch.testing.assert_close(var, posterior.variance, rtol=1e-3, atol=1e-4)
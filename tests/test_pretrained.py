@@ -0,0 +1,93 @@
+import hashlib
+import io
+import tarfile
+
+import pytest
+
+from qtt.predictors.remote import PredictorServer
+from qtt.utils import pretrained
+
+
+def make_archive(path, members):
+    with tarfile.open(path, "w:gz") as tar:
+        for info, data in members:
+            tar.addfile(info, io.BytesIO(data) if data else None)
+    return path
+
+
+def file_info(name: str, size: int = 3) -> tarfile.TarInfo:
+    info = tarfile.TarInfo(name)
+    info.size = size
+    return info
+
+
+@pytest.fixture
+def archive(tmp_path):
+    return make_archive(tmp_path / "archive.tar.gz", [(file_info("model.pkl"), b"abc")])
+
+
+def test_unverified_archive_is_refused(archive, tmp_path):
+    target = tmp_path / "out" / "archive.tar.gz"
+    with pytest.raises(ValueError, match="allow_unverified"):
+        pretrained.download_and_decompress(archive.as_uri(), target)
+    assert not target.parent.exists()
+
+    pretrained.download_and_decompress(archive.as_uri(), target, allow_unverified=True)
+    assert (target.parent / "model.pkl").read_bytes() == b"abc"
+
+
+def test_checksum_is_verified(archive, tmp_path):
+    digest = hashlib.sha256(archive.read_bytes()).hexdigest()
+    with pytest.raises(ValueError, match="Checksum mismatch"):
+        pretrained.download_and_decompress(
+            archive.as_uri(), tmp_path / "bad" / "archive.tar.gz", sha256="0" * 64
+        )
+    target = tmp_path / "good" / "archive.tar.gz"
+    pretrained.download_and_decompress(archive.as_uri(), target, sha256=digest)
+    assert (target.parent / "model.pkl").exists()
+
+
+def unsafe_members():
+    link = tarfile.TarInfo("link")
+    link.type = tarfile.SYMTYPE
+    link.linkname = "../../etc/passwd"
+    device = tarfile.TarInfo("device")
+    device.type = tarfile.CHRTYPE
+    return [(file_info("../evil", 1), b"x"), (link, None), (device, None)]
+
+
+@pytest.mark.parametrize("with_filter", [True, False])
+@pytest.mark.parametrize("member", unsafe_members(), ids=["parent", "symlink", "device"])
+def test_unsafe_members_are_refused(tmp_path, monkeypatch, with_filter, member):
+    if not with_filter:  # Python < 3.11.4
+        monkeypatch.delattr(tarfile, "data_filter")
+    archive = make_archive(tmp_path / "unsafe.tar.gz", [member])
+    with pytest.raises((ValueError, tarfile.TarError)):
+        pretrained.download_and_decompress(
+            archive.as_uri(), tmp_path / "out" / "archive.tar.gz", allow_unverified=True
+        )
+
+
+@pytest.mark.parametrize("with_filter", [True, False])
+def test_absolute_members_stay_inside(tmp_path, monkeypatch, with_filter):
+    if not with_filter:
+        monkeypatch.delattr(tarfile, "data_filter")
+    outside = tmp_path / "evil"
+    archive = make_archive(tmp_path / "unsafe.tar.gz", [(file_info(str(outside), 1), b"x")])
+    try:  # the data filter strips the leading "/", the fallback refuses the member
+        pretrained.download_and_decompress(
+            archive.as_uri(), tmp_path / "out" / "archive.tar.gz", allow_unverified=True
+        )
+    except ValueError:
+        pass
+    assert not outside.exists()
+
+
+def test_server_passes_the_opt_out(monkeypatch):
+    calls = []
+    monkeypatch.setattr(
+        pretrained, "get_pretrained_optimizer", lambda name, **kwargs: calls.append(kwargs)
+    )
+    server = PredictorServer("unused", allow_unverified=True)
+    server._get_optimizer("mtlbm/micro")
+    assert calls[0]["allow_unverified"] is True
@@ -0,0 +1,99 @@
+import pytest
+
+from qtt import PerfPredictor, QuickOptimizer
+
+from .conftest import make_cs, objective
+
+
+def make_optimizer(predictors, path, n: int = 32, **kwargs) -> QuickOptimizer:
+    perf, cost = predictors
+    optimizer = QuickOptimizer(
+        make_cs(1), 10, perf, cost, path=str(path), seed=0, verbosity=0, **kwargs
+    )
+    optimizer.setup(n, metafeat={"num-classes": 10})
+    return optimizer
+
+
+@pytest.mark.parametrize("cost_aware", [False, True])
+def test_fidelity_jump_is_taken_for_cheap_steps_only(fitted_predictors, tmp_path, cost_aware):
+    overhead = 100.0
+    optimizer = make_optimizer(
+        fitted_predictors,
+        tmp_path,
+        cost_aware=cost_aware,
+        acq_fn="ucb",
+        max_fidelity_jump=4,
+        fidelity_jump_overhead=overhead,
+    )
+    cheap, costly = 0, 1
+    for index, step_cost in ((cheap, 1.0), (costly, 1000.0)):
+        result = {"config-id": index, "fidelity": 1, "score": 0.3, "status": True}
+        optimizer.tell({**result, "cost": overhead + step_cost})
+
+    step_costs = optimizer.predict_step_costs([cheap, costly])
+    assert step_costs[0, 1] < step_costs[1, 1]
+
+    fidelities = optimizer._choose_fidelities([cheap, costly])
+    assert fidelities[0] > 2  # several steps share the overhead
+    assert fidelities[1] == 2  # a single step
+
+
+def test_pool_growth_keeps_the_pool_consistent(fitted_predictors, tmp_path):
+    optimizer = make_optimizer(fitted_predictors, tmp_path, n=5, pool_growth=20)
+    for _ in range(6):
+        trial = optimizer.ask()
+        optimizer.tell(objective(trial))
+
+    n = optimizer.N
+    assert n > 5
+    assert len(optimizer.configs) == len(optimizer.pipelines) == len(optimizer.metafeat) == n
+    assert optimizer.curves.shape[0] == optimizer.fidelities.shape[0] == n
+    assert optimizer._perf_x.shape[0] == n
+    assert (optimizer.metafeat["num-classes"] == 10).all()
+
+
+def test_failed_async_refit_after_pool_growth(fitted_predictors, tmp_path, monkeypatch):
+    optimizer = make_optimizer(
+        fitted_predictors,
+        tmp_path,
+        pool_growth=8,
+        refit_async=True,
+        refit_incremental=True,
+        init_random_search_steps=1,
+    )
+    trial = optimizer.ask()
+    optimizer.tell(objective(trial))
+
+    def fail(*args, **kwargs):
+        raise RuntimeError("refit failed")
+
+    monkeypatch.setattr(PerfPredictor, "fit_extra", fail)
+    optimizer._start_refit()
+    assert optimizer._refit_job is not None
+    optimizer._refit_job[0].exception(timeout=60)  # wait for the refit
+
+    n = optimizer.N
+    optimizer._grow_pool()
+    assert optimizer.N > n
+    optimizer._swap_refit()  # warns instead of raising
+
+    assert optimizer._refit_job is None
+    assert optimizer._refit_new.shape == (optimizer.N, optimizer.max_fidelity)
+    # the observations of the failed refit are used by the next one
+    assert optimizer._refit_new[trial["config-id"], trial["fidelity"] - 1]
+
+
+def test_ask_hands_out_distinct_pending_trials(fitted_predictors, tmp_path):
+    optimizer = make_optimizer(fitted_predictors, tmp_path, init_random_search_steps=0)
+
+    trials = optimizer.ask(4)
+    indices = [t["config-id"] for t in trials]
+    assert len(set(indices)) == 4
+    assert set(optimizer.pending) == set(indices)
+
+    more = optimizer.ask(4)
+    assert not {t["config-id"] for t in more} & set(indices)
+
+    optimizer.tell(objective(trials[0]))
+    assert indices[0] not in optimizer.pending
+    assert indices[0] in optimizer.evaled
@@ -0,0 +1,77 @@
+import threading
+import time
+
+import pytest
+
+from qtt import QuickTuner, RandomOptimizer
+from qtt.optimizers import Optimizer
+
+from .conftest import make_cs, objective
+from .test_quick_optimizer import make_optimizer
+
+
+class LegacyOptimizer(Optimizer):
+    """A user optimizer implementing the `ask(self)` signature without `k`."""
+
+    def __init__(self, n: int, path: str):
+        super().__init__(path=path)
+        self.configs = [dict(c) for c in make_cs().sample_configuration(n)]
+        self.next = 0
+        self.told: list[int] = []
+
+    def ask(self):
+        if self.next == len(self.configs):
+            return None
+        self.next += 1
+        return {"config-id": self.next - 1, "config": self.configs[self.next - 1], "fidelity": 1}
+
+    def tell(self, report):
+        self.told.append(report["config-id"])
+
+
+class InFlight:
+    """Objective that records the trials evaluated at the same time."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.running: set[int] = set()
+        self.overlaps: list[int] = []
+        self.max_running = 0
+
+    def __call__(self, trial, trial_info=None):
+        index = trial["config-id"]
+        with self.lock:
+            if index in self.running:
+                self.overlaps.append(index)
+            self.running.add(index)
+            self.max_running = max(self.max_running, len(self.running))
+        time.sleep(0.02)
+        with self.lock:
+            self.running.discard(index)
+        return objective(trial)
+
+
+def test_parallel_run_with_legacy_ask(tmp_path):
+    optimizer = LegacyOptimizer(8, path=str(tmp_path / "opt"))
+    tuner = QuickTuner(optimizer, InFlight(), path=str(tmp_path), n_workers=3, verbosity=0)
+
+    tuner.run(fevals=6)
+
+    assert sorted(optimizer.told) == list(range(6))
+
+
+@pytest.mark.parametrize("kind", ["quick", "random"])
+def test_parallel_run_never_evaluates_a_pending_trial_twice(fitted_predictors, tmp_path, kind):
+    if kind == "quick":
+        optimizer = make_optimizer(fitted_predictors, tmp_path / "opt", n=16)
+    else:
+        optimizer = RandomOptimizer(make_cs(), 10, 16, path=str(tmp_path / "opt"), verbosity=0)
+    f = InFlight()
+    tuner = QuickTuner(optimizer, f, path=str(tmp_path), n_workers=3, verbosity=0)
+
+    tuner.run(fevals=12)
+
+    assert len(tuner.history) == 12
+    assert f.overlaps == []
+    assert f.max_running > 1
+    assert not optimizer.pending
@@ -0,0 +1,64 @@
+import time
+from multiprocessing import AuthenticationError
+
+import numpy as np
+import pytest
+
+from qtt.predictors.remote import (
+    AUTHKEY_ENV,
+    PredictorServer,
+    RemotePredictor,
+    get_remote_optimizer,
+)
+
+from .test_quick_optimizer import make_optimizer
+
+AUTHKEY = b"test-key"
+
+
+@pytest.fixture
+def server(fitted_predictors, tmp_path):
+    optimizer = make_optimizer(fitted_predictors, tmp_path / "run")
+    server = PredictorServer(
+        str(tmp_path / "qtt.sock"), optimizers={"test": optimizer}, authkey=AUTHKEY
+    )
+    server.start()
+    while server._listener is None:  # bound in the serving thread
+        time.sleep(0.01)
+    yield server, optimizer
+    server.close()
+
+
+def test_remote_predictions_match_local_ones(meta, server):
+    X, curve, _ = meta
+    server, optimizer = server
+
+    remote = get_remote_optimizer("test", server.address, authkey=AUTHKEY)
+
+    for kind in ("perf", "cost"):
+        predictor = getattr(remote, f"{kind}_predictor")
+        local = getattr(optimizer, f"{kind}_predictor")
+        assert isinstance(predictor, RemotePredictor)
+        x = predictor.preprocess(X=X.iloc[:16])
+        np.testing.assert_allclose(x, local.preprocess(X=X.iloc[:16]))
+        kwargs = dict(X=x, curve=curve[:16]) if kind == "perf" else dict(X=x)
+        for a, b in zip(predictor.predict(**kwargs), local.predict(**kwargs)):
+            np.testing.assert_allclose(a, b, rtol=1e-5, atol=1e-6)
+        predictor.close()
+
+
+def test_wrong_authkey_is_rejected(meta, server):
+    server, _ = server
+    predictor = RemotePredictor(server.address, "test", "cost", authkey=b"wrong")
+
+    with pytest.raises(AuthenticationError):
+        predictor.preprocess(X=meta[0].iloc[:2])
+
+
+def test_tcp_requires_authkey(tmp_path, monkeypatch):
+    monkeypatch.delenv(AUTHKEY_ENV, raising=False)
+    monkeypatch.setenv("HOME", str(tmp_path))  # no key file
+    predictor = RemotePredictor(("127.0.0.1", 1), "test", "perf")
+
+    with pytest.raises(ValueError, match="authentication key"):
+        predictor.preprocess(X=None)
@@ -0,0 +1,84 @@
+import pickle
+
+import numpy as np
+
+from qtt import RandomOptimizer
+from qtt.optimizers.status import Status
+
+from .conftest import make_cs
+
+
+def make_optimizer(tmp_path, n: int = 8) -> RandomOptimizer:
+    return RandomOptimizer(make_cs(), 10, n, path=str(tmp_path), verbosity=0)
+
+
+def test_views_behave_like_sets(tmp_path):
+    optimizer = make_optimizer(tmp_path)
+
+    optimizer.evaled.add(2)
+    optimizer.evaled.add(2)
+    optimizer.evaled.add(5)
+    optimizer.pending.add(5)
+    optimizer.failed.discard(3)  # not failed, no-op
+
+    assert optimizer.evaled == {2, 5}
+    assert len(optimizer.evaled) == 2
+    assert list(optimizer.evaled) == [2, 5]
+    assert 2 in optimizer.evaled and 3 not in optimizer.evaled
+    assert "2" not in optimizer.evaled and 100 not in optimizer.evaled
+    assert optimizer.evaled - optimizer.pending == {2}
+    assert isinstance(optimizer.evaled | {7}, set)
+
+    optimizer.pending.discard(5)
+    assert len(optimizer.pending) == 0
+    assert optimizer._status[5] == Status.EVALED
+
+
+def test_setter_replaces_the_set(tmp_path):
+    optimizer = make_optimizer(tmp_path)
+    optimizer.stoped = {0, 1}
+
+    optimizer.stoped = [1, 4]
+
+    assert optimizer.stoped == {1, 4}
+    assert len(optimizer.stoped) == 2
+
+
+def test_counters_follow_status_changes(tmp_path):
+    optimizer = make_optimizer(tmp_path, n=4)
+    assert optimizer._n_open == 4 and optimizer._n_selectable == 4
+
+    optimizer.pending.add(0)  # not done, but not selectable
+    optimizer.evaled.add(1)  # done, still selectable
+    optimizer.failed.add(2)
+    assert optimizer._n_open == 2
+    assert optimizer._n_selectable == 2
+    np.testing.assert_array_equal(optimizer._selectable, [False, True, False, True])
+
+    optimizer.pending.discard(0)
+    optimizer.stoped.add(1)
+    assert optimizer._n_open == 2
+    np.testing.assert_array_equal(optimizer._selectable, [True, False, False, True])
+    assert sorted(optimizer._sample_selectable(10)) == [0, 3]
+
+
+def test_legacy_state_is_migrated(tmp_path):
+    optimizer = make_optimizer(tmp_path)
+    state = dict(optimizer.__getstate__())
+    for key in ("_status", "_status_counts", "_selectable", "_n_open", "_n_selectable"):
+        state.pop(key, None)
+    # optimizers pickled before the status array kept one set per status
+    state.update(evaled={1, 2}, stoped={2}, failed={3}, pending={4})
+
+    legacy = RandomOptimizer.__new__(RandomOptimizer)
+    legacy.__setstate__(state)
+    loaded = pickle.loads(pickle.dumps(legacy))
+
+    for restored in (legacy, loaded):
+        assert restored.evaled == {1, 2}
+        assert restored.stoped == {2}
+        assert restored.failed == {3}
+        assert restored.pending == {4}
+        assert "evaled" not in restored.__dict__
+        assert restored._n_open == 5
+        assert restored._n_selectable == 5